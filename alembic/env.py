@@ -10,7 +10,14 @@ from alembic import context
 from app.core.config import settings
 from app.db.models.base import Base
 from app.db.models.wallets import Wallet
+from app.db.models.wallet_balance import WalletBalance
 from app.db.models.transaction import Transaction
+from app.db.models.idempotency_key import IdempotencyKey
+from app.db.models.outbox_event import OutboxEvent
+from app.db.models.wallet_balance_snapshot import WalletBalanceSnapshot
+from app.db.models.job_checkpoint import JobCheckpoint
+from app.db.models.scheduled_operation import ScheduledOperation
+from app.db.partitions import is_transaction_partition
 
 
 # this is the Alembic Config object, which provides
@@ -36,6 +43,13 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # Ledger partitions are created by the maintenance job, not the models.
+    if type_ == "table":
+        return not is_transaction_partition(name)
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -52,6 +66,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -61,7 +76,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,40 @@
+"""wallets keyset index
+
+Revision ID: 3c1d7a9e2b40
+Revises: 5bf027093200
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d7a9e2b40'
+down_revision: Union[str, Sequence[str], None] = '5bf027093200'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_wallets_created_at_id',
+            'wallets',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_wallets_created_at_id',
+            table_name='wallets',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,75 @@
+"""link transactions to wallets
+
+Revision ID: 8a4f2c6d1e57
+Revises: 3c1d7a9e2b40
+Create Date: 2026-10-18 09:30:00.000000
+
+Ledger rows written before this revision never recorded their wallet, so
+there is nothing to link them to: they keep wallet_id = NULL. Instead each
+wallet with a balance gets one OPENING_BALANCE entry for that balance less
+whatever is already linked to it, so its linked ledger sums to its balance.
+
+Only adding the column and the NOT VALID foreign key take the table lock,
+and they commit at once. The index is built concurrently, the backfill is
+a plain INSERT, and the validation runs in its own transaction under a
+SHARE UPDATE EXCLUSIVE lock, so none of the longer steps block writers.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4f2c6d1e57'
+down_revision: Union[str, Sequence[str], None] = '3c1d7a9e2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transactions', sa.Column('wallet_id', sa.UUID(), nullable=True))
+    op.execute(
+        'ALTER TABLE transactions '
+        'ADD CONSTRAINT fk_transactions_wallet_id_wallets '
+        'FOREIGN KEY (wallet_id) REFERENCES wallets (id) NOT VALID'
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_wallet_id_created_at_id',
+            'transactions',
+            ['wallet_id', sa.text('created_at DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.execute(
+            'INSERT INTO transactions (id, wallet_id, type, amount, created_at) '
+            "SELECT gen_random_uuid(), opening.wallet_id, 'OPENING_BALANCE', opening.amount, now() "
+            'FROM (SELECT w.id AS wallet_id, w.balance - coalesce(('
+            "SELECT sum(CASE WHEN t.type IN ('DEPOSIT', 'TRANSFER_IN') "
+            'THEN t.amount ELSE -t.amount END) '
+            'FROM transactions AS t WHERE t.wallet_id = w.id'
+            '), 0) AS amount FROM wallets AS w) AS opening '
+            'WHERE opening.amount <> 0'
+        )
+        op.execute(
+            'ALTER TABLE transactions '
+            'VALIDATE CONSTRAINT fk_transactions_wallet_id_wallets'
+        )
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_transactions_wallet_id_created_at_id',
+            table_name='transactions',
+            postgresql_concurrently=True,
+        )
+    op.execute("DELETE FROM transactions WHERE type = 'OPENING_BALANCE'")
+    op.drop_constraint(
+        'fk_transactions_wallet_id_wallets',
+        'transactions',
+        type_='foreignkey',
+    )
+    op.drop_column('transactions', 'wallet_id')
@@ -0,0 +1,148 @@
+"""partition transactions by month
+
+Revision ID: d4a8e61f0c93
+Revises: b7e3d91f4a26
+Create Date: 2026-10-18 10:30:00.000000
+
+The existing heap is not copied: it becomes the ``transactions_legacy``
+partition covering everything before the start of next month, and new
+monthly partitions take over from there. The only full-table work is an
+index build done CONCURRENTLY and a CHECK constraint validation under a
+SHARE UPDATE EXCLUSIVE lock, which lets ATTACH PARTITION skip its own scan.
+The legacy heap's own foreign key to wallets is dropped before the attach,
+so the partition only carries the one it inherits from the new parent;
+ATTACH checks that one with a single anti-join against wallets.
+Nothing may reference transactions by foreign key: the primary key becomes
+(id, created_at), as partitioned tables require.
+
+Further partitions are created by every app worker, at startup and then
+hourly, and by ``python -m app.jobs.partition_maintenance``, which also
+detaches old ones.
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8e61f0c93'
+down_revision: Union[str, Sequence[str], None] = 'b7e3d91f4a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INITIAL_MONTHS = 3
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    boundary = op.get_bind().scalar(
+        sa.text("SELECT date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month'")
+    )
+
+    op.execute(
+        'ALTER TABLE transactions '
+        'ADD CONSTRAINT ck_transactions_legacy_bound '
+        f"CHECK (created_at < '{boundary.isoformat()}+00:00') NOT VALID"
+    )
+    # Commit the NOT VALID constraint first, so that the validation scan
+    # only holds SHARE UPDATE EXCLUSIVE, then the concurrent index build.
+    with op.get_context().autocommit_block():
+        op.execute(
+            'ALTER TABLE transactions '
+            'VALIDATE CONSTRAINT ck_transactions_legacy_bound'
+        )
+        op.create_index(
+            'ix_transactions_legacy_id_created_at',
+            'transactions',
+            ['id', 'created_at'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+    op.execute('ALTER TABLE transactions RENAME TO transactions_legacy')
+    op.execute(
+        'ALTER TABLE transactions_legacy '
+        'RENAME CONSTRAINT pk_transactions TO pk_transactions_legacy'
+    )
+    op.execute(
+        'ALTER TABLE transactions_legacy '
+        'DROP CONSTRAINT fk_transactions_wallet_id_wallets'
+    )
+    op.execute(
+        'ALTER INDEX ix_transactions_wallet_id_created_at_id '
+        'RENAME TO ix_transactions_legacy_wallet_id_created_at_id'
+    )
+
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('amount', sa.DECIMAL(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('wallet_id', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], name=op.f('fk_transactions_wallet_id_wallets')),
+    sa.PrimaryKeyConstraint('id', 'created_at', name=op.f('pk_transactions')),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_index(
+        'ix_transactions_wallet_id_created_at_id',
+        'transactions',
+        ['wallet_id', sa.text('created_at DESC'), 'id'],
+        unique=False,
+    )
+
+    # Promote the prebuilt (id, created_at) index to the partition's primary
+    # key so ATTACH reuses it instead of building one under the lock.
+    op.execute('ALTER TABLE transactions_legacy DROP CONSTRAINT pk_transactions_legacy')
+    op.execute(
+        'ALTER TABLE transactions_legacy '
+        'ADD CONSTRAINT pk_transactions_legacy '
+        'PRIMARY KEY USING INDEX ix_transactions_legacy_id_created_at'
+    )
+    op.execute(
+        'ALTER TABLE transactions ATTACH PARTITION transactions_legacy '
+        f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}+00:00')"
+    )
+    op.execute('ALTER TABLE transactions_legacy DROP CONSTRAINT ck_transactions_legacy_bound')
+
+    for offset in range(INITIAL_MONTHS):
+        lower = _add_months(boundary, offset)
+        upper = _add_months(boundary, offset + 1)
+        op.execute(
+            f'CREATE TABLE transactions_p{lower:%Y%m} PARTITION OF transactions '
+            f"FOR VALUES FROM ('{lower.isoformat()}+00:00') TO ('{upper.isoformat()}+00:00')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The detached partition keeps its copy of the parent's foreign key,
+    # already named fk_transactions_wallet_id_wallets.
+    op.execute('ALTER TABLE transactions DETACH PARTITION transactions_legacy')
+    op.execute(
+        'INSERT INTO transactions_legacy (id, type, amount, created_at, wallet_id) '
+        'SELECT id, type, amount, created_at, wallet_id FROM transactions'
+    )
+    op.execute('DROP TABLE transactions')
+
+    op.execute('ALTER TABLE transactions_legacy DROP CONSTRAINT pk_transactions_legacy')
+    op.execute(
+        'ALTER TABLE transactions_legacy '
+        'ADD CONSTRAINT pk_transactions_legacy PRIMARY KEY (id)'
+    )
+    op.execute('ALTER TABLE transactions_legacy RENAME TO transactions')
+    op.execute(
+        'ALTER TABLE transactions '
+        'RENAME CONSTRAINT pk_transactions_legacy TO pk_transactions'
+    )
+    op.execute(
+        'ALTER INDEX ix_transactions_legacy_wallet_id_created_at_id '
+        'RENAME TO ix_transactions_wallet_id_created_at_id'
+    )
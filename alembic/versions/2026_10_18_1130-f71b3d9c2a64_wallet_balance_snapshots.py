@@ -0,0 +1,41 @@
+"""wallet balance snapshots
+
+Revision ID: f71b3d9c2a64
+Revises: e2c5f8a17b39
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f71b3d9c2a64'
+down_revision: Union[str, Sequence[str], None] = 'e2c5f8a17b39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_checkpoints',
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('position', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name', name=op.f('pk_job_checkpoints'))
+    )
+    op.create_table('wallet_balance_snapshots',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('closing_balance', sa.DECIMAL(), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], name=op.f('fk_wallet_balance_snapshots_wallet_id_wallets')),
+    sa.PrimaryKeyConstraint('wallet_id', 'day', name=op.f('pk_wallet_balance_snapshots'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('wallet_balance_snapshots')
+    op.drop_table('job_checkpoints')
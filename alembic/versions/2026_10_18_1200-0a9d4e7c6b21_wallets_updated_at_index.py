@@ -0,0 +1,40 @@
+"""wallets updated_at index
+
+Revision ID: 0a9d4e7c6b21
+Revises: f71b3d9c2a64
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9d4e7c6b21'
+down_revision: Union[str, Sequence[str], None] = 'f71b3d9c2a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_wallets_updated_at_id',
+            'wallets',
+            ['updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_wallets_updated_at_id',
+            table_name='wallets',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,166 @@
+"""money minor units
+
+Revision ID: 5d2e9b7c4f18
+Revises: 0a9d4e7c6b21
+Create Date: 2026-10-18 12:30:00.000000
+
+Balances and amounts become BIGINT minor units of the wallet's currency,
+with the scale stored per wallet. An existing wallet gets the smallest
+scale of at least 2 that holds its balance and every amount in its ledger
+exactly, so the conversion never rounds. Ledger rows without a wallet are
+stored at scale 2; the upgrade aborts if any of them carries more decimals.
+
+Every ledger and snapshot row is rewritten, which takes an ACCESS EXCLUSIVE
+lock for the duration: run it in a maintenance window.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e9b7c4f18'
+down_revision: Union[str, Sequence[str], None] = '0a9d4e7c6b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_SCALE = 2
+UNLINKED_SCALE = 2
+
+
+def _to_minor(value: str, scale: str) -> str:
+    return f'({value} * power(10::numeric, {scale}))::bigint'
+
+
+def _from_minor(value: str, scale: str) -> str:
+    return f'trim_scale({value} / power(10::numeric, {scale}))'
+
+
+def _convert_through_wallets(
+    table: str,
+    column: str,
+    type_: sa.types.TypeEngine,
+    expression: str,
+    unlinked: Union[str, None] = None,
+) -> None:
+    # The scale lives on the wallet, which ALTER COLUMN ... USING cannot
+    # join, so the column is rebuilt: add, fill, drop, rename.
+    op.add_column(table, sa.Column(f'{column}_new', type_, nullable=True))
+    op.execute(
+        f'UPDATE {table} AS t SET {column}_new = {expression} '
+        'FROM wallets AS w WHERE w.id = t.wallet_id'
+    )
+    if unlinked is not None:
+        op.execute(
+            f'UPDATE {table} SET {column}_new = {unlinked} '
+            'WHERE wallet_id IS NULL'
+        )
+    op.drop_column(table, column)
+    op.alter_column(table, f'{column}_new', new_column_name=column, nullable=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    too_precise = bind.scalar(
+        sa.text(
+            'SELECT count(*) FROM transactions '
+            'WHERE wallet_id IS NULL AND min_scale(amount) > :scale'
+        ),
+        {'scale': UNLINKED_SCALE},
+    )
+    if too_precise:
+        raise RuntimeError(
+            f'{too_precise} ledger row(s) without a wallet have more than '
+            f'{UNLINKED_SCALE} decimal places; fix them before upgrading'
+        )
+
+    op.add_column('wallets', sa.Column('currency_scale', sa.SmallInteger(), nullable=True))
+    op.execute(
+        'UPDATE wallets AS w SET currency_scale = greatest('
+        f'{DEFAULT_SCALE}, min_scale(w.balance), '
+        '(SELECT max(min_scale(t.amount)) FROM transactions AS t WHERE t.wallet_id = w.id)'
+        ')'
+    )
+    op.alter_column('wallets', 'currency_scale', nullable=False)
+    op.alter_column(
+        'wallets',
+        'balance',
+        type_=sa.BigInteger(),
+        postgresql_using=_to_minor('balance', 'currency_scale'),
+    )
+
+    _convert_through_wallets(
+        'transactions',
+        'amount',
+        sa.BigInteger(),
+        _to_minor('t.amount', 'w.currency_scale'),
+        unlinked=_to_minor('amount', str(UNLINKED_SCALE)),
+    )
+    _convert_through_wallets(
+        'wallet_balance_snapshots',
+        'closing_balance',
+        sa.BigInteger(),
+        _to_minor('t.closing_balance', 'w.currency_scale'),
+    )
+
+    for table, columns in (
+        ('idempotency_keys', ('amount', 'new_balance')),
+        ('outbox_events', ('amount', 'balance')),
+    ):
+        op.add_column(table, sa.Column('currency_scale', sa.SmallInteger(), nullable=True))
+        op.execute(
+            f'UPDATE {table} AS t SET currency_scale = w.currency_scale '
+            'FROM wallets AS w WHERE w.id = t.wallet_id'
+        )
+        op.execute(
+            f'UPDATE {table} SET currency_scale = {DEFAULT_SCALE} '
+            'WHERE currency_scale IS NULL'
+        )
+        op.alter_column(table, 'currency_scale', nullable=False)
+        for column in columns:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.BigInteger(),
+                postgresql_using=_to_minor(column, 'currency_scale'),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in (
+        ('idempotency_keys', ('amount', 'new_balance')),
+        ('outbox_events', ('amount', 'balance')),
+    ):
+        for column in columns:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DECIMAL(),
+                postgresql_using=_from_minor(column, 'currency_scale'),
+            )
+        op.drop_column(table, 'currency_scale')
+
+    _convert_through_wallets(
+        'wallet_balance_snapshots',
+        'closing_balance',
+        sa.DECIMAL(),
+        _from_minor('t.closing_balance', 'w.currency_scale'),
+    )
+    _convert_through_wallets(
+        'transactions',
+        'amount',
+        sa.DECIMAL(),
+        _from_minor('t.amount', 'w.currency_scale'),
+        unlinked=_from_minor('amount', str(UNLINKED_SCALE)),
+    )
+
+    op.alter_column(
+        'wallets',
+        'balance',
+        type_=sa.DECIMAL(),
+        postgresql_using=_from_minor('balance', 'currency_scale'),
+    )
+    op.drop_column('wallets', 'currency_scale')
@@ -0,0 +1,81 @@
+"""wallet balances
+
+Revision ID: 9e6b2f4a8c15
+Revises: 5d2e9b7c4f18
+Create Date: 2026-10-18 13:00:00.000000
+
+Wallets keep their own currency's balance and get a currency code, set to
+USD for existing wallets. Balances in other
+currencies live in wallet_balances, whose primary key includes the values
+for index-only scans. Ledger rows in other currencies record their code;
+existing rows keep a NULL currency, meaning the wallet's own, so the
+ledger is not rewritten. Outbox and idempotency rows take the code of
+their wallet.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e6b2f4a8c15'
+down_revision: Union[str, Sequence[str], None] = '5d2e9b7c4f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'wallets',
+        sa.Column(
+            'currency',
+            sa.String(length=3),
+            server_default='USD',
+            nullable=False,
+        ),
+    )
+    op.alter_column('wallets', 'currency', server_default=None)
+
+    op.create_table('wallet_balances',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('balance', sa.BigInteger(), nullable=False),
+    sa.Column('currency_scale', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], name=op.f('fk_wallet_balances_wallet_id_wallets')),
+    sa.PrimaryKeyConstraint('wallet_id', 'currency', name=op.f('pk_wallet_balances'), postgresql_include=['balance', 'currency_scale'])
+    )
+
+    op.add_column('transactions', sa.Column('currency', sa.String(length=3), nullable=True))
+
+    for table in ('idempotency_keys', 'outbox_events'):
+        op.add_column(table, sa.Column('currency', sa.String(length=3), nullable=True))
+        op.execute(
+            f'UPDATE {table} AS t SET currency = w.currency '
+            'FROM wallets AS w WHERE w.id = t.wallet_id'
+        )
+        op.execute(f"UPDATE {table} SET currency = 'USD' WHERE currency IS NULL")
+        op.alter_column(table, 'currency', nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    foreign = bind.scalar(
+        sa.text(
+            'SELECT (SELECT count(*) FROM wallet_balances) '
+            '+ (SELECT count(*) FROM transactions WHERE currency IS NOT NULL)'
+        )
+    )
+    if foreign:
+        raise RuntimeError(
+            f'{foreign} balance or ledger row(s) are in a currency other than '
+            'their wallet\'s own; they cannot be represented before this revision'
+        )
+
+    for table in ('outbox_events', 'idempotency_keys'):
+        op.drop_column(table, 'currency')
+    op.drop_column('transactions', 'currency')
+    op.drop_table('wallet_balances')
+    op.drop_column('wallets', 'currency')
@@ -0,0 +1,60 @@
+"""scheduled operations
+
+Revision ID: 6c3a8f1d9e42
+Revises: 9e6b2f4a8c15
+Create Date: 2026-10-18 13:30:00.000000
+
+Deposits and withdrawals to apply at a later time, once or repeatedly.
+Workers claim due rows through a partial index that only covers pending
+operations.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c3a8f1d9e42'
+down_revision: Union[str, Sequence[str], None] = '9e6b2f4a8c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('scheduled_operations',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=True), nullable=False),
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('operation_type', sa.String(), nullable=False),
+    sa.Column('amount', sa.String(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('repeat_every', sa.Interval(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], name=op.f('fk_scheduled_operations_wallet_id_wallets')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_scheduled_operations'))
+    )
+    op.create_index(
+        'ix_scheduled_operations_due',
+        'scheduled_operations',
+        ['run_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+    op.create_index(
+        'ix_scheduled_operations_wallet_id_id',
+        'scheduled_operations',
+        ['wallet_id', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scheduled_operations_wallet_id_id', table_name='scheduled_operations')
+    op.drop_index('ix_scheduled_operations_due', table_name='scheduled_operations')
+    op.drop_table('scheduled_operations')
@@ -0,0 +1,60 @@
+"""retain published outbox events
+
+Revision ID: 7b1e4d9a2c36
+Revises: 6c3a8f1d9e42
+Create Date: 2026-10-18 14:00:00.000000
+
+The relay marks outbox rows published instead of deleting them, and they
+are purged once the retention window has passed, so an event stream can
+replay what it missed from its Last-Event-ID. Rows already in the outbox
+are still unpublished. Both indexes are built concurrently.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1e4d9a2c36'
+down_revision: Union[str, Sequence[str], None] = '6c3a8f1d9e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox_events', sa.Column('published_at', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_outbox_events_unpublished',
+            'outbox_events',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text('published_at IS NULL'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_outbox_events_wallet_id_id',
+            'outbox_events',
+            ['wallet_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_outbox_events_wallet_id_id',
+            table_name='outbox_events',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_outbox_events_unpublished',
+            table_name='outbox_events',
+            postgresql_concurrently=True,
+        )
+    op.execute('DELETE FROM outbox_events WHERE published_at IS NOT NULL')
+    op.drop_column('outbox_events', 'published_at')
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get(
+    settings.metrics.path,
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+async def metrics_endpoint():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
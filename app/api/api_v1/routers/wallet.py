@@ -1,42 +1,232 @@
-from decimal import Decimal
+import asyncio
+
+import uuid
+
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
 
 from typing import (
     TYPE_CHECKING,
     Annotated,
+    Any,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
 )
 
 from fastapi import (
     APIRouter, 
     HTTPException, 
-    Depends
+    Depends,
+    Header,
+    Query,
 )
+from fastapi.responses import StreamingResponse
+
+import orjson
 
 from app.core.config import settings
 from app.db.db_helper import db_helper
 from app.db.repository.wallet_repository import (
     create_wallet,
+    create_wallets_bulk,
     get_wallet_by_uuid,
+    get_wallet_cached,
     get_all_wallets,
+    get_wallets_page,
     get_wallets_count,
+    estimate_wallets_count,
     update_wallet_balance,
+    apply_operations_batch,
+    transfer_between_wallets,
+    OPERATION_APPLIED,
+)
+from app.db.repository.transaction_repository import (
+    get_wallet_transactions,
+    stream_transactions,
+)
+from app.db.repository.idempotency_repository import (
+    IdempotencyKeyMismatch,
+    update_wallet_balance_idempotent,
 )
+from app.db.repository.snapshot_repository import get_balance_at
+from app.db.repository.scheduled_operation_repository import (
+    schedule_operation,
+    get_scheduled_operations,
+    cancel_scheduled_operation,
+)
+from app.db.repository.operation_coalescer import operation_coalescer
+from app.db.repository.outbox_repository import (
+    get_last_event_id,
+    get_wallet_events_since,
+)
+from app.db.repository.wallet_events import (
+    RESUME,
+    wallet_event_hub,
+)
+from app.api.responses import respond
 from app.api.schemas.operations import (
     WalletOperationRequest,
     WalletOperationResponse,
     WalletCreateResponse,
     WalletResponse,
+    WalletBalanceAtResponse,
     WalletsListResponse,
+    WalletOperationsBatchRequest,
+    WalletOperationsBatchResponse,
+    TotalCountMode,
+    LedgerEntryType,
+    TransactionsListResponse,
+    ExportFormat,
+    TransferRequest,
+    TransferResponse,
+    ScheduleOperationRequest,
+    ScheduledOperationResponse,
+    ScheduledOperationsListResponse,
+)
+from app.utils.cursor import (
+    encode_cursor,
+    decode_cursor,
+)
+from app.utils.export import (
+    rows_to_ndjson,
+    rows_to_csv,
+    csv_header,
+    gzip_chunks,
+)
+from app.utils.money import (
+    CURRENCY_PATTERN,
+    MAX_CURRENCY_SCALE,
+    format_minor,
+)
+from app.utils.sse import (
+    KEEPALIVE,
+    sse_event,
 )
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
+    from app.db.models.scheduled_operation import ScheduledOperation
+    from app.db.models.wallets import Wallet
+
 
 router = APIRouter(
     prefix=settings.api.prefix,
     tags=["Wallets"]
 )
 
+MAX_BULK_WALLETS = 1_000_000
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def wallet_payload(
+    wallet: "Wallet",
+    balance: str,
+    other_balances: Iterable[Tuple[str, str, int]],
+) -> Dict[str, Any]:
+    # A WalletResponse as a plain dict, from a Wallet or a wallet row with
+    # its balances already formatted: every balance the wallet holds, its
+    # own currency first.
+    balances = [
+        {
+            "currency": wallet.currency,
+            "balance": balance,
+            "currency_scale": wallet.currency_scale,
+        }
+    ]
+    for currency, other_balance, currency_scale in other_balances:
+        balances.append(
+            {
+                "currency": currency,
+                "balance": other_balance,
+                "currency_scale": currency_scale,
+            }
+        )
+    
+    return {
+        "wallet_id": str(wallet.id),
+        "balance": balance,
+        "currency": wallet.currency,
+        "currency_scale": wallet.currency_scale,
+        "balances": balances,
+        "created_at": wallet.created_at,
+        "updated_at": wallet.updated_at,
+    }
+
+
+def wallet_model_payload(wallet: "Wallet") -> Dict[str, Any]:
+    return wallet_payload(
+        wallet,
+        format_minor(wallet.balance, wallet.currency_scale),
+        (
+            (
+                other.currency,
+                format_minor(other.balance, other.currency_scale),
+                other.currency_scale,
+            )
+            for other in wallet.balances
+        ),
+    )
+
+
+def scheduled_operation_payload(operation: "ScheduledOperation") -> Dict[str, Any]:
+    return {
+        "id": operation.id,
+        "wallet_id": str(operation.wallet_id),
+        "operation_type": operation.operation_type,
+        "amount": operation.amount,
+        "currency": operation.currency,
+        "run_at": operation.run_at,
+        "repeat_every": (
+            int(operation.repeat_every.total_seconds())
+            if operation.repeat_every is not None
+            else None
+        ),
+        "status": operation.status,
+        "last_error": operation.last_error,
+        "created_at": operation.created_at,
+        "updated_at": operation.updated_at,
+    }
+
+
+def export_transactions_response(
+    session: "AsyncSession",
+    wallet_uuid: Optional[str],
+    export_format: ExportFormat,
+    compress: bool,
+) -> StreamingResponse:
+    async def body():
+        if export_format == ExportFormat.CSV:
+            yield csv_header()
+        
+        async for rows in stream_transactions(session, wallet_uuid):
+            if export_format == ExportFormat.CSV:
+                yield rows_to_csv(rows)
+            else:
+                yield rows_to_ndjson(rows)
+    
+    filename = f"transactions-{wallet_uuid or 'all'}.{export_format.value}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    content = body()
+    if compress:
+        content = gzip_chunks(content)
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
 
 @router.post(
     "/wallets/create_wallet", 
@@ -47,13 +237,60 @@ async def create_new_wallet(
         "AsyncSession",
         Depends(db_helper.session_getter)
     ],
+    currency_scale: Annotated[
+        Optional[int],
+        Query(ge=0, le=MAX_CURRENCY_SCALE)
+    ] = None,
+    currency: Annotated[
+        Optional[str],
+        Query(pattern=CURRENCY_PATTERN)
+    ] = None,
 ):
-    wallet = await create_wallet(session)
+    wallet = await create_wallet(session, currency_scale, currency)
 
-    return WalletCreateResponse(
-        wallet_id=str(wallet.id),
-        balance=wallet.balance,
-        created_at=wallet.created_at,
+    return respond(
+        WalletCreateResponse,
+        {
+            "wallet_id": str(wallet.id),
+            "balance": format_minor(wallet.balance, wallet.currency_scale),
+            "currency": wallet.currency,
+            "currency_scale": wallet.currency_scale,
+            "created_at": wallet.created_at,
+        },
+    )
+
+
+@router.post(
+    "/wallets/create_wallets",
+    response_class=StreamingResponse
+)
+async def create_wallets_endpoint(
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.session_getter)
+    ],
+    count: int = Query(ge=1, le=MAX_BULK_WALLETS),
+    currency_scale: Annotated[
+        Optional[int],
+        Query(ge=0, le=MAX_CURRENCY_SCALE)
+    ] = None,
+    currency: Annotated[
+        Optional[str],
+        Query(pattern=CURRENCY_PATTERN)
+    ] = None,
+):
+    async def body():
+        async for rows in create_wallets_bulk(
+            session,
+            count,
+            currency_scale=currency_scale,
+            currency=currency,
+        ):
+            yield rows_to_ndjson(rows)
+    
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[ExportFormat.NDJSON],
     )
 
 
@@ -61,50 +298,373 @@ async def create_new_wallet(
 async def get_all_wallets_endpoint(
     session: Annotated[
         "AsyncSession",
-        Depends(db_helper.session_getter)
+        Depends(db_helper.read_session_getter)
     ],
     skip: int = 0,
-    limit: int = 100,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Optional[str] = None,
+    total: TotalCountMode = TotalCountMode.ESTIMATED,
+):
+    if cursor is not None:
+        try:
+            created_at, wallet_id = decode_cursor(cursor)
+            after = (datetime.fromisoformat(created_at), uuid.UUID(wallet_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        wallets = await get_wallets_page(session, limit + 1, after)
+    elif skip:
+        wallets = await get_all_wallets(session, skip, limit + 1)
+    else:
+        wallets = await get_wallets_page(session, limit + 1)
+    
+    next_cursor = None
+    if len(wallets) > limit:
+        wallets = wallets[:limit]
+        next_cursor = encode_cursor(wallets[-1].created_at, wallets[-1].id)
+    
+    if total == TotalCountMode.EXACT:
+        total_count = await get_wallets_count(session)
+    elif total == TotalCountMode.ESTIMATED:
+        total_count = await estimate_wallets_count(session)
+    else:
+        total_count = None
+    
+    return respond(
+        WalletsListResponse,
+        {
+            "wallets": [
+                wallet_payload(wallet, wallet.balance, wallet.balances or ())
+                for wallet in wallets
+            ],
+            "total": total_count,
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+@router.post(
+    "/wallets/operations:batch",
+    response_model=WalletOperationsBatchResponse
+)
+async def wallet_operations_batch(
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.session_getter)
+    ],
+    batch: WalletOperationsBatchRequest,
 ):
-    wallets = await get_all_wallets(session, skip, limit)
-    total = await get_wallets_count(session)
-    
-    wallet_responses = [
-        WalletResponse(
-            wallet_id=str(wallet.id),
-            balance=wallet.balance,
-            created_at=wallet.created_at,
-            updated_at=wallet.updated_at,
+    results = await apply_operations_batch(
+        session,
+        [
+            (
+                str(item.wallet_id),
+                item.amount,
+                item.operation_type.value,
+                item.currency,
+            )
+            for item in batch.operations
+        ],
+        atomic=batch.atomic,
+    )
+    
+    return respond(
+        WalletOperationsBatchResponse,
+        {
+            "results": [
+                {
+                    "wallet_id": str(item.wallet_id),
+                    "status": result.status,
+                    "new_balance": (
+                        format_minor(result.balance, result.currency_scale)
+                        if result.balance is not None
+                        else None
+                    ),
+                    "currency": result.currency,
+                }
+                for item, result in zip(batch.operations, results)
+            ],
+            "applied": sum(
+                1 for result in results if result.status == OPERATION_APPLIED
+            ),
+        },
+    )
+
+
+@router.post("/wallets/transfer", response_model=TransferResponse)
+async def transfer(
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.session_getter)
+    ],
+    transfer_request: TransferRequest,
+):
+    try:
+        result = await transfer_between_wallets(
+            session,
+            str(transfer_request.from_wallet_id),
+            str(transfer_request.to_wallet_id),
+            transfer_request.amount,
+            transfer_request.currency,
         )
-        for wallet in wallets
-    ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return WalletsListResponse(
-        wallets=wallet_responses,
-        total=total,
+    if result is None:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    
+    return respond(
+        TransferResponse,
+        {
+            "status": "Successful",
+            "from_wallet_id": str(transfer_request.from_wallet_id),
+            "to_wallet_id": str(transfer_request.to_wallet_id),
+            "from_balance": format_minor(result.from_balance, result.currency_scale),
+            "to_balance": format_minor(result.to_balance, result.currency_scale),
+            "currency": result.currency,
+        },
     )
 
 
+@router.get("/wallets/transactions/export", response_class=StreamingResponse)
+async def export_all_transactions(
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.read_session_getter)
+    ],
+    format: ExportFormat = ExportFormat.NDJSON,
+    compress: bool = False,
+):
+    return export_transactions_response(session, None, format, compress)
+
+
 @router.get("/wallets/{wallet_uuid}", response_model=WalletResponse)
 async def get_wallet(
+    wallet_uuid: str,
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.read_session_getter)
+    ],
+):
+    wallet = await get_wallet_cached(session, wallet_uuid)
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    
+    return respond(WalletResponse, wallet_model_payload(wallet))
+
+
+@router.get(
+    "/wallets/{wallet_uuid}/balance",
+    response_model=WalletBalanceAtResponse
+)
+async def get_wallet_balance_at(
+    wallet_uuid: str,
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.read_session_getter)
+    ],
+    at: datetime,
+):
+    wallet = await get_wallet_cached(session, wallet_uuid)
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    
+    balance = await get_balance_at(session, wallet.id, at)
+    
+    return respond(
+        WalletBalanceAtResponse,
+        {
+            "wallet_id": str(wallet.id),
+            "balance": format_minor(balance, wallet.currency_scale),
+            "at": at,
+        },
+    )
+
+
+@router.get("/wallets/{wallet_uuid}/events", response_class=StreamingResponse)
+async def wallet_events(
     wallet_uuid: str,
     session: Annotated[
         "AsyncSession",
         Depends(db_helper.session_getter)
     ],
+    last_event_id: Annotated[
+        Optional[int],
+        Header(alias="Last-Event-ID", ge=0)
+    ] = None,
 ):
-    wallet = await get_wallet_by_uuid(session, wallet_uuid)
+    wallet = await get_wallet_cached(session, wallet_uuid)
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    return WalletResponse(
-        wallet_id=str(wallet.id),
-        balance=wallet.balance,
-        created_at=wallet.created_at,
-        updated_at=wallet.updated_at,
+    wallet_id = str(uuid.UUID(str(wallet.id)))
+    
+    async def body():
+        # Subscribe before reading from the database so no change can fall
+        # in between; events the initial read already covers are skipped by
+        # id. A stream resuming from Last-Event-ID replays the events after
+        # it. Otherwise, or if some of them may have been purged, it starts
+        # from a snapshot tagged with the wallet's latest event id, read
+        # before the wallet so that an event the snapshot misses is never
+        # skipped. Both are read from the primary: a lagging replica could
+        # miss an event whose notification went out before the subscription.
+        # The session is closed right after, a stream may stay open for hours.
+        with wallet_event_hub.subscribe(wallet_id) as queue:
+            replay = None
+            if last_event_id is not None:
+                replay = await get_wallet_events_since(session, wallet_id, last_event_id)
+            if replay is None:
+                covered = await get_last_event_id(session, wallet_id)
+                current = await get_wallet_by_uuid(session, wallet_id)
+                await session.close()
+                snapshot = wallet_model_payload(current)
+                yield sse_event(
+                    orjson.dumps(
+                        {
+                            "wallet_id": wallet_id,
+                            "balance": snapshot["balance"],
+                            "currency": snapshot["currency"],
+                            "balances": snapshot["balances"],
+                            "updated_at": current.updated_at,
+                        }
+                    ).decode(),
+                    "snapshot",
+                    str(covered),
+                )
+            else:
+                await session.close()
+                covered = last_event_id
+                for event_id, payload in replay:
+                    covered = event_id
+                    yield sse_event(payload, "balance", str(event_id))
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(),
+                        settings.outbox.heartbeat_interval,
+                    )
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                
+                if event is RESUME:
+                    # Events may have been missed: end the stream, and the
+                    # client reconnects with the last id it got to replay them.
+                    return
+                
+                # Live events arrive in id order; one that does not is
+                # still sent rather than dropped.
+                event_id, payload = event
+                if event_id <= covered:
+                    continue
+                yield sse_event(payload, "balance", str(event_id))
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
     )
 
 
+@router.get(
+    "/wallets/{wallet_uuid}/transactions",
+    response_model=TransactionsListResponse
+)
+async def get_wallet_transactions_endpoint(
+    wallet_uuid: str,
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.read_session_getter)
+    ],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    operation_type: Optional[LedgerEntryType] = None,
+):
+    wallet = await get_wallet_cached(session, wallet_uuid)
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    
+    after = None
+    if cursor is not None:
+        try:
+            created_at, transaction_id = decode_cursor(cursor)
+            after = (datetime.fromisoformat(created_at), uuid.UUID(transaction_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    transactions = await get_wallet_transactions(
+        session,
+        wallet_uuid,
+        limit + 1,
+        after=after,
+        since=since,
+        until=until,
+        operation_type=operation_type.value if operation_type else None,
+    )
+    
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        next_cursor = encode_cursor(transactions[-1].created_at, transactions[-1].id)
+    
+    # Ledger rows in the wallet's own currency carry no currency. A cached
+    # entry can predate the wallet's first use of another one.
+    currencies = {transaction.currency for transaction in transactions} - {None}
+    if not currencies <= {other.currency for other in wallet.balances}:
+        wallet = await get_wallet_by_uuid(session, wallet_uuid)
+
+    scales = {wallet.currency: wallet.currency_scale}
+    scales.update((other.currency, other.currency_scale) for other in wallet.balances)
+    
+    return respond(
+        TransactionsListResponse,
+        {
+            "transactions": [
+                {
+                    "transaction_id": str(transaction.id),
+                    "operation_type": transaction.type,
+                    "amount": format_minor(
+                        transaction.amount,
+                        scales[transaction.currency or wallet.currency],
+                    ),
+                    "currency": transaction.currency or wallet.currency,
+                    "created_at": transaction.created_at,
+                }
+                for transaction in transactions
+            ],
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+@router.get(
+    "/wallets/{wallet_uuid}/transactions/export",
+    response_class=StreamingResponse
+)
+async def export_wallet_transactions(
+    wallet_uuid: str,
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.read_session_getter)
+    ],
+    format: ExportFormat = ExportFormat.NDJSON,
+    compress: bool = False,
+):
+    if not await get_wallet_by_uuid(session, wallet_uuid):
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    
+    return export_transactions_response(session, wallet_uuid, format, compress)
+
+
 @router.post(
     "/wallets/{wallet_uuid}/operation", 
     response_model=WalletOperationResponse
@@ -116,25 +676,169 @@ async def wallet_operation(
     ],
     wallet_uuid: str,
     operation: WalletOperationRequest,
+    idempotency_key: Annotated[
+        Optional[str],
+        Header(alias="Idempotency-Key", max_length=255)
+    ] = None,
 ):
     try:
-        wallet = await update_wallet_balance(
-            session,
-            wallet_uuid,
-            Decimal(operation.amount),
-            operation.operation_type.value,
-        )
+        if idempotency_key is not None:
+            wallet = await update_wallet_balance_idempotent(
+                session,
+                wallet_uuid,
+                operation.amount,
+                operation.operation_type.value,
+                idempotency_key,
+                operation.currency,
+            )
+        elif operation.currency is not None:
+            wallet = await update_wallet_balance(
+                session,
+                wallet_uuid,
+                operation.amount,
+                operation.operation_type.value,
+                currency=operation.currency,
+            )
+        else:
+            if settings.coalescing.enabled:
+                apply_operation = operation_coalescer.submit
+            else:
+                apply_operation = update_wallet_balance
+            
+            wallet = await apply_operation(
+                session,
+                wallet_uuid,
+                operation.amount,
+                operation.operation_type.value,
+            )
         
         if not wallet:
             raise HTTPException(status_code=404, detail="Wallet not found")
         
-        return WalletOperationResponse(
-            status="Successful",
-            new_balance=wallet.balance,
+        return respond(
+            WalletOperationResponse,
+            {
+                "status": "Successful",
+                "new_balance": format_minor(wallet.balance, wallet.currency_scale),
+                "currency": wallet.currency,
+            },
         )
     
+    except IdempotencyKeyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
     except ValueError as e:
         if "Insufficient funds" in str(e):
             raise HTTPException(status_code=400, detail="Insufficient funds")
         
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/wallets/{wallet_uuid}/scheduled_operations",
+    response_model=ScheduledOperationResponse
+)
+async def create_scheduled_operation(
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.session_getter)
+    ],
+    wallet_uuid: str,
+    request: ScheduleOperationRequest,
+):
+    run_at = request.run_at
+    if run_at is not None and run_at.tzinfo is None:
+        run_at = run_at.replace(tzinfo=timezone.utc)
+    
+    try:
+        operation = await schedule_operation(
+            session,
+            wallet_uuid,
+            request.amount,
+            request.operation_type.value,
+            run_at,
+            (
+                timedelta(seconds=request.repeat_every)
+                if request.repeat_every is not None
+                else None
+            ),
+            request.currency,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if operation is None:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    
+    return respond(ScheduledOperationResponse, scheduled_operation_payload(operation))
+
+
+@router.get(
+    "/wallets/{wallet_uuid}/scheduled_operations",
+    response_model=ScheduledOperationsListResponse
+)
+async def get_scheduled_operations_endpoint(
+    wallet_uuid: str,
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.read_session_getter)
+    ],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: Optional[str] = None,
+):
+    wallet = await get_wallet_cached(session, wallet_uuid)
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    
+    before_id = None
+    if cursor is not None:
+        try:
+            before_id, = decode_cursor(cursor)
+            before_id = int(before_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    operations = await get_scheduled_operations(
+        session,
+        wallet_uuid,
+        limit + 1,
+        before_id,
+    )
+    
+    next_cursor = None
+    if len(operations) > limit:
+        operations = operations[:limit]
+        next_cursor = encode_cursor(operations[-1].id)
+    
+    return respond(
+        ScheduledOperationsListResponse,
+        {
+            "scheduled_operations": [
+                scheduled_operation_payload(operation)
+                for operation in operations
+            ],
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+@router.delete(
+    "/wallets/{wallet_uuid}/scheduled_operations/{operation_id}",
+    response_model=ScheduledOperationResponse
+)
+async def cancel_scheduled_operation_endpoint(
+    wallet_uuid: str,
+    operation_id: int,
+    session: Annotated[
+        "AsyncSession",
+        Depends(db_helper.session_getter)
+    ],
+):
+    operation = await cancel_scheduled_operation(session, wallet_uuid, operation_id)
+    if operation is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Pending scheduled operation not found",
+        )
+    
+    return respond(ScheduledOperationResponse, scheduled_operation_payload(operation))
@@ -0,0 +1,38 @@
+from typing import (
+    Any,
+    Dict,
+    Type,
+    Union,
+)
+
+import orjson
+
+from fastapi.responses import (
+    ORJSONResponse,
+    Response,
+)
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+class FastJSONResponse(ORJSONResponse):
+    # Same bytes as the response_model path: UTC datetimes end in "Z" the
+    # way Pydantic writes them.
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def respond(
+    model: Type[BaseModel],
+    content: Dict[str, Any],
+) -> Union[BaseModel, Response]:
+    # A Response returned from an endpoint skips FastAPI's response_model
+    # validation and serialization, so ``content`` is encoded once by orjson.
+    # ``content`` must already have the shape of ``model``, which keeps
+    # describing it in OpenAPI. With fast responses off it is validated
+    # into the model instead.
+    if settings.api.fast_responses:
+        return FastJSONResponse(content)
+
+    return model.model_validate(content)
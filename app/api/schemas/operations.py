@@ -1,45 +1,232 @@
-from decimal import Decimal
-
 from datetime import datetime
 
-from typing import List
+from typing import (
+    Annotated,
+    Any,
+    List,
+    Optional,
+)
+
+from uuid import UUID
 
 from pydantic import (
     BaseModel, 
     Field,
+    PlainSerializer,
+    PlainValidator,
+    WithJsonSchema,
+    model_validator,
 )
 
 from enum import Enum
 
+from app.utils.money import (
+    AMOUNT_PATTERN,
+    CURRENCY_PATTERN,
+    Amount,
+    parse_amount,
+)
+
+
+def _positive_amount(value: Any) -> Amount:
+    # Amounts stay exact from the request body to the SQL parameters: the
+    # text is split into integer units and an exponent, never a Decimal.
+    # JSON numbers are accepted too; floats go through their shortest repr.
+    if isinstance(value, Amount):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = repr(value)
+    if not isinstance(value, str):
+        raise ValueError("Amount must be a decimal string")
+
+    amount = parse_amount(value)
+    if amount.units <= 0:
+        raise ValueError("Amount must be positive")
+
+    return amount
+
+
+PositiveAmount = Annotated[
+    Amount,
+    PlainValidator(_positive_amount),
+    PlainSerializer(str, return_type=str),
+    WithJsonSchema(
+        {
+            "type": "string",
+            "pattern": AMOUNT_PATTERN,
+            "description": "Amount must be positive",
+            "examples": ["100.50"],
+        }
+    ),
+]
+
 
 class OperationType(str, Enum):
     DEPOSIT = "DEPOSIT"
     WITHDRAW = "WITHDRAW"
 
 
+class LedgerEntryType(str, Enum):
+    DEPOSIT = "DEPOSIT"
+    WITHDRAW = "WITHDRAW"
+    TRANSFER_IN = "TRANSFER_IN"
+    TRANSFER_OUT = "TRANSFER_OUT"
+    OPENING_BALANCE = "OPENING_BALANCE"
+    CARRY_FORWARD = "CARRY_FORWARD"
+
+
+class TotalCountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class WalletOperationRequest(BaseModel):
     operation_type: OperationType
-    amount: Decimal = Field(gt=0, description="Amount must be positive")
+    amount: PositiveAmount
+    currency: Optional[str] = Field(
+        default=None,
+        pattern=CURRENCY_PATTERN,
+        description="Defaults to the wallet's own currency",
+    )
 
 
 class WalletOperationResponse(BaseModel):
     status: str
-    new_balance: Decimal
+    new_balance: str
+    currency: str
 
 
 class WalletCreateResponse(BaseModel):
     wallet_id: str
-    balance: Decimal
+    balance: str
+    currency: str
+    currency_scale: int
     created_at: datetime
 
 
+class CurrencyBalance(BaseModel):
+    currency: str
+    balance: str
+    currency_scale: int
+
+
 class WalletResponse(BaseModel):
     wallet_id: str
-    balance: Decimal
+    balance: str
+    currency: str
+    currency_scale: int
+    balances: List[CurrencyBalance]
     created_at: datetime
     updated_at: datetime
 
 
+class WalletBalanceAtResponse(BaseModel):
+    wallet_id: str
+    balance: str
+    at: datetime
+
+
 class WalletsListResponse(BaseModel):
     wallets: List[WalletResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class BatchOperationItem(WalletOperationRequest):
+    wallet_id: UUID
+
+
+class WalletOperationsBatchRequest(BaseModel):
+    operations: List[BatchOperationItem] = Field(min_length=1, max_length=5000)
+    atomic: bool = Field(
+        default=False,
+        description="Apply all operations or none of them",
+    )
+
+
+class BatchOperationResult(BaseModel):
+    wallet_id: str
+    status: str
+    new_balance: Optional[str] = None
+    currency: Optional[str] = None
+
+
+class WalletOperationsBatchResponse(BaseModel):
+    results: List[BatchOperationResult]
+    applied: int
+
+
+class TransactionResponse(BaseModel):
+    transaction_id: str
+    operation_type: str
+    amount: str
+    currency: str
+    created_at: datetime
+
+
+class TransactionsListResponse(BaseModel):
+    transactions: List[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
+class ScheduleOperationRequest(WalletOperationRequest):
+    run_at: Optional[datetime] = Field(
+        default=None,
+        description="Defaults to now; naive times are UTC",
+    )
+    repeat_every: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Seconds between runs of a recurring operation",
+    )
+
+
+class ScheduledOperationResponse(BaseModel):
+    id: int
+    wallet_id: str
+    operation_type: str
+    amount: str
+    currency: Optional[str] = None
+    run_at: datetime
+    repeat_every: Optional[int] = None
+    status: str
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class ScheduledOperationsListResponse(BaseModel):
+    scheduled_operations: List[ScheduledOperationResponse]
+    next_cursor: Optional[str] = None
+
+
+class TransferRequest(BaseModel):
+    from_wallet_id: UUID
+    to_wallet_id: UUID
+    amount: PositiveAmount
+    currency: Optional[str] = Field(
+        default=None,
+        pattern=CURRENCY_PATTERN,
+        description="Defaults to the sender's own currency",
+    )
+
+    @model_validator(mode="after")
+    def check_distinct_wallets(self) -> "TransferRequest":
+        if self.from_wallet_id == self.to_wallet_id:
+            raise ValueError("Cannot transfer to the same wallet")
+        return self
+
+
+class TransferResponse(BaseModel):
+    status: str
+    from_wallet_id: str
+    to_wallet_id: str
+    from_balance: str
+    to_balance: str
+    currency: str
@@ -0,0 +1,111 @@
+import time
+
+from collections import OrderedDict
+
+from typing import (
+    Any,
+    Hashable,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+
+class LRUCache:
+    def __init__(
+        self,
+        max_size: int,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedCache(Protocol):
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    # Stores ``value`` unless the key already holds one with a higher
+    # ``version``, atomically, so concurrent writers cannot go back in time.
+    async def set(self, key: str, value: bytes, ttl: float, version: int) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+# Compare-and-set on the version stored next to the value. Versions must
+# fit a double exactly (below 2**53), which Lua numbers are.
+_SET_IF_NEWER_SCRIPT = """
+local current = tonumber(redis.call('HGET', KEYS[1], 'version'))
+if current and current > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'value', ARGV[1], 'version', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class RedisCache:
+    def __init__(self, url: str) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError(
+                "The shared cache backend requires the 'redis' package"
+            )
+
+        self._client = redis.from_url(url)
+        self._set_if_newer = self._client.register_script(_SET_IF_NEWER_SCRIPT)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.hget(key, "value")
+
+    async def set(self, key: str, value: bytes, ttl: float, version: int) -> None:
+        await self._set_if_newer(keys=[key], args=[value, version, int(ttl * 1000)])
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
@@ -1,15 +1,78 @@
+import math
+import os
+
+from collections import Counter
+
+from typing import (
+    Any,
+    Literal,
+    Optional,
+    Tuple,
+)
+
 from pydantic import (
     BaseModel,
+    Field,
 )
 from pydantic_settings import (
     BaseSettings,
     SettingsConfigDict,
 )
+from sqlalchemy.engine import make_url
+
+from app.utils.money import (
+    CURRENCY_PATTERN,
+    MAX_CURRENCY_SCALE,
+)
 
 
 class RunConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
+    mode: Literal["development", "production"] = "development"
+    debug: bool = False
+    workers: Optional[int] = None
+    loop: str = "uvloop"
+    http: str = "httptools"
+    access_log: bool = True
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    timeout_graceful_shutdown: int = 30
+
+    @property
+    def worker_count(self) -> int:
+        if self.mode != "production":
+            return 1
+        if self.workers:
+            return self.workers
+        # Respects CPU affinity / cgroup cpusets, unlike os.cpu_count().
+        if hasattr(os, "sched_getaffinity"):
+            cpus = len(os.sched_getaffinity(0))
+        else:
+            cpus = os.cpu_count() or 1
+        quota = cgroup_cpu_quota()
+
+        return min(cpus, quota) if quota else cpus
+
+
+def cgroup_cpu_quota(root: str = "/sys/fs/cgroup") -> Optional[int]:
+    # CPUs granted by a cgroup CPU quota, rounded up. A container limited to
+    # two CPUs still sees every core of the host in its affinity mask.
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+                quota = f.read().strip()
+            with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+
+    return max(math.ceil(int(quota) / int(period)), 1)
 
 
 class ApiV1Prefix(BaseModel):
@@ -20,6 +83,106 @@ class ApiV1Prefix(BaseModel):
 class ApiPrefix(BaseModel):
     prefix: str = "/api"
     v1: ApiV1Prefix = ApiV1Prefix()
+    # Encode endpoint payloads straight from dicts instead of building and
+    # re-validating their response models, which then only document them.
+    fast_responses: bool = True
+
+
+class CoalescingConfig(BaseModel):
+    enabled: bool = False
+    window_ms: float = 2.0
+    max_batch_size: int = 200
+
+
+class CacheConfig(BaseModel):
+    enabled: bool = True
+    ttl: float = 5.0
+    max_size: int = 100_000
+    redis_url: Optional[str] = None
+
+
+class RateLimitConfig(BaseModel):
+    enabled: bool = False
+    # Sustained requests per second and burst size, per client and per
+    # wallet named in the path.
+    client_rate: float = Field(default=100.0, gt=0)
+    client_burst: float = Field(default=200.0, ge=1)
+    wallet_rate: float = Field(default=20.0, gt=0)
+    wallet_burst: float = Field(default=40.0, ge=1)
+    max_keys: int = 100_000
+    # Header that identifies the client instead of the peer address, e.g.
+    # X-Forwarded-For behind a proxy or an API key header.
+    client_header: Optional[str] = None
+    # Proxies in front of the app that append to a forwarding client_header:
+    # the client is that many entries from the right of it.
+    trusted_proxies: int = Field(default=1, ge=1)
+    # Share buckets across workers and hosts.
+    redis_url: Optional[str] = None
+
+
+class IdempotencyConfig(BaseModel):
+    ttl: float = 86400.0
+    cache_ttl: float = 300.0
+    cache_size: int = 100_000
+    purge_interval: float = 300.0
+
+
+class MetricsConfig(BaseModel):
+    enabled: bool = True
+    path: str = "/metrics"
+
+
+class OutboxConfig(BaseModel):
+    channel: str = "wallet_events"
+    batch_size: int = 500
+    poll_interval: float = 0.2
+    heartbeat_interval: float = 15.0
+    subscriber_queue_size: int = 1000
+    # How long published events stay replayable by event streams.
+    retention: float = 86400.0
+    purge_interval: float = 300.0
+
+
+class SnapshotConfig(BaseModel):
+    refresh_interval: float = 900.0
+    settlement_lag: float = 300.0
+
+
+class ReconciliationConfig(BaseModel):
+    chunk_size: int = 5000
+    concurrency: int = 4
+    # How far an incremental run looks back behind the previous one. A
+    # write stamps updated_at before it commits, so it has to cover the
+    # longest a writing transaction can stay open.
+    overlap: float = Field(default=300.0, ge=0)
+
+
+class SchedulerConfig(BaseModel):
+    # Whether app workers also run scheduled operations; a deployment can
+    # leave that to app.jobs.scheduled_operations processes instead.
+    enabled: bool = True
+    poll_interval: float = 1.0
+    batch_size: int = 100
+    concurrency: int = 4
+
+
+class MoneyConfig(BaseModel):
+    default_currency: str = Field(default="USD", pattern=CURRENCY_PATTERN)
+    default_scale: int = Field(default=2, ge=0, le=MAX_CURRENCY_SCALE)
+    # Per-currency overrides of default_scale, e.g. {"JPY": 0, "BHD": 3}.
+    currency_scales: dict[str, int] = {}
+
+    def scale_for(self, currency: str) -> int:
+        return self.currency_scales.get(currency, self.default_scale)
+
+
+class PartitionConfig(BaseModel):
+    months_ahead: int = 3
+    # How often every app worker makes sure the partitions ahead exist.
+    create_interval: float = 3600.0
+    hash_partitions: int = 0
+    retention_months: Optional[int] = None
+    archive_schema: Optional[str] = "archive"
 
 
 class DatabaseConfig(BaseModel):
@@ -33,6 +196,22 @@ class DatabaseConfig(BaseModel):
     echo_pool: bool = False
     pool_size: int = 50
     max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    pool_warmup: bool = True
+    statement_cache_size: int = 100
+    prepared_statement_cache_size: int = 100
+    pgbouncer: bool = False
+    connect_args: dict[str, Any] = {}
+    replica_urls: list[str] = []
+    replica_eject_seconds: float = 30.0
+    read_your_writes_window: float = 0.0
+    # Connections this service may hold on one Postgres server across all
+    # workers, including each worker's LISTEN connection; keep it below
+    # max_connections minus what other clients need. The default leaves
+    # room under Postgres' own default of 100 for jobs and admin sessions.
+    max_connections: int = Field(default=80, ge=1)
     
     naming_convention: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
@@ -42,11 +221,35 @@ class DatabaseConfig(BaseModel):
         "pk": "pk_%(table_name)s",
     }
 
+    def pool_limits(self, workers: int) -> Tuple[int, int]:
+        # Per-worker (pool_size, max_overflow), shared by the primary and
+        # replica engines, so that on every server every worker's engines
+        # at full overflow, plus the connection its event hub holds on the
+        # primary outside the pool, still fit in max_connections.
+        primary = _server(self.url)
+        engines = Counter(_server(url) for url in [self.url, *self.replica_urls])
+        per_worker = max(
+            min(
+                (self.max_connections // workers - (server == primary)) // count
+                for server, count in engines.items()
+            ),
+            1,
+        )
+        pool_size = min(self.pool_size, per_worker)
+
+        return pool_size, min(self.max_overflow, per_worker - pool_size)
+
     @property
     def url(self) -> str:
         return f"{self.scheme}://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
 
 
+def _server(url: str) -> Tuple[Optional[str], int]:
+    parsed = make_url(url)
+
+    return parsed.host, parsed.port or 5432
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -58,6 +261,17 @@ class Settings(BaseSettings):
     run: RunConfig = RunConfig()
     db: DatabaseConfig
     api: ApiPrefix = ApiPrefix()
+    coalescing: CoalescingConfig = CoalescingConfig()
+    cache: CacheConfig = CacheConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    idempotency: IdempotencyConfig = IdempotencyConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    partitions: PartitionConfig = PartitionConfig()
+    outbox: OutboxConfig = OutboxConfig()
+    snapshots: SnapshotConfig = SnapshotConfig()
+    reconciliation: ReconciliationConfig = ReconciliationConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
+    money: MoneyConfig = MoneyConfig()
     test_db_name: str = "wallet_db_test"
     
     @property
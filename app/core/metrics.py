@@ -0,0 +1,346 @@
+import time
+
+from bisect import bisect_left
+
+from contextvars import ContextVar
+
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 50)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Metric objects keep plain dicts keyed by label tuples and render the
+# Prometheus text exposition format themselves: recording is a dict lookup
+# plus a bisect, with no locking (everything runs on one event loop thread).
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge:
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterable[str]:
+        values = self._values.items() if self.collect is None else self.collect()
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._values.get(labels)
+        if counts is None:
+            counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, *labels: str) -> int:
+        counts = self._values.get(labels)
+
+        return sum(counts[:-1]) if counts else 0
+
+    def sum(self, *labels: str) -> float:
+        counts = self._values.get(labels)
+
+        return counts[-1] if counts else 0.0
+
+    def samples(self) -> Iterable[str]:
+        for labels, counts in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    self.labelnames,
+                    labels,
+                    f'le="{_format_value(float(bound))}"',
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_str} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{label_str} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    __slots__ = ("db_round_trips", "db_time")
+
+    def __init__(self) -> None:
+        self.db_round_trips = 0
+        self.db_time = 0.0
+
+
+# Set by the HTTP middleware for the duration of a request. SQLAlchemy runs
+# the sync engine events inside the request task's greenlet, so the engine
+# hooks below see the same context.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template.",
+        ("method", "route", "status"),
+    )
+)
+http_request_db_round_trips = registry.register(
+    Histogram(
+        "http_request_db_round_trips",
+        "Database statements executed per HTTP request.",
+        ("method", "route"),
+        buckets=ROUND_TRIP_BUCKETS,
+    )
+)
+http_request_db_duration = registry.register(
+    Histogram(
+        "http_request_db_duration_seconds",
+        "Total time spent in database statements per HTTP request.",
+        ("method", "route"),
+    )
+)
+db_statement_duration = registry.register(
+    Histogram(
+        "db_statement_duration_seconds",
+        "SQL statement execution time by statement kind.",
+        ("engine", "statement"),
+    )
+)
+db_round_trips = registry.register(
+    Counter(
+        "db_round_trips",
+        "SQL statements sent to the database.",
+        ("engine",),
+    )
+)
+db_pool_checkout_wait = registry.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a pooled connection.",
+        ("engine",),
+    )
+)
+
+
+_pools: Dict[str, "InstrumentedQueuePool"] = {}
+
+
+def _collect_pool(attribute: str) -> Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]:
+    def collect():
+        for name, pool in _pools.items():
+            yield (name,), getattr(pool, attribute)()
+
+    return collect
+
+
+db_pool_size = registry.register(
+    Gauge(
+        "db_pool_size",
+        "Configured pool size.",
+        ("engine",),
+        _collect_pool("size"),
+    )
+)
+db_pool_checked_out = registry.register(
+    Gauge(
+        "db_pool_checked_out",
+        "Connections currently checked out of the pool.",
+        ("engine",),
+        _collect_pool("checkedout"),
+    )
+)
+db_pool_overflow = registry.register(
+    Gauge(
+        "db_pool_overflow",
+        "Overflow connections in use; negative while the pool is not full.",
+        ("engine",),
+        _collect_pool("overflow"),
+    )
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started, self.metrics_name)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        _pools[self.metrics_name] = pool
+
+        return pool
+
+
+def _statement_kind(statement: str) -> str:
+    kind = statement.lstrip()[:6].upper()
+    if kind in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return kind
+    if kind.startswith("WITH"):
+        return "WITH"
+
+    return "OTHER"
+
+
+def instrument_engine(engine: AsyncEngine, name: str = "primary") -> None:
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.metrics_name = name
+        _pools[name] = pool
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+        db_statement_duration.observe(elapsed, name, _statement_kind(statement))
+        db_round_trips.inc(name)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_round_trips += 1
+            stats.db_time += elapsed
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path_format", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(elapsed, method, route_path, status)
+            http_request_db_round_trips.observe(stats.db_round_trips, method, route_path)
+            http_request_db_duration.observe(stats.db_time, method, route_path)
@@ -0,0 +1,225 @@
+import logging
+import math
+import re
+import time
+import uuid
+
+from typing import (
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+)
+
+from app.core.cache import LRUCache
+from app.core.metrics import (
+    Counter,
+    registry,
+)
+
+
+logger = logging.getLogger(__name__)
+
+TOO_MANY_REQUESTS_BODY = b'{"detail":"Too many requests"}'
+
+rate_limited_requests = registry.register(
+    Counter(
+        "http_requests_rate_limited",
+        "Requests rejected with 429 by bucket kind.",
+        ("bucket",),
+    )
+)
+
+
+# A bucket's key, its refill rate per second and the most tokens it holds.
+Limit = Tuple[str, float, float]
+
+
+class RateLimiter(Protocol):
+    # Takes a token from every bucket in ``limits``, or from none of them:
+    # a request rejected by one bucket does not drain the others. Returns,
+    # per bucket, 0 if it had a token, otherwise the seconds until it will.
+    async def acquire(self, limits: Sequence[Limit]) -> List[float]: ...
+
+
+class MemoryRateLimiter:
+    # Buckets of one process, in an LRU bounded to max_keys. An entry
+    # expires once its bucket would have refilled, when it is the same as a
+    # missing one, so expiry loses nothing; only a bucket pushed out early
+    # by the size bound starts over full.
+    def __init__(self, max_keys: int) -> None:
+        self._buckets = LRUCache(max_size=max_keys)
+
+    async def acquire(self, limits: Sequence[Limit]) -> List[float]:
+        now = time.monotonic()
+        buckets = []
+        for key, rate, burst in limits:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            buckets.append(min(burst, tokens + (now - updated_at) * rate))
+
+        waits = [
+            max(0.0, (1 - tokens) / rate)
+            for tokens, (_, rate, _) in zip(buckets, limits)
+        ]
+        taken = 0 if any(waits) else 1
+        for tokens, (key, rate, burst) in zip(buckets, limits):
+            tokens -= taken
+            self._buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+
+        return waits
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Same algorithm as MemoryRateLimiter, run atomically by Redis on its own
+# clock so that every worker shares one bucket per key. ARGV holds a rate
+# and a burst per key.
+_TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = clock[1] + clock[2] / 1000000
+local buckets = {}
+local waits = {}
+local taken = 1
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+    buckets[i] = {rate, burst, tokens}
+    waits[i] = tostring(math.max(0, (1 - tokens) / rate))
+    if tokens < 1 then
+        taken = 0
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst, tokens = unpack(buckets[i])
+    tokens = tokens - taken
+    redis.call('HSET', key, 'tokens', tokens, 'updated_at', now)
+    redis.call('PEXPIRE', key, math.ceil((burst - tokens) / rate * 1000) + 1)
+end
+return waits
+"""
+
+
+class RedisRateLimiter:
+    def __init__(self, url: str) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError(
+                "The shared rate limit backend requires the 'redis' package"
+            )
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, limits: Sequence[Limit]) -> List[float]:
+        waits = await self._script(
+            keys=[f"ratelimit:{key}" for key, _, _ in limits],
+            args=[arg for _, rate, burst in limits for arg in (rate, burst)],
+        )
+
+        return [float(wait) for wait in waits]
+
+
+class RateLimitMiddleware:
+    # Pure ASGI, in front of routing: a rejected request never reaches the
+    # endpoint, so it resolves no dependencies and takes no database
+    # connection. Every request under the API prefix draws from its
+    # client's bucket, and requests to /wallets/{uuid}/... also from that
+    # wallet's, in any spelling uuid.UUID accepts. Wallets named only in a
+    # request body (batches, transfers) are limited per client. If the
+    # backend fails, requests go through.
+    def __init__(
+        self,
+        app,
+        limiter: RateLimiter,
+        prefix: str,
+        client_rate: float,
+        client_burst: float,
+        wallet_rate: float,
+        wallet_burst: float,
+        client_header: Optional[str] = None,
+        trusted_proxies: int = 1,
+    ) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.prefix = prefix
+        self.client_limit = (client_rate, client_burst)
+        self.wallet_limit = (wallet_rate, wallet_burst)
+        self.client_header = client_header.lower().encode() if client_header else None
+        self.trusted_proxies = trusted_proxies
+        self._wallet_path = re.compile(rf"^{re.escape(prefix)}/wallets/([^/]+)")
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        buckets = ["client"]
+        limits = [(f"client:{self._client_key(scope)}", *self.client_limit)]
+        wallet_key = self._wallet_key(scope["path"])
+        if wallet_key is not None:
+            buckets.append("wallet")
+            limits.append((f"wallet:{wallet_key}", *self.wallet_limit))
+
+        try:
+            waits = await self.limiter.acquire(limits)
+        except Exception:
+            logger.warning("Rate limit backend failed", exc_info=True)
+            waits = [0.0] * len(limits)
+
+        for bucket, wait in zip(buckets, waits):
+            if wait > 0:
+                rate_limited_requests.inc(bucket)
+                await _reject(send, max(waits))
+                return
+
+        await self.app(scope, receive, send)
+
+    def _client_key(self, scope) -> str:
+        if self.client_header is not None:
+            # Each trusted proxy appends the address it was reached from,
+            # so the client is that many hops from the right; anything left
+            # of it was sent by the client and proves nothing.
+            hops = [
+                hop
+                for name, value in scope["headers"]
+                if name == self.client_header
+                for hop in value.decode("latin-1").split(",")
+            ]
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies].strip()
+
+        client: Optional[Tuple[str, int]] = scope.get("client")
+
+        return client[0] if client else "unknown"
+
+    def _wallet_key(self, path: str) -> Optional[str]:
+        match = self._wallet_path.match(path)
+        if match is None:
+            return None
+
+        try:
+            return str(uuid.UUID(match.group(1)))
+        except ValueError:
+            return None
+
+
+async def _reject(send, wait: float) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(TOO_MANY_REQUESTS_BODY)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": TOO_MANY_REQUESTS_BODY})
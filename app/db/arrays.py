@@ -0,0 +1,35 @@
+from typing import (
+    Any,
+    Sequence,
+)
+
+from sqlalchemy import (
+    func,
+    literal,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql.elements import ColumnClause
+from sqlalchemy.sql.selectable import TableValuedAlias
+
+
+def unnest_rows(
+    name: str,
+    columns: Sequence[ColumnClause],
+    rows: Sequence[Sequence[Any]],
+) -> TableValuedAlias:
+    # Rows as a FROM item, like VALUES, but bound as one array per column:
+    # the SQL does not change with the number of rows, so the statement is
+    # compiled once and served from the compiled cache afterwards, and the
+    # driver sends len(columns) parameters instead of one per value.
+    arrays = zip(*rows) if rows else [()] * len(columns)
+
+    return (
+        func.unnest(
+            *(
+                literal(list(array), ARRAY(column.type))
+                for column, array in zip(columns, arrays)
+            )
+        )
+        .table_valued(*columns)
+        .render_derived(name=name)
+    )
@@ -1,5 +1,20 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import logging
+import time
 
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+
+from fastapi import Request
+
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
@@ -7,7 +22,27 @@ from sqlalchemy.ext.asyncio import (
     AsyncEngine,
 )
 
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.metrics import (
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Replica:
+    def __init__(
+        self,
+        name: str,
+        engine: AsyncEngine,
+    ) -> None:
+        self.name = name
+        self.engine = engine
+        self.session_factory = _make_session_factory(engine)
+        self.ejected_until = 0.0
 
 
 class DatabaseHelper:
@@ -18,33 +53,168 @@ class DatabaseHelper:
         echo_pool: bool = False,
         pool_size: int = 5,
         max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        prepared_statement_cache_size: int = 100,
+        pgbouncer: bool = False,
+        connect_args: Optional[Dict[str, Any]] = None,
+        replica_urls: Sequence[str] = (),
+        replica_eject_seconds: float = 30.0,
+        read_your_writes_window: float = 0.0,
     ) -> None:
-        self.engine: AsyncEngine = create_async_engine(
-            url=url,
+        connect_args = {
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": prepared_statement_cache_size,
+            **(connect_args or {}),
+        }
+        if pgbouncer:
+            # PgBouncer in transaction mode may hand every transaction a
+            # different server connection, so named prepared statements
+            # created on one of them are unknown to the next. With both
+            # caches off asyncpg only uses the unnamed statement.
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+
+        engine_options = dict(
             echo=echo,
             echo_pool=echo_pool,
             pool_size=pool_size,
             max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            poolclass=InstrumentedQueuePool,
+            connect_args=connect_args,
+        )
+        self.pool_size = pool_size
+        self.engine: AsyncEngine = create_async_engine(url=url, **engine_options)
+        instrument_engine(self.engine)
+        self.session_factory: async_sessionmaker[AsyncSession] = (
+            _make_session_factory(self.engine)
+        )
+
+        self.replicas: List[_Replica] = []
+        for i, replica_url in enumerate(replica_urls):
+            replica = _Replica(
+                f"replica{i}",
+                create_async_engine(url=replica_url, **engine_options),
+            )
+            instrument_engine(replica.engine, replica.name)
+            self.replicas.append(replica)
+        self._replica_order = itertools.cycle(range(len(self.replicas)))
+        self.replica_eject_seconds = replica_eject_seconds
+        self.read_your_writes_window = read_your_writes_window
+        self._recent_writers = LRUCache(
+            max_size=100_000,
+            ttl=read_your_writes_window,
+        )
+
+    async def warm_up(self) -> None:
+        engines = [self.engine] + [replica.engine for replica in self.replicas]
+        connections = await asyncio.gather(
+            *(
+                engine.connect()
+                for engine in engines
+                for _ in range(self.pool_size)
+            ),
+            return_exceptions=True,
         )
-        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-            bind=self.engine,
-            autoflush=False,
-            autocommit=False,
-            expire_on_commit=False,
+        for connection in connections:
+            if isinstance(connection, BaseException):
+                logger.warning("Pool warm-up connection failed: %s", connection)
+        await asyncio.gather(
+            *(
+                connection.close()
+                for connection in connections
+                if not isinstance(connection, BaseException)
+            )
         )
-    
+
     async def dispose(self) -> None:
         await self.engine.dispose()
-        
-    async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def session_getter(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        if self.read_your_writes_window > 0 and request.method not in ("GET", "HEAD"):
+            self._recent_writers.set(_client_key(request), True)
+
         async with self.session_factory() as session:
             yield session
 
+    async def read_session_getter(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        # Reads go to a healthy replica in round-robin order. A client that
+        # wrote within the read-your-writes window, or any request while all
+        # replicas are ejected, is served by the primary.
+        session = None
+        if self.replicas and self._recent_writers.get(_client_key(request)) is None:
+            session = await self._replica_session()
+        if session is None:
+            session = self.session_factory()
+
+        async with session:
+            yield session
+
+    async def _replica_session(self) -> Optional[AsyncSession]:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._replica_order)]
+            if replica.ejected_until > time.monotonic():
+                continue
+
+            session = replica.session_factory()
+            try:
+                await session.connection()
+            except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+                await session.close()
+                replica.ejected_until = time.monotonic() + self.replica_eject_seconds
+                logger.warning(
+                    "Ejecting %s for %.0fs: %s",
+                    replica.name,
+                    self.replica_eject_seconds,
+                    e,
+                )
+                continue
+
+            return session
+
+        return None
+
+
+def _make_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=engine,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+
+
+def _client_key(request: Request) -> str:
+    client_id = request.headers.get("x-client-id")
+    if client_id:
+        return client_id
+
+    return request.client.host if request.client else ""
+
+
+pool_size, max_overflow = settings.db.pool_limits(settings.run.worker_count)
 
 db_helper = DatabaseHelper(
     url=settings.db.url,
     echo=settings.db.echo,
     echo_pool=settings.db.echo_pool,
-    pool_size=settings.db.pool_size,
-    max_overflow=settings.db.max_overflow,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    pool_timeout=settings.db.pool_timeout,
+    pool_recycle=settings.db.pool_recycle,
+    pool_pre_ping=settings.db.pool_pre_ping,
+    statement_cache_size=settings.db.statement_cache_size,
+    prepared_statement_cache_size=settings.db.prepared_statement_cache_size,
+    pgbouncer=settings.db.pgbouncer,
+    connect_args=settings.db.connect_args,
+    replica_urls=settings.db.replica_urls,
+    replica_eject_seconds=settings.db.replica_eject_seconds,
+    read_your_writes_window=settings.db.read_your_writes_window,
 )
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+from sqlalchemy import (
+    UUID,
+    String,
+    BigInteger,
+    DateTime,
+    SmallInteger,
+    func,
+)
+
+from app.db.models.base import Base
+
+
+class IdempotencyKey(Base):
+    key: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+    )
+    wallet_id: Mapped[str] = mapped_column(
+        UUID,
+        nullable=False,
+    )
+    operation_type: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+    )
+    amount: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+    )
+    new_balance: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+    )
+    currency: Mapped[str] = mapped_column(
+        String(3),
+        nullable=False,
+    )
+    currency_scale: Mapped[int] = mapped_column(
+        SmallInteger,
+        nullable=False,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=func.now(),
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+    )
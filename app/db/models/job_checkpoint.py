@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+from sqlalchemy import (
+    String,
+    DateTime,
+    func,
+)
+
+from app.db.models.base import Base
+
+
+class JobCheckpoint(Base):
+    name: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+    )
+    position: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from typing import Optional
+
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    String,
+    DateTime,
+    Identity,
+    Index,
+    SmallInteger,
+    func,
+    text,
+)
+
+from app.db.models.base import Base
+
+
+class OutboxEvent(Base):
+    # Written by every balance change in the same transaction, published by
+    # app.jobs.outbox_relay. Published rows are kept for the retention window
+    # so event streams can resume from their Last-Event-ID; the id is the
+    # event id, increasing per wallet in commit order.
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_unpublished",
+            "id",
+            postgresql_where=text("published_at IS NULL"),
+        ),
+        Index("ix_outbox_events_wallet_id_id", "wallet_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        Identity(always=True),
+        primary_key=True,
+    )
+    wallet_id: Mapped[str] = mapped_column(
+        UUID,
+        nullable=False,
+    )
+    transaction_id: Mapped[str] = mapped_column(
+        UUID,
+        nullable=False,
+    )
+    type: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+    )
+    amount: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+    )
+    balance: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+    )
+    currency: Mapped[str] = mapped_column(
+        String(3),
+        nullable=False,
+    )
+    currency_scale: Mapped[int] = mapped_column(
+        SmallInteger,
+        nullable=False,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    published_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
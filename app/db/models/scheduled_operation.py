@@ -0,0 +1,101 @@
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from typing import Optional
+
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    Interval,
+    String,
+    func,
+    text,
+)
+
+from app.db.models.base import Base
+
+
+SCHEDULE_PENDING = "PENDING"
+SCHEDULE_COMPLETED = "COMPLETED"
+SCHEDULE_FAILED = "FAILED"
+SCHEDULE_CANCELLED = "CANCELLED"
+
+
+class ScheduledOperation(Base):
+    # A deposit or withdrawal applied by app.jobs.scheduled_operations once
+    # run_at has passed. Recurring operations stay pending and move run_at
+    # to their next occurrence after every run, applied or not. Only pending
+    # rows are indexed for the workers, so finished ones cost them nothing.
+    __table_args__ = (
+        Index(
+            "ix_scheduled_operations_due",
+            "run_at",
+            "id",
+            postgresql_where=text(f"status = '{SCHEDULE_PENDING}'"),
+        ),
+        Index("ix_scheduled_operations_wallet_id_id", "wallet_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        Identity(always=True),
+        primary_key=True,
+    )
+    wallet_id: Mapped[str] = mapped_column(
+        UUID,
+        ForeignKey("wallets.id"),
+        nullable=False,
+    )
+    operation_type: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+    )
+    # The exact decimal as requested; it is scaled to minor units when the
+    # operation runs, against the scale the balance has by then.
+    amount: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+    )
+    # NULL for the wallet's own currency.
+    currency: Mapped[Optional[str]] = mapped_column(
+        String(3),
+        nullable=True,
+    )
+    run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    repeat_every: Mapped[Optional[timedelta]] = mapped_column(
+        Interval,
+        nullable=True,
+    )
+    status: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+        default=SCHEDULE_PENDING,
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(
+        String,
+        nullable=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
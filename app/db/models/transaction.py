@@ -1,40 +1,83 @@
 from datetime import datetime
 
+from typing import Optional
+
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
 )
 from sqlalchemy import (
+    DDL,
     UUID,
     String,
-    DECIMAL,
+    BigInteger,
     DateTime,
+    ForeignKey,
+    Index,
+    event,
     func,
 )
 
 import uuid
 
-from decimal import Decimal
-
 from app.db.models.base import Base
+from app.db.partitions import (
+    DEFAULT_PARTITION,
+    PARENT_TABLE,
+)
 
 
 class Transaction(Base):
+    # Range-partitioned by month; the partition key has to be part of the
+    # primary key. Partitions are managed by app.jobs.partition_maintenance.
+    __table_args__ = {
+        "postgresql_partition_by": "RANGE (created_at)",
+    }
+
     id: Mapped[str] = mapped_column(
         UUID,
         primary_key=True,
         nullable=False,
         default=uuid.uuid4,
     )
+    wallet_id: Mapped[Optional[str]] = mapped_column(
+        UUID,
+        ForeignKey("wallets.id"),
+        nullable=True,
+    )
     type: Mapped[str] = mapped_column(
         String,
         nullable=False,
     )
-    amount: Mapped[Decimal] = mapped_column(
-        DECIMAL,
+    amount: Mapped[int] = mapped_column(
+        BigInteger,
         nullable=False,
     )
+    # NULL for the wallet's own currency, the balance kept on the wallets
+    # row; set for entries against one of its wallet_balances.
+    currency: Mapped[Optional[str]] = mapped_column(
+        String(3),
+        nullable=True,
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         default=func.now(),
     )
+
+
+Index(
+    "ix_transactions_wallet_id_created_at_id",
+    Transaction.wallet_id,
+    Transaction.created_at.desc(),
+    Transaction.id,
+)
+
+
+# Tables created straight from the metadata (tests, benchmarks) get a
+# catch-all partition so inserts work before any monthly partition exists.
+event.listen(
+    Transaction.__table__,
+    "after_create",
+    DDL(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"),
+)
@@ -0,0 +1,43 @@
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    ForeignKey,
+    PrimaryKeyConstraint,
+    SmallInteger,
+    String,
+)
+
+from app.db.models.base import Base
+
+
+class WalletBalance(Base):
+    # Balances in currencies other than the wallet's own, which stays on the
+    # wallets row. The key covers the values, so reading every balance of a
+    # wallet is an index-only scan.
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "wallet_id",
+            "currency",
+            postgresql_include=["balance", "currency_scale"],
+        ),
+    )
+
+    wallet_id: Mapped[str] = mapped_column(
+        UUID,
+        ForeignKey("wallets.id"),
+    )
+    currency: Mapped[str] = mapped_column(
+        String(3),
+    )
+    balance: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+    )
+    currency_scale: Mapped[int] = mapped_column(
+        SmallInteger,
+        nullable=False,
+    )
@@ -0,0 +1,33 @@
+from datetime import date
+
+from sqlalchemy.orm import (
+    Mapped,
+    mapped_column,
+)
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    Date,
+    ForeignKey,
+)
+
+from app.db.models.base import Base
+
+
+class WalletBalanceSnapshot(Base):
+    # Closing balance at the end of each UTC day on which the wallet had
+    # ledger activity. Days without activity have no row: the closest
+    # earlier snapshot still holds.
+    wallet_id: Mapped[str] = mapped_column(
+        UUID,
+        ForeignKey("wallets.id"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+    )
+    closing_balance: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+    )
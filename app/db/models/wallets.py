@@ -1,24 +1,36 @@
 from datetime import datetime
+
+from typing import List
+
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
+    relationship,
 )
 from sqlalchemy import (
     UUID,
-    DECIMAL,
+    BigInteger,
     DateTime,
+    Index,
+    SmallInteger,
+    String,
     func,
     text,
 )
 
-from decimal import Decimal
-
 import uuid
 
+from app.core.config import settings
 from app.db.models.base import Base
+from app.db.models.wallet_balance import WalletBalance
 
 
 class Wallet(Base):
+    __table_args__ = (
+        Index("ix_wallets_created_at_id", "created_at", "id"),
+        Index("ix_wallets_updated_at_id", "updated_at", "id"),
+    )
+
     id: Mapped[str] = mapped_column(
         UUID,
         primary_key=True,
@@ -26,10 +38,21 @@ class Wallet(Base):
         default=uuid.uuid4,
         server_default=text("gen_random_uuid()"),
     )
-    balance: Mapped[Decimal] = mapped_column(
-        DECIMAL,
+    # Minor units of the wallet's currency: 1250 at scale 2 is 12.50.
+    balance: Mapped[int] = mapped_column(
+        BigInteger,
         nullable=False,
-        default=Decimal("0.0"),
+        default=0,
+    )
+    currency: Mapped[str] = mapped_column(
+        String(3),
+        nullable=False,
+        default=settings.money.default_currency,
+    )
+    currency_scale: Mapped[int] = mapped_column(
+        SmallInteger,
+        nullable=False,
+        default=settings.money.default_scale,
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -40,3 +63,8 @@ class Wallet(Base):
         onupdate=func.now(),
         default=func.now(),
     )
+    # Other currencies; never lazy-loaded, queries that need them say so.
+    balances: Mapped[List[WalletBalance]] = relationship(
+        lazy="raise",
+        order_by=WalletBalance.currency,
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import (
+    Numeric,
+    Text,
+    cast,
+    func,
+    literal,
+)
+from sqlalchemy.sql.elements import ColumnElement
+
+
+# Ledger rows from before transactions recorded their wallet have no wallet
+# scale to go by; the minor-unit migration stored them at this one.
+UNLINKED_CURRENCY_SCALE = 2
+
+
+def minor_to_text(
+    amount: ColumnElement,
+    currency_scale: ColumnElement,
+) -> ColumnElement:
+    # Exact decimal text for minor units, rendered by Postgres for rows that
+    # never pass through Python: 1250 at scale 2 becomes '12.50'.
+    scaled = cast(amount, Numeric) / func.power(cast(literal(10), Numeric), currency_scale)
+
+    return cast(func.round(scaled, currency_scale), Text)
@@ -0,0 +1,187 @@
+import re
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from typing import (
+    Awaitable,
+    Callable,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+PARENT_TABLE = "transactions"
+DEFAULT_PARTITION = "transactions_default"
+DETACH_LOCK_TIMEOUT = "5s"
+
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_(p\d{{6}}(_h\d+)?|default|legacy)$")
+_RANGE_BOUND = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \((?:'([^']+)'|MAXVALUE)\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    is_default: bool
+    lower_bound: Optional[datetime]
+    upper_bound: Optional[datetime]
+
+    def overlaps(self, lower: datetime, upper: datetime) -> bool:
+        if self.is_default:
+            return False
+
+        return (
+            (self.lower_bound is None or self.lower_bound < upper)
+            and (self.upper_bound is None or lower < self.upper_bound)
+        )
+
+
+def is_transaction_partition(table_name: str) -> bool:
+    return _PARTITION_NAME.match(table_name) is not None
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Partition]:
+    # Direct partitions of the ledger with their range; a None bound stands
+    # for MINVALUE/MAXVALUE.
+    rows = await conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass) "
+            "ORDER BY c.relname"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+
+    partitions = []
+    for name, bound in rows:
+        match = _RANGE_BOUND.search(bound)
+        lower, upper = match.groups() if match else (None, None)
+        partitions.append(
+            Partition(
+                name,
+                match is None,
+                datetime.fromisoformat(lower) if lower else None,
+                datetime.fromisoformat(upper) if upper else None,
+            )
+        )
+
+    return partitions
+
+
+async def create_transaction_partitions(
+    conn: AsyncConnection,
+    months_ahead: int = 3,
+    hash_partitions: int = 0,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    # Creates the monthly partitions from the current month up to
+    # ``months_ahead`` months ahead, skipping months an existing partition
+    # already covers (such as the legacy partition attached by the
+    # migration). With ``hash_partitions`` each month is further split by
+    # HASH (id) into equally sized children with smaller indexes to vacuum
+    # and rebuild. Hashing by wallet_id is not possible: every unique
+    # constraint must contain the partition key, and wallet_id is nullable
+    # for legacy rows so it cannot join the primary key. ``conn`` must not
+    # have a transaction open: each month is created in its own one.
+    async with conn.begin():
+        partitions = await list_partitions(conn)
+
+    created = []
+    first_month = month_start(now or datetime.now(timezone.utc))
+    for offset in range(months_ahead + 1):
+        lower = add_months(first_month, offset)
+        upper = add_months(lower, 1)
+        if any(partition.overlaps(lower, upper) for partition in partitions):
+            continue
+
+        name = partition_name(lower)
+        statements = [
+            f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            + (" PARTITION BY HASH (id)" if hash_partitions else "")
+        ]
+        statements.extend(
+            f"CREATE TABLE {name}_h{remainder} PARTITION OF {name} "
+            f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {remainder})"
+            for remainder in range(hash_partitions)
+        )
+        async with conn.begin():
+            # Every app worker runs this too: the lock serializes them, and
+            # whoever comes second finds the month already created.
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext(:parent))"),
+                {"parent": PARENT_TABLE},
+            )
+            if await conn.scalar(text("SELECT to_regclass(:name)"), {"name": name}):
+                continue
+            for statement in statements:
+                await conn.execute(text(statement))
+        created.append(name)
+
+    return created
+
+
+async def detach_transaction_partitions(
+    conn: AsyncConnection,
+    retention_months: int,
+    archive_schema: Optional[str] = None,
+    now: Optional[datetime] = None,
+    before_detach: Optional[Callable[[AsyncConnection, Partition], Awaitable[None]]] = None,
+) -> List[str]:
+    # Detaches every partition that ends before the retention cutoff, oldest
+    # first. The detached tables keep their data; with ``archive_schema``
+    # they are moved there so they no longer clutter the public schema. Each
+    # partition is detached in its own transaction together with
+    # ``before_detach``, which can carry what it held forward into the
+    # ledger. DETACH then holds an ACCESS EXCLUSIVE lock on the ledger only
+    # until the commit right after it, and gives up rather than queue behind
+    # long transactions. ``conn`` must not have a transaction open.
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+    async with conn.begin():
+        partitions = await list_partitions(conn)
+    partitions.sort(key=lambda partition: partition.lower_bound or datetime.min.replace(tzinfo=timezone.utc))
+
+    detached = []
+    for partition in partitions:
+        if (
+            partition.is_default
+            or partition.upper_bound is None
+            or partition.upper_bound > cutoff
+        ):
+            continue
+
+        async with conn.begin():
+            if before_detach is not None:
+                await before_detach(conn, partition)
+            await conn.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+            await conn.execute(
+                text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}")
+            )
+            if archive_schema:
+                await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+                await conn.execute(
+                    text(f'ALTER TABLE {partition.name} SET SCHEMA "{archive_schema}"')
+                )
+        detached.append(partition.name)
+
+    return detached
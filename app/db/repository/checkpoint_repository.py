@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.job_checkpoint import JobCheckpoint
+
+
+async def get_checkpoint(
+    session: AsyncSession,
+    name: str,
+) -> Optional[datetime]:
+    return await session.scalar(
+        select(JobCheckpoint.position).where(JobCheckpoint.name == name)
+    )
+
+
+async def save_checkpoint(
+    session: AsyncSession,
+    name: str,
+    position: datetime,
+) -> None:
+    stmt = insert(JobCheckpoint).values(name=name, position=position)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[JobCheckpoint.name],
+            set_={
+                "position": stmt.excluded.position,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+    )
+    await session.commit()
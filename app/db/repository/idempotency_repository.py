@@ -0,0 +1,179 @@
+from typing import (
+    NamedTuple,
+    Optional,
+)
+
+import uuid
+
+from sqlalchemy import (
+    select,
+    delete,
+    func,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.models.idempotency_key import IdempotencyKey
+from app.db.models.wallets import Wallet
+from app.db.repository.wallet_repository import (
+    get_wallet_cached,
+    update_wallet_balance,
+)
+from app.utils.money import Amount
+
+
+class IdempotencyKeyMismatch(ValueError):
+    pass
+
+
+class IdempotentResult(NamedTuple):
+    wallet_id: str
+    operation_type: str
+    amount: int
+    new_balance: int
+    currency: str
+    currency_scale: int
+
+
+idempotency_cache = LRUCache(
+    max_size=settings.idempotency.cache_size,
+    ttl=min(settings.idempotency.cache_ttl, settings.idempotency.ttl),
+)
+
+
+async def get_idempotent_result(
+    session: AsyncSession,
+    key: str,
+) -> Optional[IdempotentResult]:
+    result = idempotency_cache.get(key)
+    if result is not None:
+        return result
+
+    stmt = select(
+        IdempotencyKey.wallet_id,
+        IdempotencyKey.operation_type,
+        IdempotencyKey.amount,
+        IdempotencyKey.new_balance,
+        IdempotencyKey.currency,
+        IdempotencyKey.currency_scale,
+    ).where(
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at > func.now(),
+    )
+    row = (await session.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+
+    result = IdempotentResult(str(row.wallet_id), *row[1:])
+    idempotency_cache.set(key, result)
+
+    return result
+
+
+async def update_wallet_balance_idempotent(
+    session: AsyncSession,
+    wallet_uuid: str,
+    amount: Amount,
+    operation_type: str,
+    key: str,
+    currency: Optional[str] = None,
+) -> Optional[Wallet]:
+    # Optimistic: the first attempt records the key together with the
+    # operation, and only a unique-key conflict falls back to the lookup.
+    # Replays served by this node never reach the database.
+    result = idempotency_cache.get(key)
+    if result is None:
+        try:
+            wallet = await update_wallet_balance(
+                session,
+                wallet_uuid,
+                amount,
+                operation_type,
+                idempotency_key=key,
+                currency=currency,
+            )
+        except IntegrityError:
+            await session.rollback()
+        else:
+            if wallet is not None:
+                idempotency_cache.set(
+                    key,
+                    IdempotentResult(
+                        str(wallet.id),
+                        operation_type,
+                        amount.to_minor(wallet.currency_scale),
+                        wallet.balance,
+                        wallet.currency,
+                        wallet.currency_scale,
+                    ),
+                )
+            return wallet
+
+        result = await get_idempotent_result(session, key)
+        if result is None:
+            # The conflicting key had expired: drop it and apply once more.
+            await session.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.expires_at <= func.now(),
+                )
+            )
+            await session.commit()
+            return await update_wallet_balance(
+                session,
+                wallet_uuid,
+                amount,
+                operation_type,
+                idempotency_key=key,
+                currency=currency,
+            )
+
+    if currency is None:
+        # Keys store the currency they applied to, so a replay without one
+        # is compared against the wallet's own.
+        wallet = await get_wallet_cached(session, wallet_uuid)
+        currency = wallet.currency if wallet is not None else None
+
+    if (
+        result.wallet_id != str(uuid.UUID(str(wallet_uuid)))
+        or result.operation_type != operation_type
+        or result.currency != currency
+        or _minor_or_none(amount, result.currency_scale) != result.amount
+    ):
+        raise IdempotencyKeyMismatch(
+            "Idempotency key was already used for a different operation"
+        )
+
+    return Wallet(
+        id=result.wallet_id,
+        balance=result.new_balance,
+        currency=result.currency,
+        currency_scale=result.currency_scale,
+    )
+
+
+def _minor_or_none(amount: Amount, currency_scale: int) -> Optional[int]:
+    try:
+        return amount.to_minor(currency_scale)
+    except ValueError:
+        return None
+
+
+async def purge_expired_idempotency_keys(
+    session: AsyncSession,
+    batch_size: int = 10_000,
+) -> int:
+    expired = (
+        select(IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at <= func.now())
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired))
+    )
+    await session.commit()
+
+    return result.rowcount
@@ -0,0 +1,178 @@
+import asyncio
+
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.wallets import Wallet
+from app.db.repository.wallet_repository import (
+    OPERATION_APPLIED,
+    WALLET_NOT_FOUND,
+    apply_operations_batch,
+)
+from app.utils.money import Amount
+
+
+class _BatchAbandoned(Exception):
+    pass
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.operations: List[Tuple[Amount, str]] = []
+        self.futures: List["asyncio.Future[Optional[Wallet]]"] = []
+        self.full = asyncio.Event()
+
+    def add(
+        self,
+        amount: Amount,
+        operation_type: str,
+    ) -> "asyncio.Future[Optional[Wallet]]":
+        future = asyncio.get_running_loop().create_future()
+        self.operations.append((amount, operation_type))
+        self.futures.append(future)
+
+        return future
+
+
+# The first request for a wallet becomes the batch leader: it waits up to
+# ``window`` seconds for more operations on the same wallet, then applies the
+# whole batch in one transaction using its own session. Followers only await
+# their individual result.
+class WalletOperationCoalescer:
+    def __init__(
+        self,
+        window: float,
+        max_batch_size: int,
+    ) -> None:
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._batches: Dict[str, _Batch] = {}
+
+    async def submit(
+        self,
+        session: AsyncSession,
+        wallet_uuid: str,
+        amount: Amount,
+        operation_type: str,
+    ) -> Optional[Wallet]:
+        while True:
+            batch = self._batches.get(wallet_uuid)
+            if batch is None:
+                return await self._lead(
+                    session,
+                    wallet_uuid,
+                    amount,
+                    operation_type,
+                )
+
+            future = batch.add(amount, operation_type)
+            if len(batch.operations) >= self.max_batch_size:
+                self._close(wallet_uuid, batch)
+
+            try:
+                return await future
+            except _BatchAbandoned:
+                continue
+
+    async def _lead(
+        self,
+        session: AsyncSession,
+        wallet_uuid: str,
+        amount: Amount,
+        operation_type: str,
+    ) -> Optional[Wallet]:
+        batch = _Batch()
+        self._batches[wallet_uuid] = batch
+        future = batch.add(amount, operation_type)
+
+        try:
+            try:
+                await asyncio.wait_for(batch.full.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+        except BaseException:
+            # The leader was cancelled before anything reached the database,
+            # so the followers resubmit into a fresh batch.
+            self._close(wallet_uuid, batch)
+            for pending in batch.futures[1:]:
+                if not pending.done():
+                    pending.set_exception(_BatchAbandoned())
+            raise
+        self._close(wallet_uuid, batch)
+
+        # Followers cancelled while the batch was open have gone away, and
+        # their operations are dropped rather than applied behind their back.
+        pending_operations = [
+            (operation, pending)
+            for operation, pending in zip(batch.operations, batch.futures)
+            if not pending.done()
+        ]
+        futures = [pending for _, pending in pending_operations]
+
+        # Once sent, the batch may commit at any moment. It runs to the end
+        # even if the leader is cancelled meanwhile, so every follower gets
+        # the real outcome and none resubmits an operation already applied;
+        # the cancellation is re-raised afterwards.
+        apply = asyncio.ensure_future(
+            apply_operations_batch(
+                session,
+                [
+                    (wallet_uuid, amount, operation_type)
+                    for (amount, operation_type), _ in pending_operations
+                ],
+            )
+        )
+        cancelled = False
+        while not apply.done():
+            try:
+                await asyncio.wait([apply])
+            except asyncio.CancelledError:
+                cancelled = True
+        if cancelled:
+            future.cancel()
+
+        error = apply.exception()
+        if error is not None:
+            for pending in futures:
+                if not pending.done():
+                    pending.set_exception(error)
+        else:
+            for pending, result in zip(futures, apply.result()):
+                if pending.done():
+                    continue
+                if result.status == OPERATION_APPLIED:
+                    pending.set_result(
+                        Wallet(
+                            id=wallet_uuid,
+                            balance=result.balance,
+                            currency=result.currency,
+                            currency_scale=result.currency_scale,
+                        )
+                    )
+                elif result.status == WALLET_NOT_FOUND:
+                    pending.set_result(None)
+                else:
+                    pending.set_exception(ValueError(result.status))
+
+        if cancelled:
+            raise asyncio.CancelledError()
+
+        return await future
+
+    def _close(self, wallet_uuid: str, batch: _Batch) -> None:
+        if self._batches.get(wallet_uuid) is batch:
+            del self._batches[wallet_uuid]
+        batch.full.set()
+
+
+operation_coalescer = WalletOperationCoalescer(
+    window=settings.coalescing.window_ms / 1000,
+    max_batch_size=settings.coalescing.max_batch_size,
+)
@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from typing import (
+    List,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy import (
+    Text,
+    select,
+    update,
+    delete,
+    func,
+    cast,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.money import minor_to_text
+from app.db.models.outbox_event import OutboxEvent
+
+
+def _event_payload(events):
+    # The JSON an event is published and replayed as.
+    return cast(
+        func.json_build_object(
+            "id", events.c.id,
+            "wallet_id", events.c.wallet_id,
+            "transaction_id", events.c.transaction_id,
+            "type", events.c.type,
+            "currency", events.c.currency,
+            "amount", minor_to_text(events.c.amount, events.c.currency_scale),
+            "balance", minor_to_text(events.c.balance, events.c.currency_scale),
+            "created_at", events.c.created_at,
+        ),
+        Text,
+    )
+
+
+async def publish_outbox_batch(
+    session: AsyncSession,
+    channel: str,
+    batch_size: int = 500,
+) -> int:
+    # Marks the oldest unpublished outbox rows published and NOTIFYs each
+    # one as a JSON payload in a single statement. Notifications are only
+    # delivered when the transaction commits, so a crashed relay publishes
+    # nothing and loses nothing. A notification nobody was listening for is
+    # not lost: the row stays until the retention window has passed, for
+    # streams to replay.
+    #
+    # Only one relay publishes at a time; the others find the advisory lock
+    # taken and publish nothing. Writers of a wallet hold its row lock until
+    # they commit, so its events commit in id order, and a single relay
+    # publishing in id order delivers them in that order too.
+    if not await session.scalar(
+        select(func.pg_try_advisory_xact_lock(func.hashtext(f"outbox_relay:{channel}")))
+    ):
+        await session.rollback()
+        return 0
+
+    batch = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.published_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    published = (
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(batch))
+        .values(published_at=func.now())
+        .returning(
+            OutboxEvent.id,
+            OutboxEvent.wallet_id,
+            OutboxEvent.transaction_id,
+            OutboxEvent.type,
+            OutboxEvent.amount,
+            OutboxEvent.balance,
+            OutboxEvent.currency,
+            OutboxEvent.currency_scale,
+            OutboxEvent.created_at,
+        )
+        .cte("published")
+    )
+    result = await session.execute(
+        select(func.pg_notify(channel, _event_payload(published)))
+        .select_from(published)
+        .order_by(published.c.id)
+    )
+    count = len(result.all())
+    await session.commit()
+
+    return count
+
+
+async def get_last_event_id(
+    session: AsyncSession,
+    wallet_uuid: str,
+) -> int:
+    return await session.scalar(
+        select(func.coalesce(func.max(OutboxEvent.id), 0))
+        .where(OutboxEvent.wallet_id == wallet_uuid)
+    )
+
+
+async def get_wallet_events_since(
+    session: AsyncSession,
+    wallet_uuid: str,
+    after_id: int,
+) -> Optional[List[Tuple[int, str]]]:
+    # The wallet's events after ``after_id`` as (id, payload), published or
+    # not, oldest first. None if events after it may already have been
+    # purged, when only a fresh snapshot can bring the stream up to date.
+    oldest = await session.scalar(select(func.min(OutboxEvent.id)))
+    if oldest is None or oldest > after_id + 1:
+        return None
+
+    events = (
+        select(OutboxEvent)
+        .where(
+            OutboxEvent.wallet_id == wallet_uuid,
+            OutboxEvent.id > after_id,
+        )
+        .subquery("events")
+    )
+    result = await session.execute(
+        select(events.c.id, _event_payload(events)).order_by(events.c.id)
+    )
+
+    return [tuple(row) for row in result]
+
+
+async def purge_published_outbox_events(
+    session: AsyncSession,
+    retention: float,
+    batch_size: int = 10_000,
+) -> int:
+    # Only looks at the oldest ``batch_size`` rows in primary key order,
+    # which are the first to expire, so it needs no index on published_at.
+    oldest = (
+        select(OutboxEvent.id)
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        delete(OutboxEvent).where(
+            OutboxEvent.id.in_(oldest),
+            OutboxEvent.published_at < func.now() - timedelta(seconds=retention),
+        )
+    )
+    await session.commit()
+
+    return result.rowcount
@@ -0,0 +1,197 @@
+from datetime import datetime
+
+from typing import (
+    AsyncIterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+import uuid
+
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    DateTime,
+    String,
+    cast,
+    case,
+    column,
+    insert,
+    select,
+    literal,
+    table,
+    union_all,
+    and_,
+    any_,
+    tuple_,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncSession,
+)
+
+from app.db.models.transaction import Transaction
+from app.db.models.wallets import Wallet
+from app.db.models.wallet_balance import WalletBalance
+from app.db.partitions import Partition
+from app.db.repository.transaction_repository import (
+    CARRY_FORWARD,
+    CREDIT_TYPES,
+    signed_amount,
+)
+
+
+class BalanceDrift(NamedTuple):
+    wallet_id: uuid.UUID
+    balance: int
+    ledger_balance: int
+    currency_scale: int
+    currency: str
+
+    @property
+    def difference(self) -> int:
+        return self.balance - self.ledger_balance
+
+
+async def iter_wallet_id_chunks(
+    session: AsyncSession,
+    chunk_size: int,
+    until: datetime,
+    since: Optional[datetime] = None,
+) -> AsyncIterator[List[uuid.UUID]]:
+    # Keyset walk over the (updated_at, id) index. A wallet written during
+    # the walk moves past ``until`` and is left for the next run. Every page
+    # is its own short transaction, so the walk never holds back vacuum.
+    stmt = (
+        select(Wallet.updated_at, Wallet.id)
+        .where(Wallet.updated_at <= until)
+        .order_by(Wallet.updated_at, Wallet.id)
+        .limit(chunk_size)
+    )
+    if since is not None:
+        stmt = stmt.where(Wallet.updated_at > since)
+
+    after = None
+    while True:
+        page = stmt
+        if after is not None:
+            page = page.where(tuple_(Wallet.updated_at, Wallet.id) > tuple_(*after))
+        rows = (await session.execute(page)).all()
+        await session.commit()
+        if not rows:
+            return
+
+        after = tuple(rows[-1])
+        yield [wallet_id for _, wallet_id in rows]
+
+
+async def find_balance_drift(
+    session: AsyncSession,
+    wallet_ids: Sequence[uuid.UUID],
+) -> List[BalanceDrift]:
+    # One statement per chunk: each wallet's balance next to the signed sum
+    # of its ledger, read from the same snapshot, so in-flight operations
+    # (which update both in one transaction) never show up as drift. The
+    # ledger is aggregated for the whole chunk at once, which costs one
+    # index scan per partition rather than one per wallet and partition.
+    # Plain reads take no row locks. Balances in other currencies are
+    # checked against their own ledger rows; the wallet's own currency has
+    # a NULL ledger currency. The ledger is complete as far as balances go:
+    # history from before ledger rows were linked to wallets is one opening
+    # entry per wallet, and a detached partition leaves a carry-forward
+    # entry behind (see carry_forward_partition).
+    chunk = literal(list(wallet_ids), ARRAY(UUID))
+    ledger = (
+        select(
+            Transaction.wallet_id,
+            Transaction.currency,
+            func.sum(signed_amount()).label("total"),
+        )
+        .where(Transaction.wallet_id == any_(chunk))
+        .group_by(Transaction.wallet_id, Transaction.currency)
+        .subquery("ledger")
+    )
+    held = union_all(
+        select(
+            Wallet.id.label("wallet_id"),
+            literal(None, String).label("ledger_currency"),
+            Wallet.currency,
+            Wallet.balance,
+            Wallet.currency_scale,
+        ).where(Wallet.id == any_(chunk)),
+        select(
+            WalletBalance.wallet_id,
+            WalletBalance.currency,
+            WalletBalance.currency,
+            WalletBalance.balance,
+            WalletBalance.currency_scale,
+        ).where(WalletBalance.wallet_id == any_(chunk)),
+    ).subquery("held")
+    ledger_balance = cast(func.coalesce(ledger.c.total, 0), BigInteger)
+    result = await session.execute(
+        select(
+            held.c.wallet_id,
+            held.c.balance,
+            ledger_balance,
+            held.c.currency_scale,
+            held.c.currency,
+        )
+        .outerjoin(
+            ledger,
+            and_(
+                ledger.c.wallet_id == held.c.wallet_id,
+                ledger.c.currency.is_not_distinct_from(held.c.ledger_currency),
+            ),
+        )
+        .where(held.c.balance != ledger_balance)
+        .order_by(held.c.wallet_id, held.c.ledger_currency.nulls_first())
+    )
+    drifts = [BalanceDrift(*row) for row in result]
+    await session.commit()
+
+    return drifts
+
+
+async def carry_forward_partition(
+    conn: AsyncConnection,
+    partition: Partition,
+) -> None:
+    # Run in the transaction that detaches ``partition``: writes each
+    # wallet's net effect in it, per currency, as one CARRY_FORWARD entry
+    # at the partition's upper bound, so the retained ledger still sums to
+    # every balance. Ledger rows without a wallet are not carried forward.
+    # Balance snapshots already cover the detached history, so they only
+    # count these entries for a wallet without an earlier snapshot.
+    detached = table(
+        partition.name,
+        column("wallet_id", UUID),
+        column("type", String),
+        column("amount", BigInteger),
+        column("currency", String),
+    )
+    net = func.sum(
+        case(
+            (detached.c.type.in_(CREDIT_TYPES), detached.c.amount),
+            else_=-detached.c.amount,
+        )
+    )
+    await conn.execute(
+        insert(Transaction).from_select(
+            ["id", "wallet_id", "type", "amount", "currency", "created_at"],
+            select(
+                func.gen_random_uuid(),
+                detached.c.wallet_id,
+                literal(CARRY_FORWARD),
+                net,
+                detached.c.currency,
+                literal(partition.upper_bound, DateTime(timezone=True)),
+            )
+            .where(detached.c.wallet_id.is_not(None))
+            .group_by(detached.c.wallet_id, detached.c.currency)
+            .having(net != 0),
+        )
+    )
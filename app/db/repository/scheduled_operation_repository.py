@@ -0,0 +1,245 @@
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from typing import (
+    List,
+    Optional,
+    Sequence,
+)
+
+from sqlalchemy import (
+    Boolean,
+    BigInteger,
+    String,
+    select,
+    update,
+    insert,
+    column,
+    case,
+    extract,
+    func,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.arrays import unnest_rows
+from app.db.models.scheduled_operation import (
+    SCHEDULE_PENDING,
+    SCHEDULE_COMPLETED,
+    SCHEDULE_FAILED,
+    SCHEDULE_CANCELLED,
+    ScheduledOperation,
+)
+from app.db.repository.wallet_repository import (
+    OPERATION_APPLIED,
+    Operation,
+    OperationResult,
+    apply_operations_batch,
+    get_wallet_cached,
+)
+from app.utils.money import (
+    Amount,
+    parse_amount,
+)
+
+
+async def schedule_operation(
+    session: AsyncSession,
+    wallet_uuid: str,
+    amount: Amount,
+    operation_type: str,
+    run_at: Optional[datetime] = None,
+    repeat_every: Optional[timedelta] = None,
+    currency: Optional[str] = None,
+) -> Optional[ScheduledOperation]:
+    # The amount is checked against the balance's scale up front, so an
+    # amount that can never apply fails the request instead of every run.
+    if operation_type not in ("DEPOSIT", "WITHDRAW"):
+        raise ValueError(f"Unknown operation type: {operation_type}")
+    if repeat_every is not None and repeat_every <= timedelta(0):
+        raise ValueError("Repeat interval must be positive")
+
+    wallet = await get_wallet_cached(session, wallet_uuid)
+    if wallet is None:
+        return None
+
+    if currency == wallet.currency:
+        currency = None
+    if currency is None:
+        currency_scale = wallet.currency_scale
+    else:
+        scales = {other.currency: other.currency_scale for other in wallet.balances}
+        currency_scale = scales.get(currency, settings.money.scale_for(currency))
+    amount.to_minor(currency_scale)
+
+    operation = await session.scalar(
+        insert(ScheduledOperation)
+        .values(
+            wallet_id=wallet.id,
+            operation_type=operation_type,
+            amount=str(amount),
+            currency=currency,
+            run_at=run_at if run_at is not None else func.now(),
+            repeat_every=repeat_every,
+            status=SCHEDULE_PENDING,
+        )
+        .returning(ScheduledOperation)
+    )
+    await session.commit()
+
+    return operation
+
+
+async def get_scheduled_operations(
+    session: AsyncSession,
+    wallet_uuid: str,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+) -> Sequence[ScheduledOperation]:
+    # Newest first, keyset-paginated over the (wallet_id, id) index.
+    stmt = (
+        select(ScheduledOperation)
+        .where(ScheduledOperation.wallet_id == wallet_uuid)
+        .order_by(ScheduledOperation.id.desc())
+        .limit(limit)
+    )
+    if before_id is not None:
+        stmt = stmt.where(ScheduledOperation.id < before_id)
+
+    return (await session.scalars(stmt)).all()
+
+
+async def cancel_scheduled_operation(
+    session: AsyncSession,
+    wallet_uuid: str,
+    operation_id: int,
+) -> Optional[ScheduledOperation]:
+    # Waits for a worker that has the row claimed; an operation it has
+    # just completed is no longer pending and is not cancelled.
+    operation = await session.scalar(
+        update(ScheduledOperation)
+        .where(
+            ScheduledOperation.id == operation_id,
+            ScheduledOperation.wallet_id == wallet_uuid,
+            ScheduledOperation.status == SCHEDULE_PENDING,
+        )
+        .values(status=SCHEDULE_CANCELLED)
+        .returning(ScheduledOperation)
+    )
+    await session.commit()
+
+    return operation
+
+
+async def run_due_operations(
+    session: AsyncSession,
+    batch_size: int = 100,
+) -> int:
+    # Claims the oldest due operations with FOR UPDATE SKIP LOCKED, so any
+    # number of workers take disjoint batches without waiting on each
+    # other, and applies them as one best-effort batch. Their new state is
+    # written by the same transaction as the balances, and the row locks
+    # are held until it commits: an operation is applied exactly once per
+    # occurrence. A recurring operation moves on to its first occurrence
+    # after now whether or not this one applied, so one that fell behind
+    # runs once and skips the occurrences it missed. A row that cannot be
+    # applied at all, e.g. an amount that no longer parses, is FAILED on
+    # its own instead of failing the claim. Returns the number of claimed
+    # rows.
+    claimed = (
+        await session.execute(
+            select(
+                ScheduledOperation.id,
+                ScheduledOperation.wallet_id,
+                ScheduledOperation.amount,
+                ScheduledOperation.operation_type,
+                ScheduledOperation.currency,
+            )
+            .where(
+                ScheduledOperation.status == SCHEDULE_PENDING,
+                ScheduledOperation.run_at <= func.now(),
+            )
+            .order_by(ScheduledOperation.run_at, ScheduledOperation.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    ).all()
+    if not claimed:
+        await session.rollback()
+        return 0
+
+    operations = []
+    invalid = {}
+    for row in claimed:
+        try:
+            if row.operation_type not in ("DEPOSIT", "WITHDRAW"):
+                raise ValueError(f"Unknown operation type: {row.operation_type}")
+            operations.append(
+                Operation(
+                    row.wallet_id,
+                    parse_amount(row.amount),
+                    row.operation_type,
+                    row.currency,
+                )
+            )
+        except ValueError as e:
+            invalid[row.id] = OperationResult(str(e))
+
+    def record(results: List[OperationResult]):
+        applied = iter(results)
+        rows = []
+        for row in claimed:
+            result = invalid.get(row.id) or next(applied)
+            rows.append(
+                (
+                    row.id,
+                    result.status == OPERATION_APPLIED,
+                    row.id in invalid,
+                    None if result.status == OPERATION_APPLIED else result.status,
+                )
+            )
+        outcomes = unnest_rows(
+            "outcomes",
+            [
+                column("id", BigInteger),
+                column("applied", Boolean),
+                column("invalid", Boolean),
+                column("last_error", String),
+            ],
+            rows,
+        )
+        recurring = ScheduledOperation.repeat_every.is_not(None)
+        # Whole intervals from run_at up to now, plus the one that ends
+        # after it.
+        occurrences = func.floor(
+            extract("epoch", func.now() - ScheduledOperation.run_at)
+            / extract("epoch", ScheduledOperation.repeat_every)
+        ) + 1
+
+        return (
+            update(ScheduledOperation)
+            .where(ScheduledOperation.id == outcomes.c.id)
+            .values(
+                status=case(
+                    (outcomes.c.invalid, SCHEDULE_FAILED),
+                    (recurring, SCHEDULE_PENDING),
+                    (outcomes.c.applied, SCHEDULE_COMPLETED),
+                    else_=SCHEDULE_FAILED,
+                ),
+                run_at=case(
+                    (
+                        recurring,
+                        ScheduledOperation.run_at
+                        + ScheduledOperation.repeat_every * occurrences,
+                    ),
+                    else_=ScheduledOperation.run_at,
+                ),
+                last_error=outcomes.c.last_error,
+            )
+        )
+
+    await apply_operations_batch(session, operations, record=record)
+
+    return len(claimed)
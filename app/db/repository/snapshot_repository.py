@@ -0,0 +1,212 @@
+from datetime import (
+    date,
+    datetime,
+    timedelta,
+    timezone,
+)
+
+from typing import Optional
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    select,
+    update,
+    literal,
+    exists,
+    cast,
+    func,
+    or_,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.job_checkpoint import JobCheckpoint
+from app.db.models.transaction import Transaction
+from app.db.models.wallet_balance_snapshot import WalletBalanceSnapshot
+from app.db.models.wallets import Wallet
+from app.db.repository.transaction_repository import (
+    CARRY_FORWARD,
+    signed_amount,
+)
+
+
+SNAPSHOT_JOB = "wallet_balance_snapshots"
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+async def _claim_checkpoint(
+    session: AsyncSession,
+    name: str,
+    initial: datetime,
+) -> Optional[datetime]:
+    # Locks the job's checkpoint row for the rest of the transaction and
+    # returns its position, or None while another worker holds it. The row
+    # is only created on the very first run, so the usual claim is a single
+    # SELECT ... FOR UPDATE SKIP LOCKED.
+    position = await session.scalar(
+        select(JobCheckpoint.position)
+        .where(JobCheckpoint.name == name)
+        .with_for_update(skip_locked=True)
+    )
+    if position is not None:
+        return position
+
+    if await session.scalar(
+        select(exists().where(JobCheckpoint.name == name))
+    ):
+        return None
+
+    return await session.scalar(
+        insert(JobCheckpoint)
+        .values(name=name, position=initial)
+        .on_conflict_do_nothing(index_elements=[JobCheckpoint.name])
+        .returning(JobCheckpoint.position)
+    )
+
+
+async def refresh_balance_snapshots(
+    session: AsyncSession,
+    settlement_lag: float = 300.0,
+    now: Optional[datetime] = None,
+) -> int:
+    # Closes every UTC day between the checkpoint and the last day that
+    # ended at least ``settlement_lag`` seconds ago, one day per transaction:
+    # each wallet active that day gets its previous closing balance plus the
+    # day's ledger delta. Only that day's ledger rows are read, so the cost
+    # follows the day's volume, not the ledger size. The lag gives
+    # transactions that started before midnight time to commit; a row
+    # committed later than that is missed by the snapshot. Snapshots track
+    # the wallet's own currency only. A CARRY_FORWARD entry stands in for a
+    # detached partition the earlier snapshots already include, so it only
+    # counts for a wallet without one. Returns the number of days closed.
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(seconds=settlement_lag)
+    last_closed = _utc_midnight(cutoff.astimezone(timezone.utc).date())
+    first_day = select(
+        func.coalesce(
+            func.date_trunc("day", func.min(Wallet.created_at), "UTC"),
+            last_closed,
+        )
+    ).scalar_subquery()
+
+    days = 0
+    while True:
+        position = await _claim_checkpoint(session, SNAPSHOT_JOB, first_day)
+        if position is None or position >= last_closed:
+            await session.commit()
+            return days
+
+        day = position.astimezone(timezone.utc).date()
+        deltas = (
+            select(
+                Transaction.wallet_id,
+                func.coalesce(
+                    func.sum(signed_amount()).filter(Transaction.type != CARRY_FORWARD),
+                    0,
+                ).label("delta"),
+                func.coalesce(
+                    func.sum(signed_amount()).filter(Transaction.type == CARRY_FORWARD),
+                    0,
+                ).label("carried"),
+            )
+            .where(
+                Transaction.wallet_id.is_not(None),
+                Transaction.currency.is_(None),
+                Transaction.created_at >= position,
+                Transaction.created_at < position + timedelta(days=1),
+            )
+            .group_by(Transaction.wallet_id)
+            .subquery("deltas")
+        )
+        previous = (
+            select(WalletBalanceSnapshot.closing_balance)
+            .where(
+                WalletBalanceSnapshot.wallet_id == deltas.c.wallet_id,
+                WalletBalanceSnapshot.day < day,
+            )
+            .order_by(WalletBalanceSnapshot.day.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = insert(WalletBalanceSnapshot).from_select(
+            ["wallet_id", "day", "closing_balance"],
+            select(
+                deltas.c.wallet_id,
+                literal(day, Date),
+                func.coalesce(previous, deltas.c.carried) + deltas.c.delta,
+            ),
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    WalletBalanceSnapshot.wallet_id,
+                    WalletBalanceSnapshot.day,
+                ],
+                set_={"closing_balance": stmt.excluded.closing_balance},
+            )
+        )
+        await session.execute(
+            update(JobCheckpoint)
+            .where(JobCheckpoint.name == SNAPSHOT_JOB)
+            .values(position=position + timedelta(days=1))
+        )
+        await session.commit()
+        days += 1
+
+
+async def get_balance_at(
+    session: AsyncSession,
+    wallet_uuid: str,
+    at: datetime,
+) -> int:
+    # The last snapshot before the day of ``at`` plus the ledger rows after
+    # it up to ``at``. Every earlier day with activity has a snapshot, so
+    # the ledger part covers at most the partial day plus whatever the
+    # snapshot job has not closed yet, however old the wallet is. Like the
+    # snapshots, it counts CARRY_FORWARD entries only without a snapshot.
+    last_day = (
+        select(WalletBalanceSnapshot.day)
+        .where(
+            WalletBalanceSnapshot.wallet_id == wallet_uuid,
+            WalletBalanceSnapshot.day < at.astimezone(timezone.utc).date(),
+        )
+        .order_by(WalletBalanceSnapshot.day.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    closing_balance = (
+        select(WalletBalanceSnapshot.closing_balance)
+        .where(
+            WalletBalanceSnapshot.wallet_id == wallet_uuid,
+            WalletBalanceSnapshot.day == last_day,
+        )
+        .scalar_subquery()
+    )
+    since = func.coalesce(
+        func.timezone("UTC", cast(last_day + 1, DateTime)),
+        cast(literal("-infinity"), DateTime(timezone=True)),
+    )
+    delta = (
+        select(func.sum(signed_amount()))
+        .where(
+            Transaction.wallet_id == wallet_uuid,
+            Transaction.currency.is_(None),
+            Transaction.created_at >= since,
+            Transaction.created_at <= at,
+            or_(last_day.is_(None), Transaction.type != CARRY_FORWARD),
+        )
+        .scalar_subquery()
+    )
+
+    return await session.scalar(
+        select(
+            cast(
+                func.coalesce(closing_balance, 0) + func.coalesce(delta, 0),
+                BigInteger,
+            )
+        )
+    )
@@ -0,0 +1,128 @@
+from datetime import datetime
+
+from typing import (
+    AsyncIterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import uuid
+
+from sqlalchemy import (
+    Row,
+    select,
+    and_,
+    or_,
+    case,
+    func,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.money import (
+    UNLINKED_CURRENCY_SCALE,
+    minor_to_text,
+)
+from app.db.models.transaction import Transaction
+from app.db.models.wallets import Wallet
+from app.db.models.wallet_balance import WalletBalance
+
+
+# The net effect of a detached ledger partition, see carry_forward_partition.
+CARRY_FORWARD = "CARRY_FORWARD"
+CREDIT_TYPES = ("DEPOSIT", "TRANSFER_IN", "OPENING_BALANCE", CARRY_FORWARD)
+
+
+def signed_amount():
+    # A ledger row's effect on the balance: credits add, debits subtract.
+    return case(
+        (Transaction.type.in_(CREDIT_TYPES), Transaction.amount),
+        else_=-Transaction.amount,
+    )
+
+
+async def get_wallet_transactions(
+    session: AsyncSession,
+    wallet_uuid: str,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    operation_type: Optional[str] = None,
+) -> List[Transaction]:
+    # Newest first, walking the (wallet_id, created_at DESC, id) index.
+    # Rows written by one batch share created_at, so id breaks the tie.
+    stmt = (
+        select(Transaction)
+        .where(Transaction.wallet_id == wallet_uuid)
+        .order_by(Transaction.created_at.desc(), Transaction.id)
+        .limit(limit)
+    )
+    if after is not None:
+        created_at, transaction_id = after
+        stmt = stmt.where(
+            or_(
+                Transaction.created_at < created_at,
+                and_(
+                    Transaction.created_at == created_at,
+                    Transaction.id > transaction_id,
+                ),
+            )
+        )
+    if since is not None:
+        stmt = stmt.where(Transaction.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(Transaction.created_at < until)
+    if operation_type is not None:
+        stmt = stmt.where(Transaction.type == operation_type)
+
+    result = await session.execute(stmt)
+
+    return result.scalars().all()
+
+
+async def stream_transactions(
+    session: AsyncSession,
+    wallet_uuid: Optional[str] = None,
+    chunk_size: int = 5000,
+) -> AsyncIterator[Sequence[Row]]:
+    # Rows come from a server-side cursor ``chunk_size`` at a time, so memory
+    # stays flat regardless of the ledger size. A single wallet is exported
+    # newest first via its index; the full export is left in heap order to
+    # avoid sorting the whole table. Amounts are rendered to decimal text by
+    # Postgres, with the scale the owning wallet keeps for their currency.
+    currency_scale = func.coalesce(
+        WalletBalance.currency_scale,
+        Wallet.currency_scale,
+        UNLINKED_CURRENCY_SCALE,
+    )
+    stmt = (
+        select(
+            Transaction.id.label("transaction_id"),
+            Transaction.wallet_id,
+            Transaction.type.label("operation_type"),
+            minor_to_text(Transaction.amount, currency_scale).label("amount"),
+            func.coalesce(Transaction.currency, Wallet.currency).label("currency"),
+            Transaction.created_at,
+        )
+        .outerjoin(Wallet, Wallet.id == Transaction.wallet_id)
+        .outerjoin(
+            WalletBalance,
+            and_(
+                WalletBalance.wallet_id == Transaction.wallet_id,
+                WalletBalance.currency == Transaction.currency,
+            ),
+        )
+    )
+    if wallet_uuid is not None:
+        stmt = (
+            stmt.where(Transaction.wallet_id == wallet_uuid)
+            .order_by(Transaction.created_at.desc(), Transaction.id)
+        )
+
+    result = await session.stream(
+        stmt.execution_options(yield_per=chunk_size)
+    )
+    async for partition in result.partitions():
+        yield partition
@@ -0,0 +1,205 @@
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+from typing import (
+    Dict,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import uuid
+
+import orjson
+
+from app.core.cache import (
+    LRUCache,
+    RedisCache,
+    SharedCache,
+)
+from app.core.config import settings
+from app.core.metrics import (
+    Counter,
+    Gauge,
+    registry,
+)
+from app.db.models.wallet_balance import WalletBalance
+from app.db.models.wallets import Wallet
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+wallet_cache_lookups = registry.register(
+    Counter(
+        "wallet_cache_lookups",
+        "Wallet cache lookups by result.",
+        ("result",),
+    )
+)
+
+# Entries are versioned by updated_at: the write paths stamp it with
+# clock_timestamp() while holding the row lock, so a reader that fetched an
+# older row can never overwrite a newer balance written through by a writer,
+# in this process or, through a compare-and-set, in the shared tier.
+# Changes to the other currencies' balances bump the wallet's updated_at too,
+# and every entry carries all of them as (currency, balance, scale).
+#
+# The local tier only sees the writes of its own process: with several
+# workers one would keep serving a balance another has just changed, so it
+# is only used by a single worker (``local``). Without it, and without a
+# shared tier, the cache is off.
+class WalletCache:
+    def __init__(
+        self,
+        enabled: bool,
+        ttl: float,
+        max_size: int,
+        shared: Optional[SharedCache] = None,
+        local: bool = True,
+    ) -> None:
+        self.enabled = enabled and (local or shared is not None)
+        self.ttl = ttl
+        self.local = LRUCache(max_size=max_size if local else 0, ttl=ttl)
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, wallet_uuid: str) -> Optional[Wallet]:
+        if not self.enabled:
+            return None
+
+        key = _cache_key(wallet_uuid)
+        if key is None:
+            return None
+
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            raw = await self.shared.get(f"wallet:{key}")
+            if raw is not None:
+                (
+                    balance,
+                    created_at,
+                    updated_at,
+                    currency_scale,
+                    currency,
+                    balances,
+                ) = orjson.loads(raw)
+                entry = (
+                    balance,
+                    datetime.fromisoformat(created_at),
+                    datetime.fromisoformat(updated_at),
+                    currency_scale,
+                    currency,
+                    tuple(map(tuple, balances)),
+                )
+                self.local.set(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            wallet_cache_lookups.inc("miss")
+            return None
+
+        self.hits += 1
+        wallet_cache_lookups.inc("hit")
+        balance, created_at, updated_at, currency_scale, currency, balances = entry
+        wallet_id = uuid.UUID(key)
+
+        return Wallet(
+            id=wallet_id,
+            balance=balance,
+            currency=currency,
+            currency_scale=currency_scale,
+            created_at=created_at,
+            updated_at=updated_at,
+            balances=[
+                WalletBalance(
+                    wallet_id=wallet_id,
+                    currency=other_currency,
+                    balance=other_balance,
+                    currency_scale=other_scale,
+                )
+                for other_currency, other_balance, other_scale in balances
+            ],
+        )
+
+    async def store(
+        self,
+        wallet_id: uuid.UUID,
+        balance: int,
+        created_at: datetime,
+        updated_at: datetime,
+        currency_scale: int,
+        currency: str,
+        balances: Sequence[Tuple[str, int, int]],
+    ) -> None:
+        if not self.enabled:
+            return
+
+        key = str(wallet_id)
+        cached = self.local.get(key)
+        if cached is not None and cached[2] > updated_at:
+            return
+
+        entry = (
+            balance,
+            created_at,
+            updated_at,
+            currency_scale,
+            currency,
+            tuple(map(tuple, balances)),
+        )
+        self.local.set(key, entry)
+        if self.shared is not None:
+            await self.shared.set(
+                f"wallet:{key}",
+                orjson.dumps(entry),
+                self.ttl,
+                (updated_at - EPOCH) // timedelta(microseconds=1),
+            )
+
+    async def invalidate(self, wallet_uuid: str) -> None:
+        key = _cache_key(wallet_uuid)
+        if key is None:
+            return
+
+        self.local.pop(key)
+        if self.shared is not None:
+            await self.shared.delete(f"wallet:{key}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.local),
+        }
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+
+def _cache_key(wallet_uuid: str) -> Optional[str]:
+    try:
+        return str(uuid.UUID(str(wallet_uuid)))
+    except ValueError:
+        return None
+
+
+wallet_cache = WalletCache(
+    enabled=settings.cache.enabled,
+    ttl=settings.cache.ttl,
+    max_size=settings.cache.max_size,
+    shared=RedisCache(settings.cache.redis_url) if settings.cache.redis_url else None,
+    local=settings.run.worker_count == 1,
+)
+
+wallet_cache_entries = registry.register(
+    Gauge(
+        "wallet_cache_entries",
+        "Wallets held in this process's cache.",
+        collect=lambda: [((), len(wallet_cache.local))],
+    )
+)
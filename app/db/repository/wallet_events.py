@@ -0,0 +1,136 @@
+import asyncio
+import logging
+
+from contextlib import (
+    contextmanager,
+    suppress,
+)
+
+from typing import (
+    Dict,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import asyncpg
+import orjson
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# One LISTEN connection per process fans the relay's notifications out to
+# in-process subscriber queues, so an open event stream costs a queue rather
+# than a database connection. LISTEN needs a session-level connection: behind
+# PgBouncer in transaction mode ``url`` has to point at Postgres directly.
+#
+# Queues get (event id, payload) pairs. A subscriber that may have missed
+# events, because its queue overflowed or the hub was reconnecting, instead
+# gets RESUME: it should catch up from the outbox by event id.
+RESUME = None
+
+
+class WalletEventHub:
+    def __init__(
+        self,
+        url: str,
+        channel: str,
+        queue_size: int = 1000,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ) -> None:
+        self.url = url
+        self.channel = channel
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = asyncio.Event()
+        self._subscribers: Dict[str, Set["asyncio.Queue[Optional[Tuple[int, str]]]"]] = {}
+
+    @contextmanager
+    def subscribe(self, wallet_id: str) -> Iterator["asyncio.Queue[Optional[Tuple[int, str]]]"]:
+        queue: "asyncio.Queue[Optional[Tuple[int, str]]]" = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(wallet_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers[wallet_id]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[wallet_id]
+
+    def dispatch(self, payload: str) -> None:
+        if not self._subscribers:
+            return
+
+        try:
+            event = orjson.loads(payload)
+            wallet_id, event_id = event["wallet_id"], event["id"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Dropping malformed wallet event: %r", payload)
+            return
+
+        for queue in self._subscribers.get(wallet_id, ()):
+            if queue.full():
+                # A consumer that cannot keep up catches up from the outbox
+                # instead of holding up everyone else.
+                _resume(queue)
+            else:
+                queue.put_nowait((event_id, payload))
+
+    def resume_all(self) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                _resume(queue)
+
+    async def run(self) -> None:
+        dsn = make_url(self.url).set(drivername="postgresql").render_as_string(
+            hide_password=False,
+        )
+        delay = self.reconnect_delay
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(
+                    self.channel,
+                    lambda _connection, _pid, _channel, payload: self.dispatch(payload),
+                )
+                # Nothing was delivered while there was no connection.
+                self.resume_all()
+                self.connected.set()
+                delay = self.reconnect_delay
+                await lost.wait()
+                logger.warning("Wallet event connection lost, reconnecting")
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("Wallet event connection failed: %s", e)
+            except Exception:
+                logger.exception("Wallet event connection failed")
+            finally:
+                self.connected.clear()
+                if connection is not None:
+                    with suppress(Exception):
+                        await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+def _resume(queue: "asyncio.Queue[Optional[Tuple[int, str]]]") -> None:
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(RESUME)
+
+
+wallet_event_hub = WalletEventHub(
+    url=settings.db.url,
+    channel=settings.outbox.channel,
+    queue_size=settings.outbox.subscriber_queue_size,
+)
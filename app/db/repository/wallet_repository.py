@@ -1,82 +1,992 @@
-from decimal import Decimal
+from datetime import (
+    datetime,
+    timedelta,
+)
 
 from typing import (
-    List, 
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
     Optional,
+    Sequence,
+    Set,
+    Tuple,
 )
 
+import uuid
+
 from sqlalchemy import (
+    Row,
+    UUID,
+    JSON,
+    BigInteger,
+    SmallInteger,
+    Numeric,
+    String,
+    cast,
     select,
+    update,
+    insert,
+    literal,
+    column,
+    any_,
+    tuple_,
+    true,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import (
+    ARRAY,
+    aggregate_order_by,
+    insert as pg_insert,
+)
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.orm import (
+    aliased,
+    joinedload,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.arrays import unnest_rows
+from app.db.money import minor_to_text
 from app.db.models.wallets import Wallet
+from app.db.models.wallet_balance import WalletBalance
 from app.db.models.transaction import Transaction
+from app.db.models.idempotency_key import IdempotencyKey
+from app.db.models.outbox_event import OutboxEvent
+from app.db.repository.wallet_cache import wallet_cache
+from app.core.config import settings
+from app.utils.money import (
+    MAX_MINOR_UNITS,
+    Amount,
+)
+
+
+OPERATION_APPLIED = "Successful"
+INSUFFICIENT_FUNDS = "Insufficient funds"
+WALLET_NOT_FOUND = "Wallet not found"
+OPERATION_ROLLED_BACK = "Rolled back"
+AMOUNT_TOO_PRECISE = "Amount has more decimal places than the wallet supports"
+SCALE_MISMATCH = "Wallets have different currency scales"
+BALANCE_TOO_LARGE = "Balance would exceed the maximum"
+
+
+class Operation(NamedTuple):
+    wallet_uuid: str
+    amount: Amount
+    operation_type: str
+    # None means the wallet's own currency.
+    currency: Optional[str] = None
 
 
-async def create_wallet(session: AsyncSession) -> Wallet:
-    wallet = Wallet()
+class OperationResult(NamedTuple):
+    status: str
+    balance: Optional[int] = None
+    currency_scale: Optional[int] = None
+    currency: Optional[str] = None
 
-    session.add(wallet)
+
+class TransferResult(NamedTuple):
+    from_balance: int
+    to_balance: int
+    currency_scale: int
+    currency: str
+
+
+class _LockedWallet(NamedTuple):
+    balance: int
+    currency_scale: int
+    currency: str
+
+
+class _LedgerEntry(NamedTuple):
+    wallet_id: uuid.UUID
+    type: str
+    amount: int
+    balance: int
+    currency_scale: int
+    currency: str
+
+
+def _other_balances(wallet_id, as_text: bool = False):
+    # The wallet's other currencies as a JSON array of [currency, balance,
+    # scale] triples, the shape the cache stores them in; ``as_text``
+    # renders the balances as decimal strings instead of minor units.
+    balance = WalletBalance.balance
+    if as_text:
+        balance = minor_to_text(balance, WalletBalance.currency_scale)
+
+    return (
+        select(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_array(
+                        WalletBalance.currency,
+                        balance,
+                        WalletBalance.currency_scale,
+                    ),
+                    WalletBalance.currency,
+                ),
+                type_=JSON,
+            )
+        )
+        .where(WalletBalance.wallet_id == wallet_id)
+        .scalar_subquery()
+    )
+
+
+def _wallet_rows():
+    # Wallet columns with the other balances as a JSON column, all amounts
+    # already rendered to decimal text by Postgres: list pages build no ORM
+    # instances, format no money in Python and need no second query.
+    return select(
+        Wallet.id,
+        minor_to_text(Wallet.balance, Wallet.currency_scale).label("balance"),
+        Wallet.currency,
+        Wallet.currency_scale,
+        Wallet.created_at,
+        Wallet.updated_at,
+        _other_balances(Wallet.id, as_text=True).label("balances"),
+    )
+
+
+async def _store_in_cache(wallet: Wallet) -> None:
+    await wallet_cache.store(
+        wallet.id,
+        wallet.balance,
+        wallet.created_at,
+        wallet.updated_at,
+        wallet.currency_scale,
+        wallet.currency,
+        [
+            (balance.currency, balance.balance, balance.currency_scale)
+            for balance in wallet.balances
+        ],
+    )
+
+
+async def create_wallet(
+    session: AsyncSession,
+    currency_scale: Optional[int] = None,
+    currency: Optional[str] = None,
+) -> Wallet:
+    # INSERT ... RETURNING hands back the server-evaluated defaults, so
+    # there is no refresh SELECT after the commit.
+    if currency is None:
+        currency = settings.money.default_currency
+    if currency_scale is None:
+        currency_scale = settings.money.scale_for(currency)
+    wallet = await session.scalar(
+        insert(Wallet)
+        .values(
+            id=func.gen_random_uuid(),
+            balance=0,
+            currency=currency,
+            currency_scale=currency_scale,
+            created_at=func.now(),
+            updated_at=func.now(),
+        )
+        .returning(Wallet)
+    )
 
     await session.commit()
-    await session.refresh(wallet)
+    await wallet_cache.store(
+        wallet.id,
+        wallet.balance,
+        wallet.created_at,
+        wallet.updated_at,
+        wallet.currency_scale,
+        wallet.currency,
+        (),
+    )
 
     return wallet
 
 
+async def create_wallets_bulk(
+    session: AsyncSession,
+    count: int,
+    chunk_size: int = 10_000,
+    currency_scale: Optional[int] = None,
+    currency: Optional[str] = None,
+) -> AsyncIterator[Sequence[Row]]:
+    # Each chunk is one INSERT ... SELECT FROM generate_series(...) RETURNING,
+    # committed on its own, so memory stays bounded by chunk_size however many
+    # wallets are requested. Wallets already yielded stay created if a later
+    # chunk fails. Bulk-created wallets are not written through to the cache.
+    if currency is None:
+        currency = settings.money.default_currency
+    if currency_scale is None:
+        currency_scale = settings.money.scale_for(currency)
+    remaining = count
+    while remaining > 0:
+        batch = min(remaining, chunk_size)
+        stmt = (
+            insert(Wallet)
+            .from_select(
+                [
+                    "id",
+                    "balance",
+                    "currency",
+                    "currency_scale",
+                    "created_at",
+                    "updated_at",
+                ],
+                select(
+                    func.gen_random_uuid(),
+                    literal(0, BigInteger),
+                    literal(currency, String),
+                    literal(currency_scale, SmallInteger),
+                    func.now(),
+                    func.now(),
+                ).select_from(func.generate_series(1, batch)),
+            )
+            .returning(
+                Wallet.id.label("wallet_id"),
+                Wallet.currency,
+                minor_to_text(Wallet.balance, Wallet.currency_scale).label("balance"),
+                Wallet.currency_scale,
+                Wallet.created_at,
+            )
+        )
+        rows = (await session.execute(stmt)).all()
+        await session.commit()
+        remaining -= batch
+
+        yield rows
+
+
 async def get_wallet_by_uuid(
     session: AsyncSession,
     wallet_uuid: str,
 ) -> Optional[Wallet]:
-    stmt = select(Wallet).where(Wallet.id == wallet_uuid)
+    # The wallet and every other currency balance it holds in one query.
+    stmt = (
+        select(Wallet)
+        .options(joinedload(Wallet.balances))
+        .where(Wallet.id == wallet_uuid)
+    )
     result = await session.execute(stmt)
 
-    return result.scalar_one_or_none()
+    return result.unique().scalar_one_or_none()
+
+
+async def get_wallet_cached(
+    session: AsyncSession,
+    wallet_uuid: str,
+) -> Optional[Wallet]:
+    wallet = await wallet_cache.get(wallet_uuid)
+    if wallet is not None:
+        return wallet
+
+    wallet = await get_wallet_by_uuid(session, wallet_uuid)
+    if wallet is not None:
+        await _store_in_cache(wallet)
+
+    return wallet
 
 
 async def get_all_wallets(
     session: AsyncSession,
     skip: int = 0,
     limit: int = 100,
-) -> List[Wallet]:
-    stmt = select(Wallet).offset(skip).limit(limit)
+) -> Sequence[Row]:
+    stmt = (
+        _wallet_rows()
+        .order_by(Wallet.created_at, Wallet.id)
+        .offset(skip)
+        .limit(limit)
+    )
     result = await session.execute(stmt)
 
-    return result.scalars().all()
+    return result.all()
 
 
-async def get_wallets_count(session: AsyncSession) -> int:
-    stmt = select(Wallet)
+async def get_wallets_page(
+    session: AsyncSession,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+) -> Sequence[Row]:
+    # Keyset pagination over the (created_at, id) index: the cost of a page
+    # does not depend on how deep into the table it is.
+    stmt = (
+        _wallet_rows()
+        .order_by(Wallet.created_at, Wallet.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(Wallet.created_at, Wallet.id) > tuple_(*after))
     result = await session.execute(stmt)
 
-    return len(result.scalars().all())
+    return result.all()
+
+
+async def get_wallets_count(session: AsyncSession) -> int:
+    stmt = select(func.count()).select_from(Wallet)
+
+    return await session.scalar(stmt)
+
+
+async def estimate_wallets_count(session: AsyncSession) -> Optional[int]:
+    # Planner statistics, kept up to date by autovacuum/ANALYZE. Returns
+    # None for a table that has never been analyzed.
+    stmt = text(
+        "SELECT reltuples::bigint FROM pg_class "
+        "WHERE oid = CAST(:table_name AS regclass)"
+    )
+    estimate = await session.scalar(
+        stmt,
+        {"table_name": Wallet.__tablename__},
+    )
+    if estimate is None or estimate < 0:
+        return None
+
+    return estimate
 
 
 async def update_wallet_balance(
     session: AsyncSession,
     wallet_uuid: str,
-    amount: Decimal,
+    amount: Amount,
     operation_type: str,
+    idempotency_key: Optional[str] = None,
+    currency: Optional[str] = None,
 ) -> Optional[Wallet]:
-    wallet = await get_wallet_by_uuid(session, wallet_uuid)
-    if not wallet:
-        return None
-    
+    # The balance change, the ledger and outbox inserts and the existence
+    # check run as a single statement: the conditional UPDATE takes the row
+    # lock and re-checks the balance after waiting on concurrent writers, so
+    # withdrawals can never overdraw the wallet. An idempotency key is
+    # recorded by the same statement, so a duplicate key aborts it with an
+    # IntegrityError before anything is applied. The amount is scaled to the
+    # wallet's minor units inside the UPDATE, so the wallet's scale costs no
+    # extra lookup. It is bounds-checked as a NUMERIC first: an amount finer
+    # than that scale, or one that would overflow the BIGINT amount or
+    # balance, matches no row instead of aborting the statement.
+    #
+    # An explicit ``currency`` takes the locking path of the batch instead,
+    # which also covers balances the wallet does not hold yet. The result
+    # is then a Wallet carrying that currency's balance and scale.
+    if currency is not None:
+        return await _update_currency_balance(
+            session,
+            Operation(wallet_uuid, amount, operation_type, currency),
+            idempotency_key,
+        )
+
+    scaled = literal(amount.units, Numeric) * func.power(
+        cast(literal(10), Numeric),
+        Wallet.currency_scale - amount.exponent,
+    )
+    minor = cast(scaled, BigInteger)
+    conditions = [
+        Wallet.id == wallet_uuid,
+        Wallet.currency_scale >= amount.exponent,
+    ]
     if operation_type == "DEPOSIT":
-        wallet.balance += amount
+        new_balance = Wallet.balance + minor
+        conditions.append(Wallet.balance <= MAX_MINOR_UNITS - scaled)
     elif operation_type == "WITHDRAW":
-        if wallet.balance < amount:
-            raise ValueError("Insufficient funds")
-        wallet.balance -= amount
-    
-    transaction = Transaction(
-        type=operation_type,
-        amount=amount,
-    )
-    session.add(transaction)
-    
+        new_balance = Wallet.balance - minor
+        conditions.append(Wallet.balance >= scaled)
+    else:
+        raise ValueError(f"Unknown operation type: {operation_type}")
+
+    updated = (
+        update(Wallet)
+        .where(*conditions)
+        .values(balance=new_balance, updated_at=func.clock_timestamp())
+        .returning(
+            Wallet.id,
+            Wallet.balance,
+            Wallet.currency,
+            Wallet.currency_scale,
+            Wallet.created_at,
+            Wallet.updated_at,
+            minor.label("amount"),
+        )
+        .cte("updated_wallet")
+    )
+    transaction_id = uuid.uuid4()
+    ledger = (
+        insert(Transaction)
+        .from_select(
+            ["id", "wallet_id", "type", "amount", "created_at"],
+            select(
+                literal(transaction_id),
+                updated.c.id,
+                literal(operation_type),
+                updated.c.amount,
+                func.now(),
+            ).select_from(updated),
+        )
+        .cte("ledger")
+    )
+    outbox = (
+        insert(OutboxEvent)
+        .from_select(
+            [
+                "wallet_id",
+                "transaction_id",
+                "type",
+                "amount",
+                "balance",
+                "currency",
+                "currency_scale",
+            ],
+            select(
+                updated.c.id,
+                literal(transaction_id),
+                literal(operation_type),
+                updated.c.amount,
+                updated.c.balance,
+                updated.c.currency,
+                updated.c.currency_scale,
+            ).select_from(updated),
+        )
+        .cte("outbox")
+    )
+    updated_wallet = aliased(Wallet, updated)
+    anchor = select(literal(1).label("anchor")).subquery("anchor")
+    ctes = [ledger, outbox]
+    if idempotency_key is not None:
+        ctes.append(
+            insert(IdempotencyKey)
+            .from_select(
+                [
+                    "key",
+                    "wallet_id",
+                    "operation_type",
+                    "amount",
+                    "new_balance",
+                    "currency",
+                    "currency_scale",
+                    "created_at",
+                    "expires_at",
+                ],
+                select(
+                    literal(idempotency_key),
+                    updated.c.id,
+                    literal(operation_type),
+                    updated.c.amount,
+                    updated.c.balance,
+                    updated.c.currency,
+                    updated.c.currency_scale,
+                    func.now(),
+                    func.now() + timedelta(seconds=settings.idempotency.ttl),
+                ).select_from(updated),
+            )
+            .cte("idempotency_key")
+        )
+
+    # The other balances are only read for the cache write-through. After
+    # waiting on the row lock they come from the statement's snapshot, so a
+    # concurrent change to another currency can be missing from the cached
+    # entry until the next write or the TTL, like any cross-worker entry.
+    stmt = (
+        select(
+            updated_wallet,
+            select(Wallet.currency_scale)
+            .where(Wallet.id == wallet_uuid)
+            .scalar_subquery()
+            .label("currency_scale"),
+            _other_balances(updated.c.id).label("balances"),
+        )
+        .select_from(anchor)
+        .outerjoin(updated_wallet, true())
+        .add_cte(*ctes)
+        .execution_options(populate_existing=True)
+    )
+    result = await session.execute(stmt)
+    wallet, currency_scale, balances = result.one()
+
+    if wallet is None:
+        await session.rollback()
+        if currency_scale is None:
+            return None
+        amount.to_minor(currency_scale)
+        if operation_type == "DEPOSIT":
+            raise ValueError(BALANCE_TOO_LARGE)
+        raise ValueError("Insufficient funds")
+
     await session.commit()
-    await session.refresh(wallet)
-    
+    await wallet_cache.store(
+        wallet.id,
+        wallet.balance,
+        wallet.created_at,
+        wallet.updated_at,
+        wallet.currency_scale,
+        wallet.currency,
+        balances or (),
+    )
+
     return wallet
+
+
+async def _update_currency_balance(
+    session: AsyncSession,
+    operation: Operation,
+    idempotency_key: Optional[str],
+) -> Optional[Wallet]:
+    if operation.operation_type not in ("DEPOSIT", "WITHDRAW"):
+        raise ValueError(f"Unknown operation type: {operation.operation_type}")
+
+    result, = await _apply_operations(
+        session,
+        [operation],
+        idempotency_key=idempotency_key,
+    )
+    if result.status == WALLET_NOT_FOUND:
+        return None
+    if result.status != OPERATION_APPLIED:
+        raise ValueError(result.status)
+
+    return Wallet(
+        id=uuid.UUID(str(operation.wallet_uuid)),
+        balance=result.balance,
+        currency=result.currency,
+        currency_scale=result.currency_scale,
+    )
+
+
+async def apply_operations_batch(
+    session: AsyncSession,
+    operations: Sequence[Tuple],
+    atomic: bool = False,
+    record: Optional[Callable[[List[OperationResult]], UpdateBase]] = None,
+) -> List[OperationResult]:
+    # Applies (wallet_uuid, amount, operation_type[, currency]) items in
+    # order with set-based SQL: one SELECT ... FOR UPDATE over every wallet
+    # involved (locked in id order, so concurrent batches cannot deadlock),
+    # one read of the other-currency balances involved, and one UPDATE ...
+    # FROM (VALUES ...) carrying the balance upsert and the ledger insert.
+    # With ``atomic`` a single failed item rolls back the whole batch.
+    #
+    # ``record`` builds a statement from the results that commits in the
+    # same transaction as the balances, e.g. to mark the items done; when
+    # nothing is applied it is executed and committed on its own.
+    return await _apply_operations(session, operations, atomic, record=record)
+
+
+async def _apply_operations(
+    session: AsyncSession,
+    operations: Sequence[Tuple],
+    atomic: bool = False,
+    idempotency_key: Optional[str] = None,
+    record: Optional[Callable[[List[OperationResult]], UpdateBase]] = None,
+) -> List[OperationResult]:
+    operations = [Operation(*item) for item in operations]
+    for operation in operations:
+        if operation.operation_type not in ("DEPOSIT", "WITHDRAW"):
+            raise ValueError(f"Unknown operation type: {operation.operation_type}")
+
+    wallet_ids = [uuid.UUID(str(operation.wallet_uuid)) for operation in operations]
+    wallets = await _lock_wallets(session, set(wallet_ids))
+    slots = await _load_balances(
+        session,
+        wallets,
+        {
+            (wallet_id, operation.currency)
+            for wallet_id, operation in zip(wallet_ids, operations)
+            if operation.currency is not None
+        },
+    )
+
+    results: List[OperationResult] = []
+    changed = set()
+    entries = []
+    for wallet_id, operation in zip(wallet_ids, operations):
+        if wallet_id not in wallets:
+            results.append(OperationResult(WALLET_NOT_FOUND))
+            continue
+
+        currency = operation.currency or wallets[wallet_id].currency
+        balance, currency_scale = slots[(wallet_id, currency)]
+        try:
+            minor = operation.amount.to_minor(currency_scale)
+        except ValueError as e:
+            results.append(OperationResult(str(e)))
+            continue
+
+        if operation.operation_type == "DEPOSIT":
+            if balance > MAX_MINOR_UNITS - minor:
+                results.append(OperationResult(BALANCE_TOO_LARGE))
+                continue
+            balance += minor
+        elif balance < minor:
+            results.append(OperationResult(INSUFFICIENT_FUNDS))
+            continue
+        else:
+            balance -= minor
+
+        slots[(wallet_id, currency)] = (balance, currency_scale)
+        changed.add((wallet_id, currency))
+        results.append(
+            OperationResult(OPERATION_APPLIED, balance, currency_scale, currency)
+        )
+        entries.append(
+            _LedgerEntry(
+                wallet_id,
+                operation.operation_type,
+                minor,
+                balance,
+                currency_scale,
+                currency,
+            )
+        )
+
+    failed = len(entries) < len(results)
+    if not entries or (atomic and failed):
+        results = [
+            OperationResult(OPERATION_ROLLED_BACK)
+            if result.status == OPERATION_APPLIED
+            else result
+            for result in results
+        ]
+        if record is None:
+            await session.rollback()
+        else:
+            await session.execute(record(results))
+            await session.commit()
+        return results
+
+    await _write_balances(
+        session,
+        wallets,
+        {slot: slots[slot] for slot in changed},
+        entries,
+        idempotency_key,
+        record(results) if record is not None else None,
+    )
+
+    return results
+
+
+async def transfer_between_wallets(
+    session: AsyncSession,
+    from_wallet_uuid: str,
+    to_wallet_uuid: str,
+    amount: Amount,
+    currency: Optional[str] = None,
+) -> Optional[TransferResult]:
+    # Both rows are locked by one SELECT ... FOR UPDATE in id order, so two
+    # transfers in opposite directions queue up instead of deadlocking.
+    # Without ``currency`` the sender's own currency moves; the receiver is
+    # credited in that currency whether or not it is its own. Returns the
+    # new balances in minor units, or None if a wallet is missing.
+    from_id = uuid.UUID(str(from_wallet_uuid))
+    to_id = uuid.UUID(str(to_wallet_uuid))
+    if from_id == to_id:
+        raise ValueError("Cannot transfer to the same wallet")
+
+    wallets = await _lock_wallets(session, {from_id, to_id})
+    if len(wallets) < 2:
+        await session.rollback()
+        return None
+
+    currency = currency or wallets[from_id].currency
+    slots = await _load_balances(
+        session,
+        wallets,
+        {(from_id, currency), (to_id, currency)},
+    )
+    from_balance, currency_scale = slots[(from_id, currency)]
+    to_balance, to_scale = slots[(to_id, currency)]
+    if to_scale != currency_scale:
+        await session.rollback()
+        raise ValueError(SCALE_MISMATCH)
+
+    try:
+        minor = amount.to_minor(currency_scale)
+    except ValueError:
+        await session.rollback()
+        raise
+
+    if from_balance < minor:
+        await session.rollback()
+        raise ValueError("Insufficient funds")
+    if to_balance > MAX_MINOR_UNITS - minor:
+        await session.rollback()
+        raise ValueError(BALANCE_TOO_LARGE)
+
+    from_balance -= minor
+    to_balance += minor
+
+    await _write_balances(
+        session,
+        wallets,
+        {
+            (from_id, currency): (from_balance, currency_scale),
+            (to_id, currency): (to_balance, currency_scale),
+        },
+        [
+            _LedgerEntry(
+                from_id,
+                "TRANSFER_OUT",
+                minor,
+                from_balance,
+                currency_scale,
+                currency,
+            ),
+            _LedgerEntry(
+                to_id,
+                "TRANSFER_IN",
+                minor,
+                to_balance,
+                currency_scale,
+                currency,
+            ),
+        ],
+    )
+
+    return TransferResult(from_balance, to_balance, currency_scale, currency)
+
+
+async def _lock_wallets(
+    session: AsyncSession,
+    wallet_ids: Set[uuid.UUID],
+) -> Dict[uuid.UUID, _LockedWallet]:
+    stmt = (
+        select(
+            Wallet.id,
+            Wallet.balance,
+            Wallet.currency_scale,
+            Wallet.currency,
+        )
+        .where(Wallet.id == any_(literal(sorted(wallet_ids), ARRAY(UUID))))
+        .order_by(Wallet.id)
+        .with_for_update()
+    )
+
+    return {
+        wallet_id: _LockedWallet(*locked)
+        for wallet_id, *locked in await session.execute(stmt)
+    }
+
+
+async def _load_balances(
+    session: AsyncSession,
+    wallets: Dict[uuid.UUID, _LockedWallet],
+    pairs: Set[Tuple[uuid.UUID, str]],
+) -> Dict[Tuple[uuid.UUID, str], Tuple[int, int]]:
+    # (balance, currency_scale) per (wallet, currency): the wallet's own
+    # currency from the locked rows, any other from wallet_balances. Every
+    # writer of a wallet's balances holds its wallet row lock, so this read
+    # cannot go stale. A currency the wallet never held starts at zero, at
+    # the scale configured for it.
+    slots = {
+        (wallet_id, wallet.currency): (wallet.balance, wallet.currency_scale)
+        for wallet_id, wallet in wallets.items()
+    }
+    others = sorted(
+        pair
+        for pair in pairs
+        if pair[0] in wallets and pair not in slots
+    )
+    if not others:
+        return slots
+
+    result = await session.execute(
+        select(
+            WalletBalance.wallet_id,
+            WalletBalance.currency,
+            WalletBalance.balance,
+            WalletBalance.currency_scale,
+        ).where(tuple_(WalletBalance.wallet_id, WalletBalance.currency).in_(others))
+    )
+    for wallet_id, currency, balance, currency_scale in result:
+        slots[(wallet_id, currency)] = (balance, currency_scale)
+    for wallet_id, currency in others:
+        slots.setdefault(
+            (wallet_id, currency),
+            (0, settings.money.scale_for(currency)),
+        )
+
+    return slots
+
+
+async def _write_balances(
+    session: AsyncSession,
+    wallets: Dict[uuid.UUID, _LockedWallet],
+    balances: Dict[Tuple[uuid.UUID, str], Tuple[int, int]],
+    entries: List[_LedgerEntry],
+    idempotency_key: Optional[str] = None,
+    record: Optional[UpdateBase] = None,
+) -> None:
+    # ``balances`` maps each changed (wallet, currency) to its new (balance,
+    # scale) and ``entries`` lists the applied operations in order, all in
+    # minor units. The other-currency upsert and the ledger, outbox and
+    # idempotency inserts ride along as data-modifying CTEs of the wallet
+    # UPDATE, so the whole write is one round trip plus the commit. Wallets
+    # whose own balance did not change still get a new updated_at, which
+    # versions their cache entry. Ledger rows in the wallet's own currency
+    # keep a NULL currency. ``record`` is one more statement to ride along.
+    own_balances: Dict[uuid.UUID, Optional[int]] = {}
+    other_balances = []
+    for (wallet_id, currency), (balance, currency_scale) in sorted(balances.items()):
+        if currency == wallets[wallet_id].currency:
+            own_balances[wallet_id] = balance
+        else:
+            own_balances.setdefault(wallet_id, None)
+            other_balances.append(
+                {
+                    "wallet_id": wallet_id,
+                    "currency": currency,
+                    "balance": balance,
+                    "currency_scale": currency_scale,
+                }
+            )
+
+    new_balances = unnest_rows(
+        "new_balances",
+        [column("id", UUID), column("balance", BigInteger)],
+        sorted(own_balances.items()),
+    )
+    ledger_entries = unnest_rows(
+        "ledger_entries",
+        [
+            column("transaction_id", UUID),
+            column("wallet_id", UUID),
+            column("type", String),
+            column("amount", BigInteger),
+            column("balance", BigInteger),
+            column("currency_scale", SmallInteger),
+            column("currency", String),
+            column("ledger_currency", String),
+        ],
+        [
+            (
+                uuid.uuid4(),
+                *entry,
+                (
+                    None
+                    if entry.currency == wallets[entry.wallet_id].currency
+                    else entry.currency
+                ),
+            )
+            for entry in entries
+        ],
+    )
+    ctes = [
+        insert(Transaction)
+        .from_select(
+            ["id", "wallet_id", "type", "amount", "currency", "created_at"],
+            select(
+                ledger_entries.c.transaction_id,
+                ledger_entries.c.wallet_id,
+                ledger_entries.c.type,
+                ledger_entries.c.amount,
+                ledger_entries.c.ledger_currency,
+                func.now(),
+            ),
+        )
+        .cte("ledger"),
+        insert(OutboxEvent)
+        .from_select(
+            [
+                "wallet_id",
+                "transaction_id",
+                "type",
+                "amount",
+                "balance",
+                "currency",
+                "currency_scale",
+            ],
+            select(
+                ledger_entries.c.wallet_id,
+                ledger_entries.c.transaction_id,
+                ledger_entries.c.type,
+                ledger_entries.c.amount,
+                ledger_entries.c.balance,
+                ledger_entries.c.currency,
+                ledger_entries.c.currency_scale,
+            ),
+        )
+        .cte("outbox"),
+    ]
+    if other_balances:
+        upserted = unnest_rows(
+            "upserted_balances",
+            [
+                column("wallet_id", UUID),
+                column("currency", String),
+                column("balance", BigInteger),
+                column("currency_scale", SmallInteger),
+            ],
+            [
+                (row["wallet_id"], row["currency"], row["balance"], row["currency_scale"])
+                for row in other_balances
+            ],
+        )
+        upsert = pg_insert(WalletBalance).from_select(
+            ["wallet_id", "currency", "balance", "currency_scale"],
+            select(upserted),
+        )
+        ctes.append(
+            upsert.on_conflict_do_update(
+                index_elements=[WalletBalance.wallet_id, WalletBalance.currency],
+                set_={"balance": upsert.excluded.balance},
+            )
+            .cte("other_balances")
+        )
+    if idempotency_key is not None:
+        entry = entries[0]
+        ctes.append(
+            insert(IdempotencyKey)
+            .values(
+                key=idempotency_key,
+                wallet_id=entry.wallet_id,
+                operation_type=entry.type,
+                amount=entry.amount,
+                new_balance=entry.balance,
+                currency=entry.currency,
+                currency_scale=entry.currency_scale,
+                created_at=func.now(),
+                expires_at=func.now() + timedelta(seconds=settings.idempotency.ttl),
+            )
+            .cte("idempotency_key")
+        )
+    if record is not None:
+        ctes.append(record.cte("recorded"))
+
+    # The locks were taken by an earlier statement, so the other balances
+    # read here are current; the changes above are laid over them.
+    updated_wallets = (
+        await session.execute(
+            update(Wallet)
+            .where(Wallet.id == new_balances.c.id)
+            .values(
+                balance=func.coalesce(new_balances.c.balance, Wallet.balance),
+                updated_at=func.clock_timestamp(),
+            )
+            .returning(
+                Wallet.id,
+                Wallet.balance,
+                Wallet.created_at,
+                Wallet.updated_at,
+                Wallet.currency_scale,
+                Wallet.currency,
+                _other_balances(Wallet.id),
+            )
+            .add_cte(*ctes)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    await session.commit()
+    for *wallet_row, cached_balances in updated_wallets:
+        wallet_id = wallet_row[0]
+        others = {
+            currency: (balance, currency_scale)
+            for currency, balance, currency_scale in cached_balances or ()
+        }
+        for row in other_balances:
+            if row["wallet_id"] == wallet_id:
+                others[row["currency"]] = (row["balance"], row["currency_scale"])
+        await wallet_cache.store(
+            *wallet_row,
+            [
+                (currency, balance, currency_scale)
+                for currency, (balance, currency_scale) in sorted(others.items())
+            ],
+        )
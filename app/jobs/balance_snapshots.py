@@ -0,0 +1,31 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from app.db.repository.snapshot_repository import refresh_balance_snapshots
+
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_balance_snapshots_periodically(
+    session_factory: async_sessionmaker[AsyncSession],
+    interval: float,
+    settlement_lag: float,
+) -> None:
+    # Every worker runs this loop; the checkpoint row lock lets only one of
+    # them close days at a time. The first run backfills from the oldest
+    # wallet onwards.
+    while True:
+        try:
+            async with session_factory() as session:
+                days = await refresh_balance_snapshots(session, settlement_lag)
+            if days:
+                logger.info("Closed %d day(s) of wallet balance snapshots", days)
+        except Exception:
+            logger.exception("Failed to refresh wallet balance snapshots")
+        await asyncio.sleep(interval)
@@ -0,0 +1,27 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from app.db.repository.idempotency_repository import purge_expired_idempotency_keys
+
+
+logger = logging.getLogger(__name__)
+
+
+async def purge_idempotency_keys_periodically(
+    session_factory: async_sessionmaker[AsyncSession],
+    interval: float,
+    batch_size: int = 10_000,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                while await purge_expired_idempotency_keys(session, batch_size) >= batch_size:
+                    pass
+        except Exception:
+            logger.exception("Failed to purge expired idempotency keys")
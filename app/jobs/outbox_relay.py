@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from app.db.repository.outbox_repository import (
+    publish_outbox_batch,
+    purge_published_outbox_events,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+async def relay_outbox_periodically(
+    session_factory: async_sessionmaker[AsyncSession],
+    channel: str,
+    interval: float,
+    batch_size: int = 500,
+) -> None:
+    # Drains the outbox in batches while it has a backlog and only sleeps
+    # once a batch comes back short.
+    while True:
+        try:
+            async with session_factory() as session:
+                while await publish_outbox_batch(session, channel, batch_size) >= batch_size:
+                    pass
+        except Exception:
+            logger.exception("Failed to relay outbox events")
+        await asyncio.sleep(interval)
+
+
+async def purge_outbox_periodically(
+    session_factory: async_sessionmaker[AsyncSession],
+    retention: float,
+    interval: float,
+    batch_size: int = 10_000,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                while await purge_published_outbox_events(session, retention, batch_size) >= batch_size:
+                    pass
+        except Exception:
+            logger.exception("Failed to purge published outbox events")
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import logging
+
+from typing import (
+    List,
+    Optional,
+)
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.partitions import (
+    create_transaction_partitions,
+    detach_transaction_partitions,
+)
+from app.db.repository.reconciliation_repository import carry_forward_partition
+
+
+logger = logging.getLogger(__name__)
+
+
+async def create_partitions_periodically(
+    engine: AsyncEngine,
+    interval: float,
+    months_ahead: int,
+    hash_partitions: int,
+) -> None:
+    # Run by every app worker, so the ledger never runs out of partitions
+    # when the maintenance job is not scheduled. Detaching old partitions
+    # is left to the job.
+    while True:
+        try:
+            async with engine.connect() as conn:
+                created = await create_transaction_partitions(
+                    conn,
+                    months_ahead=months_ahead,
+                    hash_partitions=hash_partitions,
+                )
+            if created:
+                logger.info("Created partitions: %s", ", ".join(created))
+        except Exception:
+            logger.exception("Failed to create ledger partitions")
+        await asyncio.sleep(interval)
+
+
+async def maintain_partitions(
+    url: str,
+    months_ahead: int,
+    hash_partitions: int,
+    retention_months: Optional[int],
+    archive_schema: Optional[str],
+) -> None:
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            created = await create_transaction_partitions(
+                conn,
+                months_ahead=months_ahead,
+                hash_partitions=hash_partitions,
+            )
+            logger.info("Created partitions: %s", ", ".join(created) or "none")
+
+        if retention_months is not None:
+            async with engine.connect() as conn:
+                detached = await detach_transaction_partitions(
+                    conn,
+                    retention_months=retention_months,
+                    archive_schema=archive_schema,
+                    before_detach=carry_forward_partition,
+                )
+                logger.info("Detached partitions: %s", ", ".join(detached) or "none")
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    config = settings.partitions
+    parser = argparse.ArgumentParser(
+        description="Create upcoming monthly ledger partitions and detach expired ones",
+    )
+    parser.add_argument("--months-ahead", type=int, default=config.months_ahead)
+    parser.add_argument("--hash-partitions", type=int, default=config.hash_partitions)
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=config.retention_months,
+        help="detach partitions that ended more than this many months ago",
+    )
+    parser.add_argument("--archive-schema", default=config.archive_schema)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(
+        maintain_partitions(
+            settings.db.url,
+            months_ahead=args.months_ahead,
+            hash_partitions=args.hash_partitions,
+            retention_months=args.retention_months,
+            archive_schema=args.archive_schema or None,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
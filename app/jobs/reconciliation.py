@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import logging
+import sys
+
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from typing import (
+    List,
+    NamedTuple,
+    Optional,
+)
+
+import uuid
+
+import orjson
+
+from sqlalchemy import (
+    select,
+    func,
+)
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    async_sessionmaker,
+)
+
+from app.core.config import settings
+from app.db.repository.checkpoint_repository import (
+    get_checkpoint,
+    save_checkpoint,
+)
+from app.db.repository.reconciliation_repository import (
+    BalanceDrift,
+    find_balance_drift,
+    iter_wallet_id_chunks,
+)
+from app.utils.money import format_minor
+
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_JOB = "wallet_reconciliation"
+
+
+class ReconciliationReport(NamedTuple):
+    checked: int
+    drifts: List[BalanceDrift]
+    since: Optional[datetime]
+    until: datetime
+
+
+async def reconcile_balances(
+    url: str,
+    chunk_size: int = 5000,
+    concurrency: int = 4,
+    incremental: bool = False,
+    overlap: float = 300.0,
+) -> ReconciliationReport:
+    # One connection walks wallet ids in keyset chunks and ``concurrency``
+    # connections check the chunks in parallel. The bounded queue keeps the
+    # walk at most two chunks per checker ahead. An incremental run only
+    # checks wallets updated since the previous run, less ``overlap``
+    # seconds: updated_at is stamped before the write commits, so a write
+    # committed after the previous run read its position can be stamped
+    # before it. Drift introduced by writing the ledger alone is only found
+    # by a full run.
+    engine = create_async_engine(url, pool_size=concurrency + 1, max_overflow=0)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    chunks: "asyncio.Queue[Optional[List[uuid.UUID]]]" = asyncio.Queue(maxsize=concurrency * 2)
+    drifts: List[BalanceDrift] = []
+    checked = 0
+
+    async def walk(since: Optional[datetime], until: datetime) -> None:
+        async with session_factory() as session:
+            async for wallet_ids in iter_wallet_id_chunks(session, chunk_size, until, since):
+                await chunks.put(wallet_ids)
+        for _ in range(concurrency):
+            await chunks.put(None)
+
+    async def check() -> None:
+        nonlocal checked
+        async with session_factory() as session:
+            while (wallet_ids := await chunks.get()) is not None:
+                drifts.extend(await find_balance_drift(session, wallet_ids))
+                checked += len(wallet_ids)
+
+    try:
+        async with session_factory() as session:
+            until = await session.scalar(select(func.now()))
+            since = await get_checkpoint(session, RECONCILIATION_JOB) if incremental else None
+            await session.commit()
+        if since is not None:
+            since -= timedelta(seconds=overlap)
+
+        async with asyncio.TaskGroup() as tasks:
+            tasks.create_task(walk(since, until))
+            for _ in range(concurrency):
+                tasks.create_task(check())
+
+        async with session_factory() as session:
+            await save_checkpoint(session, RECONCILIATION_JOB, until)
+    finally:
+        await engine.dispose()
+
+    drifts.sort(key=lambda drift: drift.wallet_id)
+
+    return ReconciliationReport(checked, drifts, since, until)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    config = settings.reconciliation
+    parser = argparse.ArgumentParser(
+        description="Verify wallet balances against the signed sum of their ledger",
+    )
+    parser.add_argument("--chunk-size", type=int, default=config.chunk_size)
+    parser.add_argument("--concurrency", type=int, default=config.concurrency)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only check wallets updated since the previous run",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=config.overlap,
+        help="seconds an incremental run looks back behind the previous one",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(
+        reconcile_balances(
+            settings.db.url,
+            chunk_size=args.chunk_size,
+            concurrency=args.concurrency,
+            incremental=args.incremental,
+            overlap=args.overlap,
+        )
+    )
+
+    for drift in report.drifts:
+        sys.stdout.buffer.write(
+            orjson.dumps(
+                {
+                    "wallet_id": str(drift.wallet_id),
+                    "currency": drift.currency,
+                    "balance": format_minor(drift.balance, drift.currency_scale),
+                    "ledger_balance": format_minor(
+                        drift.ledger_balance,
+                        drift.currency_scale,
+                    ),
+                    "difference": format_minor(
+                        drift.difference,
+                        drift.currency_scale,
+                    ),
+                },
+                option=orjson.OPT_APPEND_NEWLINE,
+            )
+        )
+    logger.info(
+        "Checked %d wallet(s) updated up to %s%s: %d with drift",
+        report.checked,
+        report.until,
+        f" since {report.since}" if report.since else "",
+        len(report.drifts),
+    )
+
+    return 1 if report.drifts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import logging
+
+from typing import (
+    List,
+    Optional,
+)
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.config import settings
+from app.db.repository.scheduled_operation_repository import run_due_operations
+
+
+logger = logging.getLogger(__name__)
+
+
+async def run_scheduled_operations_periodically(
+    session_factory: async_sessionmaker[AsyncSession],
+    interval: float,
+    batch_size: int = 100,
+) -> None:
+    # Works through due operations in batches while there is a backlog and
+    # only sleeps once a batch comes back short. SKIP LOCKED lets any
+    # number of these loops, in any number of processes, share the work.
+    while True:
+        try:
+            async with session_factory() as session:
+                while await run_due_operations(session, batch_size) >= batch_size:
+                    pass
+        except Exception:
+            logger.exception("Failed to run scheduled operations")
+        await asyncio.sleep(interval)
+
+
+async def run_scheduler(
+    url: str,
+    concurrency: int,
+    interval: float,
+    batch_size: int,
+) -> None:
+    engine = create_async_engine(url, pool_size=concurrency, max_overflow=0)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    try:
+        async with asyncio.TaskGroup() as tasks:
+            for _ in range(concurrency):
+                tasks.create_task(
+                    run_scheduled_operations_periodically(
+                        session_factory,
+                        interval,
+                        batch_size,
+                    )
+                )
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    config = settings.scheduler
+    parser = argparse.ArgumentParser(
+        description="Apply due scheduled wallet operations until interrupted",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.concurrency,
+        help="batches applied side by side, one connection each",
+    )
+    parser.add_argument("--poll-interval", type=float, default=config.poll_interval)
+    parser.add_argument("--batch-size", type=int, default=config.batch_size)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(
+        run_scheduler(
+            settings.db.url,
+            concurrency=args.concurrency,
+            interval=args.poll_interval,
+            batch_size=args.batch_size,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
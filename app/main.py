@@ -1,25 +1,106 @@
+import asyncio
+
 import uvicorn
 
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
-from contextlib import asynccontextmanager
+from contextlib import (
+    asynccontextmanager,
+    suppress,
+)
 
+from app.core.metrics import MetricsMiddleware
+from app.core.rate_limit import (
+    MemoryRateLimiter,
+    RateLimitMiddleware,
+    RedisRateLimiter,
+)
 from app.db.db_helper import db_helper
+from app.db.repository.wallet_cache import wallet_cache
+from app.db.repository.wallet_events import wallet_event_hub
+from app.jobs.idempotency_purge import purge_idempotency_keys_periodically
+from app.jobs.outbox_relay import (
+    purge_outbox_periodically,
+    relay_outbox_periodically,
+)
+from app.jobs.balance_snapshots import refresh_balance_snapshots_periodically
+from app.jobs.partition_maintenance import create_partitions_periodically
+from app.jobs.scheduled_operations import run_scheduled_operations_periodically
 from app.core.config import settings
 from app.api.api_v1.routers.wallet import router as wallet_router
+from app.api.api_v1.routers.metrics import router as metrics_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.db.pool_warmup:
+        await db_helper.warm_up()
+    
+    tasks = [
+        asyncio.create_task(
+            purge_idempotency_keys_periodically(
+                db_helper.session_factory,
+                settings.idempotency.purge_interval,
+            )
+        ),
+        asyncio.create_task(
+            relay_outbox_periodically(
+                db_helper.session_factory,
+                settings.outbox.channel,
+                settings.outbox.poll_interval,
+                settings.outbox.batch_size,
+            )
+        ),
+        asyncio.create_task(
+            purge_outbox_periodically(
+                db_helper.session_factory,
+                settings.outbox.retention,
+                settings.outbox.purge_interval,
+            )
+        ),
+        asyncio.create_task(wallet_event_hub.run()),
+        asyncio.create_task(
+            refresh_balance_snapshots_periodically(
+                db_helper.session_factory,
+                settings.snapshots.refresh_interval,
+                settings.snapshots.settlement_lag,
+            )
+        ),
+        asyncio.create_task(
+            create_partitions_periodically(
+                db_helper.engine,
+                settings.partitions.create_interval,
+                settings.partitions.months_ahead,
+                settings.partitions.hash_partitions,
+            )
+        ),
+    ]
+    if settings.scheduler.enabled:
+        tasks.append(
+            asyncio.create_task(
+                run_scheduled_operations_periodically(
+                    db_helper.session_factory,
+                    settings.scheduler.poll_interval,
+                    settings.scheduler.batch_size,
+                )
+            )
+        )
+    
     yield
     
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await wallet_cache.close()
     await db_helper.dispose()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
-        debug=True,
+        debug=settings.run.debug,
         docs_url="/api/docs",
         default_response_class=ORJSONResponse,
         lifespan=lifespan,
@@ -27,13 +108,55 @@ def create_app() -> FastAPI:
     
     app.include_router(wallet_router)
     
+    rate_limit = settings.rate_limit
+    if rate_limit.enabled:
+        if rate_limit.redis_url:
+            limiter = RedisRateLimiter(rate_limit.redis_url)
+        else:
+            limiter = MemoryRateLimiter(rate_limit.max_keys)
+        app.add_middleware(
+            RateLimitMiddleware,
+            limiter=limiter,
+            prefix=settings.api.prefix,
+            client_rate=rate_limit.client_rate,
+            client_burst=rate_limit.client_burst,
+            wallet_rate=rate_limit.wallet_rate,
+            wallet_burst=rate_limit.wallet_burst,
+            client_header=rate_limit.client_header,
+            trusted_proxies=rate_limit.trusted_proxies,
+        )
+    
+    # Added last, so it is the outermost and also times rejected requests.
+    if settings.metrics.enabled:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+    
     return app
 
 
-if __name__ == "__main__":
+def run() -> None:
+    # Production: one process per core, uvloop + httptools. On SIGTERM each
+    # worker stops accepting connections, lets in-flight requests finish for
+    # up to timeout_graceful_shutdown seconds, then runs the lifespan
+    # shutdown that closes its pool.
+    run_config = settings.run
+    production = run_config.mode == "production"
+    
     uvicorn.run(
-        factory=create_app,
-        host=settings.run.host,
-        port=settings.run.port,
-        reload=True,
+        "app.main:create_app",
+        factory=True,
+        host=run_config.host,
+        port=run_config.port,
+        reload=not production,
+        workers=run_config.worker_count if production else None,
+        loop=run_config.loop if production else "auto",
+        http=run_config.http if production else "auto",
+        access_log=run_config.access_log,
+        backlog=run_config.backlog,
+        timeout_keep_alive=run_config.timeout_keep_alive,
+        timeout_graceful_shutdown=run_config.timeout_graceful_shutdown,
     )
+
+
+if __name__ == "__main__":
+    run()
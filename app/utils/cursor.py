@@ -0,0 +1,28 @@
+import base64
+import binascii
+
+from typing import (
+    Any,
+    List,
+)
+
+import orjson
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = orjson.dumps(values, default=str)
+
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+
+    return values
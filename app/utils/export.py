@@ -0,0 +1,72 @@
+import csv
+import io
+import zlib
+
+from typing import (
+    AsyncIterator,
+    Sequence,
+)
+
+import orjson
+
+from sqlalchemy import Row
+
+
+EXPORT_COLUMNS = (
+    "transaction_id",
+    "wallet_id",
+    "operation_type",
+    "amount",
+    "currency",
+    "created_at",
+)
+
+
+def rows_to_ndjson(rows: Sequence[Row]) -> bytes:
+    return b"".join(
+        orjson.dumps(
+            row._asdict(),
+            default=str,
+            option=orjson.OPT_APPEND_NEWLINE,
+        )
+        for row in rows
+    )
+
+
+def rows_to_csv(rows: Sequence[Row]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (
+            transaction_id,
+            wallet_id or "",
+            operation_type,
+            amount,
+            currency or "",
+            created_at.isoformat(),
+        )
+        for (
+            transaction_id,
+            wallet_id,
+            operation_type,
+            amount,
+            currency,
+            created_at,
+        ) in rows
+    )
+
+    return buffer.getvalue().encode()
+
+
+def csv_header() -> bytes:
+    return (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
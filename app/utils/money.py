@@ -0,0 +1,53 @@
+import re
+
+from typing import NamedTuple
+
+
+AMOUNT_PATTERN = r"^\d+(\.\d+)?$"
+CURRENCY_PATTERN = r"^[A-Z]{3}$"
+MAX_MINOR_UNITS = 2**63 - 1
+MAX_CURRENCY_SCALE = 8
+
+_AMOUNT = re.compile(AMOUNT_PATTERN)
+
+
+# An exact non-negative decimal as an integer and a power-of-ten exponent:
+# "12.50" parses to Amount(125, 1). Only integer arithmetic is involved, so
+# a request amount becomes minor units without ever building a Decimal.
+class Amount(NamedTuple):
+    units: int
+    exponent: int
+
+    def to_minor(self, scale: int) -> int:
+        if self.exponent > scale:
+            raise ValueError(
+                "Amount has more decimal places than the wallet supports"
+            )
+        minor = self.units * 10 ** (scale - self.exponent)
+        if minor > MAX_MINOR_UNITS:
+            raise ValueError("Amount is too large")
+
+        return minor
+
+    def __str__(self) -> str:
+        return format_minor(self.units, self.exponent)
+
+
+def parse_amount(value: str) -> Amount:
+    if not _AMOUNT.match(value):
+        raise ValueError(f"Invalid amount: {value!r}")
+
+    whole, _, fraction = value.partition(".")
+    fraction = fraction.rstrip("0")
+
+    return Amount(int(whole + fraction), len(fraction))
+
+
+def format_minor(minor: int, scale: int) -> str:
+    sign = "-" if minor < 0 else ""
+    if not scale:
+        return f"{sign}{abs(minor)}"
+
+    whole, fraction = divmod(abs(minor), 10**scale)
+
+    return f"{sign}{whole}.{fraction:0{scale}d}"
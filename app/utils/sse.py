@@ -0,0 +1,19 @@
+from typing import Optional
+
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def sse_event(
+    data: str,
+    event: Optional[str] = None,
+    event_id: Optional[str] = None,
+) -> bytes:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+
+    return ("\n".join(lines) + "\n\n").encode()
@@ -0,0 +1,182 @@
+import argparse
+
+import asyncio
+
+import json
+
+import statistics
+
+import sys
+
+import time
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+from httpx import (
+    AsyncClient,
+    ASGITransport,
+)
+
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    async_sessionmaker,
+)
+
+from app.main import create_app
+from app.db.db_helper import db_helper
+from app.core.config import settings
+from benchmarks.wallet_api import (
+    git_commit,
+    percentile,
+    prepare_database,
+)
+
+
+MODES = {"model": False, "fast": True}
+
+
+async def ensure_wallets(client: AsyncClient, count: int) -> None:
+    response = await client.get(
+        "/api/wallets/get_wallets",
+        params={"limit": 1, "total": "exact"},
+    )
+    response.raise_for_status()
+    missing = count - response.json()["total"]
+    if missing > 0:
+        response = await client.post(
+            "/api/wallets/create_wallets",
+            params={"count": missing},
+        )
+        response.raise_for_status()
+
+
+async def measure(
+    client: AsyncClient,
+    params: Dict[str, Any],
+    requests: int,
+) -> Dict[str, List[float]]:
+    # Sequential requests, so process time is this request's CPU: the
+    # endpoint, the ORM and the driver, plus the in-process client, which
+    # costs the same in both modes.
+    samples: Dict[str, List[float]] = {"cpu": [], "wall": []}
+    for _ in range(requests):
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        response = await client.get("/api/wallets/get_wallets", params=params)
+        response.raise_for_status()
+        samples["wall"].append(time.perf_counter() - started)
+        samples["cpu"].append(time.process_time() - cpu_started)
+
+    return samples
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, float]:
+    wall = sorted(samples["wall"])
+
+    return {
+        "cpu_ms_per_request": round(statistics.fmean(samples["cpu"]) * 1000, 3),
+        "latency_ms_p50": round(percentile(wall, 50) * 1000, 3),
+        "latency_ms_p99": round(percentile(wall, 99) * 1000, 3),
+    }
+
+
+async def run_comparison(args: argparse.Namespace) -> Dict[str, Any]:
+    # Serves the same wallet list page with fast responses off ("model",
+    # the response_model path) and on ("fast"), in alternating rounds so
+    # that noise on the machine hits both modes alike.
+    engine = create_async_engine(args.database_url, pool_size=2, max_overflow=0)
+    await prepare_database(engine, args.reset)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_session():
+        async with session_factory() as session:
+            yield session
+
+    app = create_app()
+    app.dependency_overrides[db_helper.session_getter] = override_session
+    app.dependency_overrides[db_helper.read_session_getter] = override_session
+
+    params = {"limit": args.page_size, "total": "none"}
+    samples = {mode: {"cpu": [], "wall": []} for mode in MODES}
+    bodies = {}
+    fast_responses = settings.api.fast_responses
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            await ensure_wallets(client, args.page_size)
+            for mode, fast in MODES.items():
+                settings.api.fast_responses = fast
+                await measure(client, params, args.warmup)
+                response = await client.get("/api/wallets/get_wallets", params=params)
+                bodies[mode] = response.json()
+
+            for _ in range(args.rounds):
+                for mode, fast in MODES.items():
+                    settings.api.fast_responses = fast
+                    for key, values in (await measure(client, params, args.requests)).items():
+                        samples[mode][key].extend(values)
+    finally:
+        settings.api.fast_responses = fast_responses
+        await engine.dispose()
+
+    if bodies["model"] != bodies["fast"]:
+        raise RuntimeError("Fast and model responses differ")
+
+    results = {mode: summarize(samples[mode]) for mode in MODES}
+    for mode, result in results.items():
+        print(
+            f"{mode:<6} cpu {result['cpu_ms_per_request']:>8.3f} ms/request  "
+            f"p50 {result['latency_ms_p50']:>8.3f} ms  "
+            f"p99 {result['latency_ms_p99']:>8.3f} ms",
+            file=sys.stderr,
+        )
+
+    return {
+        "commit": git_commit(),
+        "config": {
+            "page_size": args.page_size,
+            "requests": args.requests * args.rounds,
+            "warmup": args.warmup,
+        },
+        "results": results,
+        "cpu_speedup": round(
+            results["model"]["cpu_ms_per_request"]
+            / results["fast"]["cpu_ms_per_request"],
+            2,
+        ),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="CPU per request of the wallet list with and without fast responses",
+    )
+    parser.add_argument("--database-url", default=settings.test_db_url)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    parser.add_argument("--output", default="bench_responses.json")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_comparison(args))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"cpu speedup x{report['cpu_speedup']}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
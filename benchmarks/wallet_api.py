@@ -0,0 +1,335 @@
+import argparse
+
+import asyncio
+
+import itertools
+
+import json
+
+import math
+
+import platform
+
+import subprocess
+
+import sys
+
+import time
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+
+from httpx import (
+    AsyncClient,
+    ASGITransport,
+    Response,
+)
+
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    async_sessionmaker,
+    AsyncEngine,
+)
+
+from app.main import create_app
+from app.core.metrics import (
+    InstrumentedQueuePool,
+    db_round_trips,
+    instrument_engine,
+)
+from app.db.db_helper import db_helper
+from app.db.models.base import Base
+from app.core.config import settings
+
+
+Scenario = Callable[[AsyncClient, int], Awaitable[Response]]
+
+SCENARIOS = ("create", "get", "list", "operation", "contended")
+
+
+def percentile(latencies: List[float], p: float) -> float:
+    # Nearest-rank percentile over an already sorted sample.
+    if not latencies:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(latencies)), 1)
+
+    return latencies[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(total / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p90": round(percentile(latencies, 90) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run_scenario(
+    client: AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    # A fixed number of workers pull request numbers from a shared counter,
+    # so the offered concurrency stays constant for the whole run.
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, i)
+            except Exception:
+                errors += 1
+                continue
+            elapsed = time.perf_counter() - started
+            if response.is_success:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def create_wallets(client: AsyncClient, count: int) -> List[str]:
+    wallet_ids = []
+    for _ in range(count):
+        response = await client.post("/api/wallets/create_wallet")
+        response.raise_for_status()
+        wallet_ids.append(response.json()["wallet_id"])
+
+    return wallet_ids
+
+
+async def build_scenarios(
+    client: AsyncClient,
+    wallets: int,
+) -> Dict[str, Scenario]:
+    wallet_ids = await create_wallets(client, wallets)
+    hot_wallet_id = wallet_ids[0]
+    deposit = {"operation_type": "DEPOSIT", "amount": "1.00"}
+
+    async def create(client: AsyncClient, i: int) -> Response:
+        return await client.post("/api/wallets/create_wallet")
+
+    async def get(client: AsyncClient, i: int) -> Response:
+        return await client.get(f"/api/wallets/{wallet_ids[i % len(wallet_ids)]}")
+
+    async def list_wallets(client: AsyncClient, i: int) -> Response:
+        return await client.get("/api/wallets/get_wallets", params={"limit": 100})
+
+    async def operation(client: AsyncClient, i: int) -> Response:
+        return await client.post(
+            f"/api/wallets/{wallet_ids[i % len(wallet_ids)]}/operation",
+            json=deposit,
+        )
+
+    async def contended(client: AsyncClient, i: int) -> Response:
+        return await client.post(
+            f"/api/wallets/{hot_wallet_id}/operation",
+            json=deposit,
+        )
+
+    return {
+        "create": create,
+        "get": get,
+        "list": list_wallets,
+        "operation": operation,
+        "contended": contended,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def prepare_database(engine: AsyncEngine, reset: bool) -> None:
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    engine = create_async_engine(
+        args.database_url,
+        pool_size=args.pool_size,
+        max_overflow=0,
+        poolclass=InstrumentedQueuePool,
+    )
+    instrument_engine(engine, "benchmark")
+    await prepare_database(engine, args.reset)
+    session_factory = async_sessionmaker(
+        bind=engine,
+        expire_on_commit=False,
+    )
+
+    async def override_session():
+        async with session_factory() as session:
+            yield session
+
+    app = create_app()
+    app.dependency_overrides[db_helper.session_getter] = override_session
+    app.dependency_overrides[db_helper.read_session_getter] = override_session
+
+    results: Dict[str, Any] = {}
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            scenarios = await build_scenarios(client, args.wallets)
+            for name in args.scenarios:
+                concurrency = (
+                    args.contended_concurrency
+                    if name == "contended"
+                    else args.concurrency
+                )
+                await run_scenario(client, scenarios[name], args.warmup, concurrency)
+                round_trips = db_round_trips.value("benchmark")
+                results[name] = await run_scenario(
+                    client,
+                    scenarios[name],
+                    args.requests,
+                    concurrency,
+                )
+                results[name]["concurrency"] = concurrency
+                results[name]["db_round_trips_per_request"] = round(
+                    (db_round_trips.value("benchmark") - round_trips) / args.requests,
+                    3,
+                )
+                print(format_result(name, results[name]), file=sys.stderr)
+    finally:
+        await engine.dispose()
+
+    return {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "contended_concurrency": args.contended_concurrency,
+            "wallets": args.wallets,
+            "pool_size": args.pool_size,
+            "cache_enabled": settings.cache.enabled,
+            "coalescing_enabled": settings.coalescing.enabled,
+            "fast_responses": settings.api.fast_responses,
+        },
+        "results": results,
+    }
+
+
+def format_result(name: str, result: Dict[str, Any]) -> str:
+    latency = result["latency_ms"]
+
+    return (
+        f"{name:<10} {result['throughput_rps']:>10.1f} req/s  "
+        f"p50 {latency['p50']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  "
+        f"round trips {result.get('db_round_trips_per_request', 0):.2f}  "
+        f"errors {result['errors']}"
+    )
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float,
+) -> List[str]:
+    # A scenario regresses when its p99 grows or its throughput drops by
+    # more than ``threshold`` relative to the baseline run.
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+
+        base_p99 = base["latency_ms"]["p99"]
+        p99 = result["latency_ms"]["p99"]
+        if base_p99 and p99 > base_p99 * (1 + threshold):
+            regressions.append(f"{name}: p99 {base_p99:.2f} -> {p99:.2f} ms")
+
+        base_rps = base["throughput_rps"]
+        rps = result["throughput_rps"]
+        if base_rps and rps < base_rps * (1 - threshold):
+            regressions.append(f"{name}: throughput {base_rps:.1f} -> {rps:.1f} req/s")
+
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="In-process load test of the wallet API against a local Postgres",
+    )
+    parser.add_argument("--database-url", default=settings.test_db_url)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--contended-concurrency", type=int, default=100)
+    parser.add_argument("--wallets", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=settings.db.pool_size)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", help="baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2)
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmarks(args))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
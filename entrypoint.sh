@@ -6,4 +6,4 @@ until alembic upgrade head; do
   sleep 2
 done
 
-exec uvicorn app.main:create_app --factory --host 0.0.0.0 --port 8000
+exec python -m app.main
@@ -16,6 +16,7 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.pool import NullPool
 
 from app.main import create_app
+from app.core.metrics import instrument_engine
 from app.db.db_helper import db_helper
 from app.db.models.base import Base
 from app.core.config import settings
@@ -28,6 +29,7 @@ async def test_engine() -> AsyncGenerator[AsyncEngine, None]:
         echo=False,
         poolclass=NullPool,
     )
+    instrument_engine(engine, "test")
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -55,6 +57,23 @@ async def test_session(test_engine: AsyncEngine) -> AsyncGenerator[AsyncSession,
         yield session
 
 
+@pytest_asyncio.fixture(scope="function")
+async def pooled_session_factory() -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    engine = create_async_engine(
+        settings.test_db_url,
+        echo=False,
+        pool_size=20,
+        max_overflow=0,
+    )
+    
+    yield async_sessionmaker(
+        bind=engine,
+        expire_on_commit=False,
+    )
+    
+    await engine.dispose()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def client(test_engine: AsyncEngine) -> AsyncGenerator[AsyncClient, None]:
     app = create_app()
@@ -67,6 +86,7 @@ async def client(test_engine: AsyncEngine) -> AsyncGenerator[AsyncClient, None]:
             yield session
     
     app.dependency_overrides[db_helper.session_getter] = override_session
+    app.dependency_overrides[db_helper.read_session_getter] = override_session
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
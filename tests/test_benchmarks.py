@@ -0,0 +1,60 @@
+import pytest
+
+from httpx import AsyncClient
+
+from benchmarks.responses import (
+    parse_args,
+    run_comparison,
+)
+from benchmarks.wallet_api import (
+    build_scenarios,
+    compare,
+    percentile,
+    run_scenario,
+)
+
+
+class TestBenchmarkSuite:
+    
+    def test_percentile_nearest_rank(self):
+        latencies = [float(i) for i in range(1, 101)]
+        
+        assert percentile(latencies, 50) == 50.0
+        assert percentile(latencies, 99) == 99.0
+        assert percentile([], 99) == 0.0
+    
+    def test_compare_flags_regressions(self):
+        baseline = {
+            "results": {
+                "get": {"throughput_rps": 1000.0, "latency_ms": {"p99": 10.0}},
+            }
+        }
+        current = {
+            "results": {
+                "get": {"throughput_rps": 700.0, "latency_ms": {"p99": 15.0}},
+            }
+        }
+        
+        assert len(compare(baseline, current, 0.2)) == 2
+        assert compare(baseline, baseline, 0.2) == []
+    
+    @pytest.mark.asyncio
+    async def test_scenarios_run_without_errors(self, client: AsyncClient):
+        scenarios = await build_scenarios(client, wallets=3)
+        
+        for name, scenario in scenarios.items():
+            result = await run_scenario(client, scenario, requests=6, concurrency=3)
+            
+            assert result["requests"] == 6, name
+            assert result["errors"] == 0, name
+    
+    @pytest.mark.asyncio
+    async def test_response_comparison_runs(self, client: AsyncClient):
+        args = parse_args(
+            ["--page-size", "5", "--requests", "2", "--rounds", "1", "--warmup", "1"]
+        )
+    
+        report = await run_comparison(args)
+    
+        assert set(report["results"]) == {"model", "fast"}
+        assert report["cpu_speedup"] > 0
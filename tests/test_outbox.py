@@ -0,0 +1,377 @@
+import asyncio
+
+import orjson
+
+import pytest
+
+from sqlalchemy import (
+    func,
+    select,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from app.main import create_app
+from app.api.api_v1.routers import wallet as wallet_router
+from app.core.config import settings
+from app.db.db_helper import db_helper
+from app.db.models.outbox_event import OutboxEvent
+from app.db.repository.outbox_repository import (
+    get_last_event_id,
+    get_wallet_events_since,
+    publish_outbox_batch,
+    purge_published_outbox_events,
+)
+from app.db.repository.wallet_events import (
+    RESUME,
+    WalletEventHub,
+)
+from app.db.repository.wallet_repository import (
+    create_wallet,
+    update_wallet_balance,
+    apply_operations_batch,
+    transfer_between_wallets,
+)
+from app.utils.money import parse_amount
+from app.utils.sse import sse_event
+
+
+CHANNEL = "test_wallet_events"
+
+
+async def outbox_rows(session: AsyncSession):
+    result = await session.execute(
+        select(
+            OutboxEvent.wallet_id,
+            OutboxEvent.type,
+            OutboxEvent.amount,
+            OutboxEvent.balance,
+        ).order_by(OutboxEvent.id)
+    )
+    
+    return result.all()
+
+
+@pytest.fixture
+async def event_hub():
+    hub = WalletEventHub(settings.test_db_url, CHANNEL, reconnect_delay=0.1)
+    task = asyncio.create_task(hub.run())
+    await asyncio.wait_for(hub.connected.wait(), 5)
+    
+    yield hub
+    
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+class TestOutboxWrites:
+    
+    @pytest.mark.asyncio
+    async def test_operation_writes_outbox_row(self, test_session: AsyncSession):
+        wallet_id = (await create_wallet(test_session)).id
+        
+        await update_wallet_balance(test_session, str(wallet_id), parse_amount("100"), "DEPOSIT")
+        await update_wallet_balance(test_session, str(wallet_id), parse_amount("30"), "WITHDRAW")
+        with pytest.raises(ValueError):
+            await update_wallet_balance(test_session, str(wallet_id), parse_amount("500"), "WITHDRAW")
+        
+        assert await outbox_rows(test_session) == [
+            (wallet_id, "DEPOSIT", 10000, 10000),
+            (wallet_id, "WITHDRAW", 3000, 7000),
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_batch_and_transfer_write_outbox_rows(self, test_session: AsyncSession):
+        first = await create_wallet(test_session)
+        second = await create_wallet(test_session)
+        
+        await apply_operations_batch(
+            test_session,
+            [
+                (str(first.id), parse_amount("50"), "DEPOSIT"),
+                (str(first.id), parse_amount("20"), "DEPOSIT"),
+                (str(first.id), parse_amount("999"), "WITHDRAW"),
+            ],
+        )
+        await transfer_between_wallets(test_session, str(first.id), str(second.id), parse_amount("40"))
+        
+        assert await outbox_rows(test_session) == [
+            (first.id, "DEPOSIT", 5000, 5000),
+            (first.id, "DEPOSIT", 2000, 7000),
+            (first.id, "TRANSFER_OUT", 4000, 3000),
+            (second.id, "TRANSFER_IN", 4000, 4000),
+        ]
+
+
+class TestOutboxRelay:
+    
+    @pytest.mark.asyncio
+    async def test_publish_notifies_and_drains(
+        self,
+        test_session: AsyncSession,
+        event_hub: WalletEventHub,
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        for _ in range(3):
+            await update_wallet_balance(test_session, wallet_id, parse_amount("10"), "DEPOSIT")
+        
+        with event_hub.subscribe(wallet_id) as queue:
+            assert await publish_outbox_batch(test_session, CHANNEL, batch_size=2) == 2
+            assert await publish_outbox_batch(test_session, CHANNEL, batch_size=2) == 1
+            assert await publish_outbox_batch(test_session, CHANNEL, batch_size=2) == 0
+            
+            queued = [await asyncio.wait_for(queue.get(), 5) for _ in range(3)]
+        
+        events = [orjson.loads(payload) for _, payload in queued]
+        assert [event["balance"] for event in events] == ["10.00", "20.00", "30.00"]
+        assert [event["id"] for event in events] == [event_id for event_id, _ in queued]
+        assert events[0]["wallet_id"] == wallet_id
+        assert events[0]["type"] == "DEPOSIT"
+        assert events[0]["amount"] == "10.00"
+        
+        unpublished = await test_session.scalar(
+            select(func.count())
+            .select_from(OutboxEvent)
+            .where(OutboxEvent.published_at.is_(None))
+        )
+        assert unpublished == 0
+        assert len(await outbox_rows(test_session)) == 3
+    
+    @pytest.mark.asyncio
+    async def test_only_one_relay_publishes(
+        self,
+        test_engine: AsyncEngine,
+        test_session: AsyncSession,
+    ):
+        wallet = await create_wallet(test_session)
+        await update_wallet_balance(test_session, str(wallet.id), parse_amount("10"), "DEPOSIT")
+        
+        async with async_sessionmaker(bind=test_engine)() as other_relay:
+            await other_relay.execute(
+                select(func.pg_advisory_xact_lock(func.hashtext(f"outbox_relay:{CHANNEL}")))
+            )
+            assert await publish_outbox_batch(test_session, CHANNEL) == 0
+            await other_relay.rollback()
+        
+        assert await publish_outbox_batch(test_session, CHANNEL) == 1
+    
+    @pytest.mark.asyncio
+    async def test_published_events_are_replayed_until_purged(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        for _ in range(3):
+            await update_wallet_balance(test_session, wallet_id, parse_amount("10"), "DEPOSIT")
+        await publish_outbox_batch(test_session, CHANNEL)
+        
+        first_id = await test_session.scalar(
+            select(func.min(OutboxEvent.id)).where(OutboxEvent.wallet_id == wallet.id)
+        )
+        replay = await get_wallet_events_since(test_session, wallet_id, first_id)
+        
+        assert [orjson.loads(payload)["balance"] for _, payload in replay] == ["20.00", "30.00"]
+        assert await get_last_event_id(test_session, wallet_id) == replay[-1][0]
+        
+        assert await purge_published_outbox_events(test_session, retention=3600) == 0
+        assert await purge_published_outbox_events(test_session, retention=0) == 3
+        assert await get_wallet_events_since(test_session, wallet_id, first_id) is None
+    
+    def test_slow_subscriber_is_told_to_resume(self):
+        hub = WalletEventHub(settings.test_db_url, CHANNEL, queue_size=2)
+        payloads = [
+            orjson.dumps({"id": i, "wallet_id": "w1", "balance": str(i)}).decode()
+            for i in range(3)
+        ]
+        
+        with hub.subscribe("w1") as queue, hub.subscribe("w2") as other:
+            for payload in payloads[:2]:
+                hub.dispatch(payload)
+            
+            assert queue.get_nowait() == (0, payloads[0])
+            hub.dispatch(payloads[2])
+            assert [queue.get_nowait(), queue.get_nowait()] == [(1, payloads[1]), (2, payloads[2])]
+            
+            for payload in payloads:
+                hub.dispatch(payload)
+            
+            assert queue.get_nowait() is RESUME
+            assert queue.empty()
+            assert other.empty()
+            
+            hub.resume_all()
+            assert other.get_nowait() is RESUME
+        
+        assert hub._subscribers == {}
+    
+    def test_sse_event_format(self):
+        assert sse_event('{"a": 1}', "balance") == b'event: balance\ndata: {"a": 1}\n\n'
+        assert sse_event("x\ny", event_id="7") == b"id: 7\ndata: x\ndata: y\n\n"
+
+
+@pytest.fixture
+def stream_app(test_engine: AsyncEngine, event_hub: WalletEventHub, monkeypatch):
+    monkeypatch.setattr(wallet_router, "wallet_event_hub", event_hub)
+    app = create_app()
+    
+    async def override_session():
+        async with async_sessionmaker(
+            bind=test_engine,
+            expire_on_commit=False,
+        )() as session:
+            yield session
+    
+    app.dependency_overrides[db_helper.session_getter] = override_session
+    
+    return app
+
+
+class EventStream:
+    # httpx buffers whole ASGI responses, so the endless stream is driven
+    # through the raw ASGI interface.
+    def __init__(self, app, wallet_id: str, headers=()) -> None:
+        self.disconnected = asyncio.Event()
+        self.messages: "asyncio.Queue[dict]" = asyncio.Queue()
+        self.sent = False
+        path = f"/api/wallets/{wallet_id}/events"
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"test"), *headers],
+            "client": ("127.0.0.1", 1234),
+            "server": ("test", 80),
+        }
+        self.task = asyncio.create_task(app(scope, self.receive, self.messages.put))
+    
+    async def receive(self):
+        if not self.sent:
+            self.sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+    
+    async def next_message(self) -> dict:
+        return await asyncio.wait_for(self.messages.get(), 5)
+    
+    async def next_body(self) -> bytes:
+        while True:
+            message = await self.next_message()
+            if message["type"] == "http.response.body" and message["body"]:
+                return message["body"]
+    
+    async def close(self) -> None:
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+def event_data(body: bytes) -> dict:
+    return orjson.loads(body.split(b"data: ", 1)[1])
+
+
+class TestWalletEventStream:
+    
+    @pytest.mark.asyncio
+    async def test_unknown_wallet_is_404(self, client):
+        response = await client.get("/api/wallets/00000000-0000-0000-0000-000000000000/events")
+        
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_stream_pushes_balance_changes(
+        self,
+        stream_app,
+        test_session: AsyncSession,
+        event_hub: WalletEventHub,
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        stream = EventStream(stream_app, wallet_id)
+        
+        start = await stream.next_message()
+        assert start["status"] == 200
+        assert (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+        
+        snapshot = await stream.next_body()
+        assert snapshot.startswith(b"id: 0\nevent: snapshot\n")
+        
+        await update_wallet_balance(test_session, wallet_id, parse_amount("25"), "DEPOSIT")
+        await publish_outbox_batch(test_session, CHANNEL)
+        
+        event = await stream.next_body()
+        data = event_data(event)
+        assert event.startswith(f"id: {data['id']}\nevent: balance\n".encode())
+        assert data["balance"] == "25.00"
+        
+        await stream.close()
+        assert event_hub._subscribers == {}
+    
+    @pytest.mark.asyncio
+    async def test_stream_resumes_from_last_event_id(
+        self,
+        stream_app,
+        test_session: AsyncSession,
+        event_hub: WalletEventHub,
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        for amount in ("10", "20", "30"):
+            await update_wallet_balance(test_session, wallet_id, parse_amount(amount), "DEPOSIT")
+        first_id = await test_session.scalar(
+            select(func.min(OutboxEvent.id)).where(OutboxEvent.wallet_id == wallet.id)
+        )
+        
+        # Events the relay has not published yet are replayed as well, and
+        # not sent again once their notification arrives.
+        stream = EventStream(
+            stream_app,
+            wallet_id,
+            [(b"last-event-id", str(first_id).encode())],
+        )
+        await stream.next_message()
+        
+        replayed = [event_data(await stream.next_body()) for _ in range(2)]
+        assert [event["balance"] for event in replayed] == ["30.00", "60.00"]
+        
+        await publish_outbox_batch(test_session, CHANNEL)
+        await update_wallet_balance(test_session, wallet_id, parse_amount("40"), "DEPOSIT")
+        await publish_outbox_batch(test_session, CHANNEL)
+        
+        assert event_data(await stream.next_body())["balance"] == "100.00"
+        
+        # Told to resume, the stream ends so the client reconnects.
+        event_hub.resume_all()
+        while (await stream.next_message()).get("more_body", True):
+            pass
+        await stream.close()
+    
+    @pytest.mark.asyncio
+    async def test_live_event_out_of_order_is_delivered(
+        self,
+        stream_app,
+        test_session: AsyncSession,
+        event_hub: WalletEventHub,
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        stream = EventStream(stream_app, wallet_id)
+        await stream.next_message()
+        assert (await stream.next_body()).startswith(b"id: 0\n")
+        
+        for event_id in (7, 5, 9):
+            event_hub.dispatch(
+                orjson.dumps({"id": event_id, "wallet_id": wallet_id}).decode()
+            )
+        
+        assert [event_data(await stream.next_body())["id"] for _ in range(3)] == [7, 5, 9]
+        
+        await stream.close()
@@ -0,0 +1,99 @@
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import uuid
+
+import pytest
+
+from sqlalchemy import (
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.models.transaction import Transaction
+from app.db.partitions import (
+    add_months,
+    create_transaction_partitions,
+    detach_transaction_partitions,
+    is_transaction_partition,
+    list_partitions,
+)
+
+
+FUTURE = datetime(2090, 3, 15, tzinfo=timezone.utc)
+
+
+class TestTransactionPartitions:
+    
+    def test_month_arithmetic(self):
+        month = datetime(2026, 11, 1, tzinfo=timezone.utc)
+        
+        assert add_months(month, 2) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+        assert add_months(month, -11) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    
+    def test_partition_names(self):
+        assert is_transaction_partition("transactions_p209003")
+        assert is_transaction_partition("transactions_p209003_h1")
+        assert is_transaction_partition("transactions_default")
+        assert not is_transaction_partition("transactions")
+        assert not is_transaction_partition("wallets")
+    
+    @pytest.mark.asyncio
+    async def test_create_and_detach_partitions(self, test_engine: AsyncEngine):
+        try:
+            async with test_engine.connect() as conn:
+                created = await create_transaction_partitions(
+                    conn,
+                    months_ahead=1,
+                    hash_partitions=2,
+                    now=FUTURE,
+                )
+                again = await create_transaction_partitions(
+                    conn,
+                    months_ahead=1,
+                    hash_partitions=2,
+                    now=FUTURE,
+                )
+            
+            assert created == ["transactions_p209003", "transactions_p209004"]
+            assert again == []
+            
+            async with test_engine.begin() as conn:
+                await conn.execute(
+                    insert(Transaction).values(
+                        id=uuid.uuid4(),
+                        type="DEPOSIT",
+                        amount=100,
+                        created_at=FUTURE,
+                    )
+                )
+                partition = await conn.scalar(
+                    select(text("tableoid::regclass::text")).select_from(Transaction)
+                )
+                assert partition.startswith("transactions_p209003_h")
+                await conn.execute(text("DELETE FROM transactions"))
+            
+            async with test_engine.connect() as conn:
+                detached = await detach_transaction_partitions(
+                    conn,
+                    retention_months=12,
+                    archive_schema="test_archive",
+                    now=datetime(2091, 5, 1, tzinfo=timezone.utc),
+                )
+                remaining = [partition.name for partition in await list_partitions(conn)]
+                archived = await conn.scalar(
+                    text("SELECT to_regclass('test_archive.transactions_p209003')")
+                )
+            
+            assert detached == ["transactions_p209003", "transactions_p209004"]
+            assert remaining == ["transactions_default"]
+            assert archived is not None
+        finally:
+            async with test_engine.begin() as conn:
+                await conn.execute(text("DROP SCHEMA IF EXISTS test_archive CASCADE"))
+                await conn.execute(text("DROP TABLE IF EXISTS transactions_p209003"))
+                await conn.execute(text("DROP TABLE IF EXISTS transactions_p209004"))
@@ -0,0 +1,195 @@
+import uuid
+
+import pytest
+
+from httpx import (
+    AsyncClient,
+    ASGITransport,
+)
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+)
+
+from app.main import create_app
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import MemoryRateLimiter
+from app.db.db_helper import db_helper
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    
+    return now
+
+
+@pytest.fixture
+async def limited_client(test_engine: AsyncEngine, monkeypatch):
+    monkeypatch.setattr(settings.rate_limit, "enabled", True)
+    monkeypatch.setattr(settings.rate_limit, "client_burst", 6)
+    monkeypatch.setattr(settings.rate_limit, "client_rate", 0.5)
+    monkeypatch.setattr(settings.rate_limit, "wallet_burst", 3)
+    monkeypatch.setattr(settings.rate_limit, "wallet_rate", 0.5)
+    monkeypatch.setattr(settings.rate_limit, "client_header", "X-Api-Key")
+    app = create_app()
+    sessions = []
+    
+    async def override_session():
+        async with async_sessionmaker(
+            bind=test_engine,
+            expire_on_commit=False,
+        )() as session:
+            sessions.append(session)
+            yield session
+    
+    app.dependency_overrides[db_helper.session_getter] = override_session
+    app.dependency_overrides[db_helper.read_session_getter] = override_session
+    
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        ac.sessions = sessions
+        yield ac
+
+
+class TestMemoryRateLimiter:
+    
+    @pytest.mark.asyncio
+    async def test_burst_then_refill(self, clock):
+        limiter = MemoryRateLimiter(max_keys=10)
+    
+        for _ in range(3):
+            assert await limiter.acquire([("key", 2, 3)]) == [0]
+        assert await limiter.acquire([("key", 2, 3)]) == [0.5]
+        assert await limiter.acquire([("other", 2, 3)]) == [0]
+    
+        clock[0] += 0.5
+        assert await limiter.acquire([("key", 2, 3)]) == [0]
+        assert (await limiter.acquire([("key", 2, 3)]))[0] > 0
+    
+    @pytest.mark.asyncio
+    async def test_buckets_are_bounded_and_expire(self, clock):
+        limiter = MemoryRateLimiter(max_keys=2)
+    
+        for key in ("a", "b", "c"):
+            await limiter.acquire([(key, 1, 1)])
+        assert len(limiter) == 2
+    
+        assert await limiter.acquire([("a", 1, 1)]) == [0]
+        assert await limiter.acquire([("c", 1, 1)]) == [1]
+    
+        clock[0] += 1
+        assert await limiter.acquire([("c", 1, 1)]) == [0]
+    
+    @pytest.mark.asyncio
+    async def test_all_or_nothing(self, clock):
+        limiter = MemoryRateLimiter(max_keys=10)
+        await limiter.acquire([("wallet", 1, 1)])
+    
+        assert await limiter.acquire([("client", 1, 2), ("wallet", 1, 1)]) == [0, 1]
+        assert await limiter.acquire([("client", 1, 2), ("wallet", 1, 1)]) == [0, 1]
+    
+        assert await limiter.acquire([("client", 1, 2)]) == [0]
+        assert await limiter.acquire([("client", 1, 2)]) == [0]
+        assert await limiter.acquire([("client", 1, 2)]) == [1]
+
+
+class TestRateLimitMiddleware:
+    
+    @pytest.mark.asyncio
+    async def test_wallet_bucket(self, limited_client: AsyncClient):
+        wallet_id = (await limited_client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        operation = {"operation_type": "DEPOSIT", "amount": "1"}
+    
+        statuses = [
+            (await limited_client.post(f"/api/wallets/{wallet_id}/operation", json=operation)).status_code
+            for _ in range(4)
+        ]
+        assert statuses == [200, 200, 200, 429]
+    
+        sessions = len(limited_client.sessions)
+        response = await limited_client.get(f"/api/wallets/{wallet_id.upper()}")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+        assert response.json() == {"detail": "Too many requests"}
+        assert len(limited_client.sessions) == sessions
+    
+        for spelling in ("{%s}", "urn:uuid:%s"):
+            response = await limited_client.get(f"/api/wallets/{spelling % wallet_id}")
+            assert response.status_code == 429
+    
+        response = await limited_client.get(
+            f"/api/wallets/{uuid.uuid4()}",
+            headers={"X-Api-Key": "another-client"},
+        )
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_rejection_takes_no_client_token(self, limited_client: AsyncClient):
+        wallet_id = (await limited_client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+    
+        statuses = [
+            (await limited_client.get(f"/api/wallets/{wallet_id}")).status_code
+            for _ in range(5)
+        ]
+        assert statuses == [200, 200, 200, 429, 429]
+    
+        response = await limited_client.get("/api/wallets/get_wallets")
+        assert response.status_code == 200
+    
+    @pytest.mark.asyncio
+    async def test_client_bucket(self, limited_client: AsyncClient):
+        statuses = [
+            (await limited_client.get("/api/wallets/get_wallets")).status_code
+            for _ in range(7)
+        ]
+        assert statuses == [200] * 6 + [429]
+    
+        response = await limited_client.get(
+            "/api/wallets/get_wallets",
+            headers={"X-Api-Key": "another-client"},
+        )
+        assert response.status_code == 200
+    
+    @pytest.mark.asyncio
+    async def test_forwarded_client_behind_trusted_proxies(self):
+        seen = []
+    
+        async def app(scope, receive, send):
+            seen.append(scope["path"])
+    
+        middleware = rate_limit.RateLimitMiddleware(
+            app,
+            MemoryRateLimiter(max_keys=10),
+            prefix="/api",
+            client_rate=0.001,
+            client_burst=1,
+            wallet_rate=1,
+            wallet_burst=1,
+            client_header="X-Forwarded-For",
+            trusted_proxies=2,
+        )
+        sent = []
+    
+        async def send(message):
+            sent.append(message)
+    
+        def scope(*forwarded):
+            return {
+                "type": "http",
+                "path": "/api/wallets/get_wallets",
+                "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded],
+                "client": ("10.0.0.2", 1234),
+            }
+    
+        await middleware(scope("203.0.113.7, 10.0.0.1"), None, send)
+        await middleware(scope("198.51.100.1, 203.0.113.7", "10.0.0.1"), None, send)
+        assert len(seen) == 1
+        assert sent[0]["status"] == 429
+    
+        await middleware(scope("10.0.0.1"), None, send)
+        await middleware(scope("198.51.100.1, 10.0.0.1"), None, send)
+        assert len(seen) == 3
@@ -0,0 +1,210 @@
+import asyncio
+
+import uuid
+
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+import pytest
+
+from sqlalchemy import (
+    insert,
+    select,
+    update,
+    func,
+    text,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+)
+
+from app.core.config import settings
+from app.db.models.transaction import Transaction
+from app.db.models.wallets import Wallet
+from app.db.partitions import (
+    create_transaction_partitions,
+    detach_transaction_partitions,
+)
+from app.db.repository.reconciliation_repository import (
+    carry_forward_partition,
+    find_balance_drift,
+)
+from app.db.repository.wallet_repository import (
+    create_wallet,
+    update_wallet_balance,
+    transfer_between_wallets,
+)
+from app.jobs.reconciliation import (
+    main,
+    reconcile_balances,
+)
+from app.utils.money import parse_amount
+
+
+async def consistent_wallets(session: AsyncSession, count: int):
+    wallet_ids = [(await create_wallet(session)).id for _ in range(count)]
+    for wallet_id in wallet_ids:
+        await update_wallet_balance(session, str(wallet_id), parse_amount("100"), "DEPOSIT")
+        await update_wallet_balance(session, str(wallet_id), parse_amount("15.5"), "WITHDRAW")
+    await transfer_between_wallets(session, str(wallet_ids[0]), str(wallet_ids[1]), parse_amount("40"))
+
+    return wallet_ids
+
+
+async def tamper(session: AsyncSession, wallet_id, balance: int) -> None:
+    # Changes the balance behind the ledger's back, keeping updated_at.
+    await session.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet_id)
+        .values(balance=balance, updated_at=Wallet.updated_at)
+    )
+    await session.commit()
+
+
+class TestReconciliation:
+    
+    @pytest.mark.asyncio
+    async def test_consistent_ledger_has_no_drift(self, test_session: AsyncSession):
+        wallet_ids = await consistent_wallets(test_session, 3)
+        
+        assert await find_balance_drift(test_session, wallet_ids) == []
+    
+    @pytest.mark.asyncio
+    async def test_full_run_reports_drift(self, test_session: AsyncSession):
+        wallet_ids = await consistent_wallets(test_session, 7)
+        await tamper(test_session, wallet_ids[3], 100000)
+        
+        report = await reconcile_balances(settings.test_db_url, chunk_size=2, concurrency=3)
+        
+        assert report.checked == 7
+        assert report.since is None
+        assert [tuple(drift) for drift in report.drifts] == [
+            (wallet_ids[3], 100000, 8450, 2, "USD"),
+        ]
+        assert report.drifts[0].difference == 91550
+    
+    @pytest.mark.asyncio
+    async def test_incremental_run_checks_changed_wallets_only(
+        self,
+        test_session: AsyncSession,
+    ):
+        wallet_ids = await consistent_wallets(test_session, 5)
+        first = await reconcile_balances(settings.test_db_url, chunk_size=2, concurrency=2)
+        
+        await update_wallet_balance(test_session, str(wallet_ids[2]), parse_amount("1"), "DEPOSIT")
+        await test_session.execute(
+            update(Wallet)
+            .where(Wallet.id == wallet_ids[4])
+            .values(balance=0, updated_at=func.clock_timestamp())
+        )
+        await test_session.commit()
+        await tamper(test_session, wallet_ids[0], 0)
+        
+        report = await reconcile_balances(
+            settings.test_db_url,
+            chunk_size=2,
+            concurrency=2,
+            incremental=True,
+            overlap=0,
+        )
+        
+        assert report.since == first.until
+        assert report.checked == 2
+        assert [drift.wallet_id for drift in report.drifts] == [wallet_ids[4]]
+    
+    @pytest.mark.asyncio
+    async def test_incremental_run_rescans_late_commits(
+        self,
+        test_session: AsyncSession,
+    ):
+        wallet_ids = await consistent_wallets(test_session, 3)
+        first = await reconcile_balances(settings.test_db_url, chunk_size=2, concurrency=2)
+        
+        # Stamped before the first run's position, committed after it.
+        await test_session.execute(
+            update(Wallet)
+            .where(Wallet.id == wallet_ids[1])
+            .values(balance=0, updated_at=first.until - timedelta(seconds=5))
+        )
+        await test_session.commit()
+        
+        report = await reconcile_balances(
+            settings.test_db_url,
+            chunk_size=2,
+            concurrency=2,
+            incremental=True,
+            overlap=60,
+        )
+        
+        assert report.since == first.until - timedelta(seconds=60)
+        assert [drift.wallet_id for drift in report.drifts] == [wallet_ids[1]]
+    
+    @pytest.mark.asyncio
+    async def test_command_exit_code(self, test_session: AsyncSession, monkeypatch, capsys):
+        wallet_ids = await consistent_wallets(test_session, 2)
+        monkeypatch.setattr(settings.db, "name", settings.test_db_name)
+        
+        assert await asyncio.to_thread(main, []) == 0
+        
+        await tamper(test_session, wallet_ids[1], 100)
+        
+        assert await asyncio.to_thread(main, []) == 1
+        out = capsys.readouterr().out
+        assert str(wallet_ids[1]) in out
+        assert '"balance":"1.00"' in out
+    
+    @pytest.mark.asyncio
+    async def test_detached_partitions_are_carried_forward(
+        self,
+        test_engine: AsyncEngine,
+        test_session: AsyncSession,
+    ):
+        wallet_ids = await consistent_wallets(test_session, 2)
+        future = datetime(2090, 3, 15, tzinfo=timezone.utc)
+        try:
+            async with test_engine.connect() as conn:
+                await create_transaction_partitions(conn, months_ahead=1, now=future)
+            
+            async with test_engine.begin() as conn:
+                for amount, operation_type in ((700, "DEPOSIT"), (200, "WITHDRAW")):
+                    await conn.execute(
+                        insert(Transaction).values(
+                            id=uuid.uuid4(),
+                            wallet_id=wallet_ids[0],
+                            type=operation_type,
+                            amount=amount,
+                            created_at=future,
+                        )
+                    )
+                await conn.execute(
+                    update(Wallet)
+                    .where(Wallet.id == wallet_ids[0])
+                    .values(balance=Wallet.balance + 500)
+                )
+            
+            async with test_engine.connect() as conn:
+                detached = await detach_transaction_partitions(
+                    conn,
+                    retention_months=12,
+                    now=datetime(2091, 5, 1, tzinfo=timezone.utc),
+                    before_detach=carry_forward_partition,
+                )
+            
+            assert detached == ["transactions_p209003", "transactions_p209004"]
+            assert await find_balance_drift(test_session, wallet_ids) == []
+            
+            carried = await test_session.execute(
+                select(Transaction.type, Transaction.amount, Transaction.created_at)
+                .where(Transaction.created_at >= future)
+            )
+            assert carried.all() == [
+                ("CARRY_FORWARD", 500, datetime(2090, 5, 1, tzinfo=timezone.utc)),
+            ]
+        finally:
+            async with test_engine.begin() as conn:
+                await conn.execute(text("DROP TABLE IF EXISTS transactions_p209003"))
+                await conn.execute(text("DROP TABLE IF EXISTS transactions_p209004"))
@@ -1,18 +1,84 @@
-from decimal import Decimal
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+import asyncio
 
 import pytest
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    select,
+    func,
+    text,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+)
 
+from app.core.config import settings
+from app.db.models.transaction import Transaction
 from app.db.repository.wallet_repository import (
     create_wallet,
+    create_wallets_bulk,
     get_wallet_by_uuid,
+    get_wallet_cached,
     get_all_wallets,
+    get_wallets_page,
     get_wallets_count,
+    estimate_wallets_count,
     update_wallet_balance,
+    apply_operations_batch,
+    transfer_between_wallets,
+    AMOUNT_TOO_PRECISE,
+    BALANCE_TOO_LARGE,
+    SCALE_MISMATCH,
+)
+from app.db.repository.transaction_repository import get_wallet_transactions
+from app.db.repository.reconciliation_repository import find_balance_drift
+from app.db.repository.wallet_cache import (
+    WalletCache,
+    wallet_cache_lookups,
+)
+from app.db.repository.idempotency_repository import (
+    get_idempotent_result,
+    purge_expired_idempotency_keys,
+)
+from app.core.cache import LRUCache
+from app.core.metrics import registry
+from app.db.repository import operation_coalescer
+from app.db.repository.operation_coalescer import WalletOperationCoalescer
+from app.utils.money import (
+    MAX_MINOR_UNITS,
+    Amount,
+    format_minor,
+    parse_amount,
 )
 
 
+class VersionedMemoryCache:
+    # The SharedCache contract, kept in a dict.
+    def __init__(self) -> None:
+        self.entries = {}
+    
+    async def get(self, key):
+        entry = self.entries.get(key)
+        return entry[0] if entry else None
+    
+    async def set(self, key, value, ttl, version):
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= version:
+            self.entries[key] = (value, version)
+    
+    async def delete(self, key):
+        self.entries.pop(key, None)
+    
+    async def close(self):
+        pass
+
+
 class TestWalletRepository:
     
     @pytest.mark.asyncio
@@ -20,7 +86,7 @@ class TestWalletRepository:
         wallet = await create_wallet(test_session)
         
         assert wallet.id is not None
-        assert wallet.balance == Decimal("0.0")
+        assert wallet.balance == 0
         assert wallet.created_at is not None
         assert wallet.updated_at is not None
     
@@ -72,6 +138,30 @@ class TestWalletRepository:
         
         assert count == 2
     
+    @pytest.mark.asyncio
+    async def test_get_wallets_page_keyset(self, test_session: AsyncSession):
+        created = [await create_wallet(test_session) for _ in range(5)]
+        
+        first_page = await get_wallets_page(test_session, limit=3)
+        last = first_page[-1]
+        second_page = await get_wallets_page(
+            test_session,
+            limit=3,
+            after=(last.created_at, last.id),
+        )
+        
+        assert [w.id for w in first_page + second_page] == [w.id for w in created]
+    
+    @pytest.mark.asyncio
+    async def test_estimate_wallets_count(self, test_session: AsyncSession):
+        await create_wallet(test_session)
+        await test_session.execute(text("ANALYZE wallets"))
+        
+        estimate = await estimate_wallets_count(test_session)
+        
+        assert estimate is not None
+        assert estimate >= 0
+    
     @pytest.mark.asyncio
     async def test_update_wallet_balance_deposit(self, test_session: AsyncSession):
         wallet = await create_wallet(test_session)
@@ -79,12 +169,12 @@ class TestWalletRepository:
         updated_wallet = await update_wallet_balance(
             test_session,
             str(wallet.id),
-            Decimal("100.50"),
+            parse_amount("100.50"),
             "DEPOSIT"
         )
         
         assert updated_wallet is not None
-        assert updated_wallet.balance == Decimal("100.50")
+        assert updated_wallet.balance == 10050
     
     @pytest.mark.asyncio
     async def test_update_wallet_balance_withdraw(self, test_session: AsyncSession):
@@ -93,19 +183,19 @@ class TestWalletRepository:
         await update_wallet_balance(
             test_session,
             str(wallet.id),
-            Decimal("200.00"),
+            parse_amount("200.00"),
             "DEPOSIT"
         )
         
         updated_wallet = await update_wallet_balance(
             test_session,
             str(wallet.id),
-            Decimal("50.00"),
+            parse_amount("50.00"),
             "WITHDRAW"
         )
         
         assert updated_wallet is not None
-        assert updated_wallet.balance == Decimal("150.00")
+        assert updated_wallet.balance == 15000
     
     @pytest.mark.asyncio
     async def test_update_wallet_balance_insufficient_funds(
@@ -118,7 +208,7 @@ class TestWalletRepository:
             await update_wallet_balance(
                 test_session,
                 str(wallet.id),
-                Decimal("100.00"),
+                parse_amount("100.00"),
                 "WITHDRAW"
             )
     
@@ -129,13 +219,29 @@ class TestWalletRepository:
         result = await update_wallet_balance(
             test_session,
             fake_uuid,
-            Decimal("100.00"),
+            parse_amount("100.00"),
             "DEPOSIT"
         )
         
         assert result is None
 
 
+class TestBulkWalletCreation:
+    
+    @pytest.mark.asyncio
+    async def test_create_wallets_in_chunks(self, test_session: AsyncSession):
+        chunks = [
+            rows
+            async for rows in create_wallets_bulk(test_session, 25, chunk_size=10)
+        ]
+        
+        assert [len(rows) for rows in chunks] == [10, 10, 5]
+        wallet_ids = {row.wallet_id for rows in chunks for row in rows}
+        assert len(wallet_ids) == 25
+        assert all(row.balance == "0.00" for rows in chunks for row in rows)
+        assert await get_wallets_count(test_session) == 25
+
+
 class TestWalletRepositoryEdgeCases:
     
     @pytest.mark.asyncio
@@ -145,14 +251,14 @@ class TestWalletRepositoryEdgeCases:
         await update_wallet_balance(
             test_session,
             str(wallet.id),
-            Decimal("50.00"),
+            parse_amount("50.00"),
             "DEPOSIT"
         )
         
         await update_wallet_balance(
             test_session,
             str(wallet.id),
-            Decimal("30.00"),
+            parse_amount("30.00"),
             "DEPOSIT"
         )
         
@@ -161,7 +267,7 @@ class TestWalletRepositoryEdgeCases:
             str(wallet.id)
         )
         
-        assert updated_wallet.balance == Decimal("80.00")
+        assert updated_wallet.balance == 8000
     
     @pytest.mark.asyncio
     async def test_decimal_precision(self, test_session: AsyncSession):
@@ -170,17 +276,17 @@ class TestWalletRepositoryEdgeCases:
         updated_wallet = await update_wallet_balance(
             test_session,
             str(wallet.id),
-            Decimal("0.01"),
+            parse_amount("0.01"),
             "DEPOSIT"
         )
         
-        assert updated_wallet.balance == Decimal("0.01")
+        assert updated_wallet.balance == 1
     
     @pytest.mark.asyncio
     async def test_large_amount_operations(self, test_session: AsyncSession):
         wallet = await create_wallet(test_session)
         
-        large_amount = Decimal("9999999999.99")
+        large_amount = parse_amount("9999999999.99")
         
         updated_wallet = await update_wallet_balance(
             test_session,
@@ -189,4 +295,835 @@ class TestWalletRepositoryEdgeCases:
             "DEPOSIT"
         )
         
-        assert updated_wallet.balance == large_amount
+        assert updated_wallet.balance == 999999999999
+    
+    @pytest.mark.asyncio
+    async def test_amount_finer_than_wallet_scale(self, test_session: AsyncSession):
+        wallet_id = str((await create_wallet(test_session, currency_scale=0)).id)
+        other_id = str((await create_wallet(test_session)).id)
+        
+        updated_wallet = await update_wallet_balance(
+            test_session,
+            wallet_id,
+            parse_amount("5.000"),
+            "DEPOSIT"
+        )
+        assert updated_wallet.balance == 5
+        
+        with pytest.raises(ValueError, match=AMOUNT_TOO_PRECISE):
+            await update_wallet_balance(
+                test_session,
+                wallet_id,
+                parse_amount("1.5"),
+                "DEPOSIT"
+            )
+        
+        results = await apply_operations_batch(
+            test_session,
+            [(wallet_id, parse_amount("0.5"), "WITHDRAW")],
+        )
+        assert results[0].status == AMOUNT_TOO_PRECISE
+        
+        with pytest.raises(ValueError, match=SCALE_MISMATCH):
+            await transfer_between_wallets(
+                test_session,
+                wallet_id,
+                other_id,
+                parse_amount("1"),
+            )
+        
+        wallet = await get_wallet_by_uuid(test_session, wallet_id)
+        assert (wallet.balance, wallet.currency_scale) == (5, 0)
+    
+    @pytest.mark.asyncio
+    async def test_bigint_overflow_is_rejected(self, test_session: AsyncSession):
+        wallet_id = str((await create_wallet(test_session, currency_scale=0)).id)
+        other_id = str((await create_wallet(test_session, currency_scale=0)).id)
+        too_large = parse_amount(str(MAX_MINOR_UNITS + 1))
+        
+        for operation_type in ("DEPOSIT", "WITHDRAW"):
+            with pytest.raises(ValueError, match="Amount is too large"):
+                await update_wallet_balance(
+                    test_session,
+                    wallet_id,
+                    too_large,
+                    operation_type
+                )
+        
+        await update_wallet_balance(
+            test_session,
+            wallet_id,
+            parse_amount(str(MAX_MINOR_UNITS - 1)),
+            "DEPOSIT"
+        )
+        await update_wallet_balance(test_session, other_id, parse_amount("2"), "DEPOSIT")
+        
+        with pytest.raises(ValueError, match=BALANCE_TOO_LARGE):
+            await update_wallet_balance(
+                test_session,
+                wallet_id,
+                parse_amount("2"),
+                "DEPOSIT"
+            )
+        
+        results = await apply_operations_batch(
+            test_session,
+            [
+                (wallet_id, parse_amount("2"), "DEPOSIT"),
+                (wallet_id, too_large, "DEPOSIT"),
+                (wallet_id, parse_amount("1"), "DEPOSIT"),
+            ],
+        )
+        assert [result.status for result in results[:2]] == [
+            BALANCE_TOO_LARGE,
+            "Amount is too large",
+        ]
+        assert results[2].balance == MAX_MINOR_UNITS
+        
+        with pytest.raises(ValueError, match=BALANCE_TOO_LARGE):
+            await transfer_between_wallets(
+                test_session,
+                other_id,
+                wallet_id,
+                parse_amount("1"),
+            )
+        
+        wallet = await get_wallet_by_uuid(test_session, wallet_id)
+        other = await get_wallet_by_uuid(test_session, other_id)
+        assert (wallet.balance, other.balance) == (MAX_MINOR_UNITS, 2)
+
+
+class TestMoney:
+    
+    def test_parse_amount(self):
+        assert parse_amount("12.50") == Amount(125, 1)
+        assert parse_amount("7") == Amount(7, 0)
+        assert parse_amount("0.000") == Amount(0, 0)
+        
+        for value in ("", "-1", "1.", ".5", "1e3", "1,5", " 1"):
+            with pytest.raises(ValueError):
+                parse_amount(value)
+    
+    def test_to_minor(self):
+        assert parse_amount("12.5").to_minor(2) == 1250
+        assert parse_amount("3").to_minor(8) == 300_000_000
+        
+        with pytest.raises(ValueError):
+            parse_amount("0.001").to_minor(2)
+        with pytest.raises(ValueError):
+            parse_amount("92233720368547758.08").to_minor(2)
+    
+    def test_format_minor(self):
+        assert format_minor(1250, 2) == "12.50"
+        assert format_minor(5, 3) == "0.005"
+        assert format_minor(-150, 2) == "-1.50"
+        assert format_minor(42, 0) == "42"
+
+
+class TestTransactionRepository:
+    
+    @pytest.mark.asyncio
+    async def test_ledger_rows_are_linked_to_wallet(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        other_wallet = await create_wallet(test_session)
+        
+        for amount in ("10.00", "20.00", "30.00"):
+            await update_wallet_balance(
+                test_session,
+                str(wallet.id),
+                parse_amount(amount),
+                "DEPOSIT"
+            )
+        await update_wallet_balance(
+            test_session,
+            str(other_wallet.id),
+            parse_amount("5.00"),
+            "DEPOSIT"
+        )
+        
+        transactions = await get_wallet_transactions(test_session, str(wallet.id))
+        
+        assert [t.amount for t in transactions] == [
+            3000,
+            2000,
+            1000,
+        ]
+        assert all(t.wallet_id == wallet.id for t in transactions)
+    
+    @pytest.mark.asyncio
+    async def test_wallet_transactions_keyset_and_filters(
+        self,
+        test_session: AsyncSession
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        await apply_operations_batch(
+            test_session,
+            [
+                (wallet_id, parse_amount("10.00"), "DEPOSIT"),
+                (wallet_id, parse_amount("1.00"), "WITHDRAW"),
+                (wallet_id, parse_amount("2.00"), "WITHDRAW"),
+                (wallet_id, parse_amount("3.00"), "DEPOSIT"),
+            ]
+        )
+        
+        first_page = await get_wallet_transactions(test_session, wallet_id, limit=2)
+        last = first_page[-1]
+        second_page = await get_wallet_transactions(
+            test_session,
+            wallet_id,
+            limit=2,
+            after=(last.created_at, last.id),
+        )
+        
+        all_ids = {t.id for t in first_page + second_page}
+        assert len(all_ids) == 4
+        
+        withdrawals = await get_wallet_transactions(
+            test_session,
+            wallet_id,
+            operation_type="WITHDRAW",
+        )
+        assert sorted(t.amount for t in withdrawals) == [
+            100,
+            200,
+        ]
+
+
+class TestWalletCache:
+    
+    def test_lru_cache_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_lru_cache_expires_entries(self):
+        cache = LRUCache(max_size=10, ttl=0)
+        cache.set("a", 1)
+        
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    @pytest.mark.asyncio
+    async def test_read_through_and_write_through(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        cached = await get_wallet_cached(test_session, wallet_id)
+        assert cached.balance == 0
+        
+        await update_wallet_balance(
+            test_session,
+            wallet_id,
+            parse_amount("42.00"),
+            "DEPOSIT"
+        )
+        
+        cached = await get_wallet_cached(test_session, wallet_id)
+        assert cached.balance == 4200
+    
+    @pytest.mark.asyncio
+    async def test_stale_entry_does_not_overwrite_newer_one(self):
+        cache = WalletCache(enabled=True, ttl=60, max_size=10)
+        wallet_id = "11111111-1111-1111-1111-111111111111"
+        created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        
+        await cache.store(
+            wallet_id,
+            2000,
+            created_at,
+            created_at + timedelta(seconds=2),
+            2,
+            "USD",
+            (),
+        )
+        await cache.store(
+            wallet_id,
+            1000,
+            created_at,
+            created_at + timedelta(seconds=1),
+            2,
+            "USD",
+            (),
+        )
+        
+        wallet = await cache.get(wallet_id)
+        assert wallet.balance == 2000
+        assert cache.stats()["hits"] == 1
+        
+        await cache.invalidate(wallet_id)
+        assert await cache.get(wallet_id) is None
+        assert cache.stats()["misses"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_stale_entry_does_not_overwrite_shared_one(self):
+        shared = VersionedMemoryCache()
+        writer = WalletCache(enabled=True, ttl=60, max_size=10, shared=shared)
+        reader = WalletCache(enabled=True, ttl=60, max_size=10, shared=shared)
+        wallet_id = "11111111-1111-1111-1111-111111111111"
+        created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        
+        await writer.store(
+            wallet_id,
+            2000,
+            created_at,
+            created_at + timedelta(seconds=2),
+            2,
+            "USD",
+            (),
+        )
+        await reader.store(
+            wallet_id,
+            1000,
+            created_at,
+            created_at + timedelta(microseconds=1999999),
+            2,
+            "USD",
+            (),
+        )
+        
+        other = WalletCache(enabled=True, ttl=60, max_size=10, shared=shared)
+        wallet = await other.get(wallet_id)
+        assert wallet.balance == 2000
+        
+        hits = wallet_cache_lookups.value("hit")
+        await other.get(wallet_id)
+        assert wallet_cache_lookups.value("hit") == hits + 1
+        assert 'wallet_cache_lookups_total{result="hit"}' in registry.render()
+    
+    @pytest.mark.asyncio
+    async def test_workers_without_local_tier_see_each_others_writes(self):
+        shared = VersionedMemoryCache()
+        workers = [
+            WalletCache(enabled=True, ttl=60, max_size=10, shared=shared, local=False)
+            for _ in range(2)
+        ]
+        wallet_id = "11111111-1111-1111-1111-111111111111"
+        created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        
+        for worker, balance, seconds in ((workers[0], 1000, 1), (workers[1], 2000, 2)):
+            await worker.store(
+                wallet_id,
+                balance,
+                created_at,
+                created_at + timedelta(seconds=seconds),
+                2,
+                "USD",
+                (),
+            )
+            assert (await workers[0].get(wallet_id)).balance == balance
+        
+        assert not WalletCache(enabled=True, ttl=60, max_size=10, local=False).enabled
+
+
+class TestIdempotencyKeys:
+    
+    @pytest.mark.asyncio
+    async def test_key_is_stored_with_operation(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        
+        await update_wallet_balance(
+            test_session,
+            str(wallet.id),
+            parse_amount("15.00"),
+            "DEPOSIT",
+            idempotency_key="stored-key",
+        )
+        
+        result = await get_idempotent_result(test_session, "stored-key")
+        
+        assert result.wallet_id == str(wallet.id)
+        assert result.new_balance == 1500
+    
+    @pytest.mark.asyncio
+    async def test_purge_expired_keys(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        
+        await update_wallet_balance(
+            test_session,
+            str(wallet.id),
+            parse_amount("15.00"),
+            "DEPOSIT",
+            idempotency_key="expiring-key",
+        )
+        await test_session.execute(
+            text("UPDATE idempotency_keys SET expires_at = now() - interval '1 second'")
+        )
+        await test_session.commit()
+        
+        purged = await purge_expired_idempotency_keys(test_session)
+        
+        assert purged == 1
+
+
+class TestWalletRepositoryConcurrency:
+    
+    @pytest.mark.asyncio
+    async def test_parallel_withdrawals_never_overdraw(
+        self,
+        test_session: AsyncSession,
+        pooled_session_factory: async_sessionmaker[AsyncSession],
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        await update_wallet_balance(
+            test_session,
+            wallet_id,
+            parse_amount("100.00"),
+            "DEPOSIT"
+        )
+        
+        async def withdraw() -> bool:
+            async with pooled_session_factory() as session:
+                try:
+                    await update_wallet_balance(
+                        session,
+                        wallet_id,
+                        parse_amount("1.00"),
+                        "WITHDRAW"
+                    )
+                except ValueError:
+                    return False
+                return True
+        
+        results = await asyncio.gather(*(withdraw() for _ in range(300)))
+        
+        assert sum(results) == 100
+        
+        final_wallet = await get_wallet_by_uuid(test_session, wallet_id)
+        await test_session.refresh(final_wallet)
+        assert final_wallet.balance == 0
+        
+        withdrawals = await test_session.scalar(
+            select(func.count())
+            .select_from(Transaction)
+            .where(Transaction.type == "WITHDRAW")
+        )
+        assert withdrawals == 100
+
+
+class TestWalletOperationsBatch:
+    
+    @pytest.mark.asyncio
+    async def test_batch_applies_operations_in_order(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        results = await apply_operations_batch(
+            test_session,
+            [
+                (wallet_id, parse_amount("50.00"), "DEPOSIT"),
+                (wallet_id, parse_amount("80.00"), "WITHDRAW"),
+                (wallet_id, parse_amount("20.00"), "WITHDRAW"),
+                (wallet_id, parse_amount("5.00"), "DEPOSIT"),
+            ]
+        )
+        
+        assert [(r.status, r.balance) for r in results] == [
+            ("Successful", 5000),
+            ("Insufficient funds", None),
+            ("Successful", 3000),
+            ("Successful", 3500),
+        ]
+        
+        ledger_rows = await test_session.scalar(
+            select(func.count()).select_from(Transaction)
+        )
+        assert ledger_rows == 3
+    
+    @pytest.mark.asyncio
+    async def test_batch_across_wallets(self, test_session: AsyncSession):
+        first = await create_wallet(test_session)
+        second = await create_wallet(test_session)
+        fake_uuid = "00000000-0000-0000-0000-000000000000"
+        
+        results = await apply_operations_batch(
+            test_session,
+            [
+                (str(first.id), parse_amount("10.00"), "DEPOSIT"),
+                (str(second.id), parse_amount("20.00"), "DEPOSIT"),
+                (fake_uuid, parse_amount("30.00"), "DEPOSIT"),
+            ]
+        )
+        
+        assert [r.status for r in results] == [
+            "Successful",
+            "Successful",
+            "Wallet not found",
+        ]
+        
+        await test_session.refresh(first)
+        await test_session.refresh(second)
+        assert first.balance == 1000
+        assert second.balance == 2000
+    
+    @pytest.mark.asyncio
+    async def test_atomic_batch_rolls_back_on_failure(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        results = await apply_operations_batch(
+            test_session,
+            [
+                (wallet_id, parse_amount("50.00"), "DEPOSIT"),
+                (wallet_id, parse_amount("80.00"), "WITHDRAW"),
+            ],
+            atomic=True,
+        )
+        
+        assert [r.status for r in results] == [
+            "Rolled back",
+            "Insufficient funds",
+        ]
+        
+        await test_session.refresh(wallet)
+        assert wallet.balance == 0
+        
+        ledger_rows = await test_session.scalar(
+            select(func.count()).select_from(Transaction)
+        )
+        assert ledger_rows == 0
+
+
+class TestWalletOperationCoalescing:
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_withdrawals_get_individual_results(
+        self,
+        test_session: AsyncSession,
+        pooled_session_factory: async_sessionmaker[AsyncSession],
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        await update_wallet_balance(
+            test_session,
+            wallet_id,
+            parse_amount("10.00"),
+            "DEPOSIT"
+        )
+        
+        coalescer = WalletOperationCoalescer(window=0.05, max_batch_size=8)
+        
+        async def withdraw() -> bool:
+            async with pooled_session_factory() as session:
+                try:
+                    await coalescer.submit(
+                        session,
+                        wallet_id,
+                        parse_amount("1.00"),
+                        "WITHDRAW"
+                    )
+                except ValueError:
+                    return False
+                return True
+        
+        results = await asyncio.gather(*(withdraw() for _ in range(25)))
+        
+        assert sum(results) == 10
+        
+        final_wallet = await get_wallet_by_uuid(test_session, wallet_id)
+        await test_session.refresh(final_wallet)
+        assert final_wallet.balance == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_follower_is_not_applied(
+        self,
+        test_session: AsyncSession,
+        pooled_session_factory: async_sessionmaker[AsyncSession],
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        coalescer = WalletOperationCoalescer(window=0.2, max_batch_size=8)
+        
+        async def deposit(amount: str):
+            async with pooled_session_factory() as session:
+                return await coalescer.submit(
+                    session,
+                    wallet_id,
+                    parse_amount(amount),
+                    "DEPOSIT"
+                )
+        
+        leader = asyncio.create_task(deposit("1.00"))
+        await asyncio.sleep(0.01)
+        cancelled = asyncio.create_task(deposit("2.00"))
+        follower = asyncio.create_task(deposit("4.00"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        
+        results = await asyncio.gather(
+            leader,
+            cancelled,
+            follower,
+            return_exceptions=True
+        )
+        
+        assert isinstance(results[1], asyncio.CancelledError)
+        assert results[2].balance == 500
+        
+        final_wallet = await get_wallet_by_uuid(test_session, wallet_id)
+        await test_session.refresh(final_wallet)
+        assert final_wallet.balance == 500
+    
+    @pytest.mark.asyncio
+    async def test_leader_cancelled_after_commit_delivers_results(
+        self,
+        test_session: AsyncSession,
+        pooled_session_factory: async_sessionmaker[AsyncSession],
+        monkeypatch,
+    ):
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        committed = asyncio.Event()
+        apply_operations = operation_coalescer.apply_operations_batch
+        
+        async def apply_then_stall(session, operations):
+            results = await apply_operations(session, operations)
+            committed.set()
+            await asyncio.sleep(0.05)
+            return results
+        
+        monkeypatch.setattr(
+            operation_coalescer,
+            "apply_operations_batch",
+            apply_then_stall
+        )
+        coalescer = WalletOperationCoalescer(window=0.05, max_batch_size=8)
+        
+        async def deposit(amount: str):
+            async with pooled_session_factory() as session:
+                return await coalescer.submit(
+                    session,
+                    wallet_id,
+                    parse_amount(amount),
+                    "DEPOSIT"
+                )
+        
+        leader = asyncio.create_task(deposit("1.00"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(deposit("2.00"))
+        await committed.wait()
+        leader.cancel()
+        
+        results = await asyncio.gather(leader, follower, return_exceptions=True)
+        
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert results[1].balance == 300
+        
+        final_wallet = await get_wallet_by_uuid(test_session, wallet_id)
+        await test_session.refresh(final_wallet)
+        assert final_wallet.balance == 300
+
+
+class TestWalletTransfers:
+    
+    @pytest.mark.asyncio
+    async def test_transfer_moves_funds(self, test_session: AsyncSession):
+        source = await create_wallet(test_session)
+        target = await create_wallet(test_session)
+        
+        await update_wallet_balance(
+            test_session,
+            str(source.id),
+            parse_amount("100.00"),
+            "DEPOSIT"
+        )
+        
+        balances = await transfer_between_wallets(
+            test_session,
+            str(source.id),
+            str(target.id),
+            parse_amount("40.00"),
+        )
+        
+        assert balances == (6000, 4000, 2, "USD")
+        
+        target_history = await get_wallet_transactions(test_session, str(target.id))
+        assert [(t.type, t.amount) for t in target_history] == [
+            ("TRANSFER_IN", 4000),
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_transfer_insufficient_funds(self, test_session: AsyncSession):
+        source = await create_wallet(test_session)
+        target = await create_wallet(test_session)
+        
+        with pytest.raises(ValueError, match="Insufficient funds"):
+            await transfer_between_wallets(
+                test_session,
+                str(source.id),
+                str(target.id),
+                parse_amount("1.00"),
+            )
+    
+    @pytest.mark.asyncio
+    async def test_transfer_to_nonexistent_wallet(self, test_session: AsyncSession):
+        source = await create_wallet(test_session)
+        fake_uuid = "00000000-0000-0000-0000-000000000000"
+        
+        result = await transfer_between_wallets(
+            test_session,
+            str(source.id),
+            fake_uuid,
+            parse_amount("1.00"),
+        )
+        
+        assert result is None
+    
+    @pytest.mark.asyncio
+    async def test_crossing_transfers_do_not_deadlock(
+        self,
+        test_session: AsyncSession,
+        pooled_session_factory: async_sessionmaker[AsyncSession],
+    ):
+        first = await create_wallet(test_session)
+        second = await create_wallet(test_session)
+        first_id, second_id = str(first.id), str(second.id)
+        
+        for wallet_id in (first_id, second_id):
+            await update_wallet_balance(
+                test_session,
+                wallet_id,
+                parse_amount("1000.00"),
+                "DEPOSIT"
+            )
+        
+        async def transfer(from_id: str, to_id: str) -> None:
+            async with pooled_session_factory() as session:
+                await transfer_between_wallets(
+                    session,
+                    from_id,
+                    to_id,
+                    parse_amount("1.00"),
+                )
+        
+        await asyncio.gather(
+            *(transfer(first_id, second_id) for _ in range(150)),
+            *(transfer(second_id, first_id) for _ in range(150)),
+        )
+        
+        await test_session.refresh(first)
+        await test_session.refresh(second)
+        assert first.balance == 100000
+        assert second.balance == 100000
+        
+        transfer_rows = await test_session.scalar(
+            select(func.count())
+            .select_from(Transaction)
+            .where(Transaction.type.in_(["TRANSFER_IN", "TRANSFER_OUT"]))
+        )
+        assert transfer_rows == 600
+
+
+class TestMultiCurrencyWallets:
+    
+    @pytest.mark.asyncio
+    async def test_operation_in_another_currency(
+        self,
+        test_session: AsyncSession,
+        monkeypatch,
+    ):
+        monkeypatch.setitem(settings.money.currency_scales, "JPY", 0)
+        wallet = await create_wallet(test_session)
+        wallet_id = str(wallet.id)
+        
+        await update_wallet_balance(test_session, wallet_id, parse_amount("10"), "DEPOSIT")
+        updated = await update_wallet_balance(
+            test_session,
+            wallet_id,
+            parse_amount("1500"),
+            "DEPOSIT",
+            currency="JPY",
+        )
+        
+        assert (updated.balance, updated.currency, updated.currency_scale) == (1500, "JPY", 0)
+        
+        with pytest.raises(ValueError, match="Insufficient funds"):
+            await update_wallet_balance(
+                test_session,
+                wallet_id,
+                parse_amount("2000"),
+                "WITHDRAW",
+                currency="JPY",
+            )
+        with pytest.raises(ValueError, match=AMOUNT_TOO_PRECISE):
+            await update_wallet_balance(
+                test_session,
+                wallet_id,
+                parse_amount("0.5"),
+                "DEPOSIT",
+                currency="JPY",
+            )
+        
+        fetched = await get_wallet_by_uuid(test_session, wallet_id)
+        assert (fetched.currency, fetched.balance) == ("USD", 1000)
+        assert [
+            (balance.currency, balance.balance, balance.currency_scale)
+            for balance in fetched.balances
+        ] == [("JPY", 1500, 0)]
+        
+        cached = await get_wallet_cached(test_session, wallet_id)
+        assert [(balance.currency, balance.balance) for balance in cached.balances] == [
+            ("JPY", 1500),
+        ]
+        
+        history = await get_wallet_transactions(test_session, wallet_id)
+        assert [(t.currency, t.amount) for t in history] == [
+            ("JPY", 1500),
+            (None, 1000),
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_batch_and_transfer_across_currencies(self, test_session: AsyncSession):
+        first = await create_wallet(test_session)
+        second = await create_wallet(test_session, currency="EUR")
+        
+        results = await apply_operations_batch(
+            test_session,
+            [
+                (str(first.id), parse_amount("30"), "DEPOSIT", "EUR"),
+                (str(first.id), parse_amount("5"), "DEPOSIT"),
+                (str(second.id), parse_amount("10"), "DEPOSIT"),
+                (str(first.id), parse_amount("31"), "WITHDRAW", "EUR"),
+            ],
+        )
+        
+        assert [(result.balance, result.currency) for result in results] == [
+            (3000, "EUR"),
+            (500, "USD"),
+            (1000, "EUR"),
+            (None, None),
+        ]
+        
+        transferred = await transfer_between_wallets(
+            test_session,
+            str(first.id),
+            str(second.id),
+            parse_amount("12.50"),
+            currency="EUR",
+        )
+        
+        assert transferred == (1750, 2250, 2, "EUR")
+        
+        cached = await get_wallet_cached(test_session, str(first.id))
+        assert cached.balance == 500
+        assert [(balance.currency, balance.balance) for balance in cached.balances] == [
+            ("EUR", 1750),
+        ]
+        
+        second_wallet = await get_wallet_cached(test_session, str(second.id))
+        assert (second_wallet.currency, second_wallet.balance) == ("EUR", 2250)
+        assert second_wallet.balances == []
+        
+        assert await find_balance_drift(test_session, [first.id, second.id]) == []
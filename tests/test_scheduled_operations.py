@@ -0,0 +1,272 @@
+import asyncio
+
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+import pytest
+
+from httpx import AsyncClient
+
+from sqlalchemy import (
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from app.db.models.scheduled_operation import ScheduledOperation
+from app.db.models.transaction import Transaction
+from app.db.repository.scheduled_operation_repository import (
+    run_due_operations,
+    schedule_operation,
+)
+from app.db.repository.wallet_repository import (
+    BALANCE_TOO_LARGE,
+    create_wallet,
+    get_wallet_cached,
+    update_wallet_balance,
+)
+from app.utils.money import (
+    MAX_MINOR_UNITS,
+    parse_amount,
+)
+
+
+def ago(**kwargs) -> str:
+    return (datetime.now(timezone.utc) - timedelta(**kwargs)).isoformat()
+
+
+async def scheduled(session: AsyncSession, operation_id: int) -> ScheduledOperation:
+    return await session.scalar(
+        select(ScheduledOperation)
+        .where(ScheduledOperation.id == operation_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+class TestScheduledOperationRuns:
+    
+    @pytest.mark.asyncio
+    async def test_one_off_operation_runs_once(self, test_session: AsyncSession):
+        wallet_id = str((await create_wallet(test_session)).id)
+        operation = await schedule_operation(
+            test_session,
+            wallet_id,
+            parse_amount("12.50"),
+            "DEPOSIT",
+        )
+        pending = await schedule_operation(
+            test_session,
+            wallet_id,
+            parse_amount("1"),
+            "DEPOSIT",
+            run_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        )
+        operation_id, pending_id = operation.id, pending.id
+    
+        assert await run_due_operations(test_session) == 1
+        assert await run_due_operations(test_session) == 0
+    
+        assert (await get_wallet_cached(test_session, wallet_id)).balance == 1250
+        assert (await scheduled(test_session, operation_id)).status == "COMPLETED"
+        assert (await scheduled(test_session, pending_id)).status == "PENDING"
+    
+    @pytest.mark.asyncio
+    async def test_recurring_operation_skips_missed_runs(self, test_session: AsyncSession):
+        wallet_id = str((await create_wallet(test_session)).id)
+        run_at = datetime.now(timezone.utc) - timedelta(minutes=90)
+        operation = await schedule_operation(
+            test_session,
+            wallet_id,
+            parse_amount("5"),
+            "DEPOSIT",
+            run_at=run_at,
+            repeat_every=timedelta(hours=1),
+        )
+        operation_id = operation.id
+    
+        assert await run_due_operations(test_session) == 1
+        assert await run_due_operations(test_session) == 0
+    
+        assert (await get_wallet_cached(test_session, wallet_id)).balance == 500
+        operation = await scheduled(test_session, operation_id)
+        assert operation.status == "PENDING"
+        assert operation.run_at == run_at + timedelta(hours=2)
+    
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded(self, test_session: AsyncSession):
+        wallet = await create_wallet(test_session)
+        one_off = await schedule_operation(
+            test_session,
+            str(wallet.id),
+            parse_amount("1"),
+            "WITHDRAW",
+        )
+        recurring = await schedule_operation(
+            test_session,
+            str(wallet.id),
+            parse_amount("1"),
+            "WITHDRAW",
+            currency="EUR",
+            repeat_every=timedelta(days=1),
+        )
+    
+        assert await run_due_operations(test_session) == 2
+    
+        one_off = await scheduled(test_session, one_off.id)
+        assert (one_off.status, one_off.last_error) == ("FAILED", "Insufficient funds")
+        recurring = await scheduled(test_session, recurring.id)
+        assert (recurring.status, recurring.last_error) == ("PENDING", "Insufficient funds")
+        assert await run_due_operations(test_session) == 0
+    
+    @pytest.mark.asyncio
+    async def test_overflowing_deposit_fails_its_run(self, test_session: AsyncSession):
+        wallet_id = str((await create_wallet(test_session, currency_scale=0)).id)
+        operation = await schedule_operation(
+            test_session,
+            wallet_id,
+            parse_amount("2"),
+            "DEPOSIT",
+        )
+        await update_wallet_balance(
+            test_session,
+            wallet_id,
+            parse_amount(str(MAX_MINOR_UNITS - 1)),
+            "DEPOSIT",
+        )
+    
+        assert await run_due_operations(test_session) == 1
+    
+        operation = await scheduled(test_session, operation.id)
+        assert (operation.status, operation.last_error) == ("FAILED", BALANCE_TOO_LARGE)
+        assert (await get_wallet_cached(test_session, wallet_id)).balance == MAX_MINOR_UNITS - 1
+    
+    @pytest.mark.asyncio
+    async def test_invalid_row_fails_alone(self, test_session: AsyncSession):
+        wallet_id = str((await create_wallet(test_session)).id)
+        valid = await schedule_operation(
+            test_session,
+            wallet_id,
+            parse_amount("3"),
+            "DEPOSIT",
+        )
+        invalid = await test_session.scalar(
+            insert(ScheduledOperation)
+            .values(
+                wallet_id=wallet_id,
+                operation_type="DEPOSIT",
+                amount="not an amount",
+                run_at=func.now(),
+                repeat_every=timedelta(hours=1),
+                status="PENDING",
+            )
+            .returning(ScheduledOperation.id)
+        )
+        await test_session.commit()
+        valid_id = valid.id
+    
+        assert await run_due_operations(test_session) == 2
+    
+        assert (await get_wallet_cached(test_session, wallet_id)).balance == 300
+        assert (await scheduled(test_session, valid_id)).status == "COMPLETED"
+        operation = await scheduled(test_session, invalid)
+        assert operation.status == "FAILED"
+        assert operation.last_error == "Invalid amount: 'not an amount'"
+        assert await run_due_operations(test_session) == 0
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_workers_apply_each_operation_once(
+        self,
+        test_session: AsyncSession,
+        pooled_session_factory: async_sessionmaker[AsyncSession],
+    ):
+        wallet_ids = [str((await create_wallet(test_session)).id) for _ in range(3)]
+        for i in range(60):
+            await schedule_operation(
+                test_session,
+                wallet_ids[i % 3],
+                parse_amount("1"),
+                "DEPOSIT",
+            )
+    
+        async def worker():
+            claimed = 0
+            async with pooled_session_factory() as session:
+                while count := await run_due_operations(session, batch_size=7):
+                    claimed += count
+            return claimed
+    
+        claimed = await asyncio.gather(*(worker() for _ in range(6)))
+    
+        assert sum(claimed) == 60
+        for wallet_id in wallet_ids:
+            assert (await get_wallet_cached(test_session, wallet_id)).balance == 2000
+        assert await test_session.scalar(
+            select(func.count()).select_from(Transaction)
+        ) == 60
+
+
+class TestScheduledOperationsEndpoints:
+    
+    @pytest.mark.asyncio
+    async def test_schedule_list_and_cancel(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        url = f"/api/wallets/{wallet_id}/scheduled_operations"
+    
+        for amount in ("1", "2", "3"):
+            response = await client.post(
+                url,
+                json={
+                    "operation_type": "DEPOSIT",
+                    "amount": amount,
+                    "run_at": ago(minutes=-5),
+                    "repeat_every": 3600,
+                }
+            )
+            assert response.status_code == 200
+    
+        data = response.json()
+        assert (data["amount"], data["repeat_every"], data["status"]) == ("3", 3600, "PENDING")
+    
+        response = await client.get(url, params={"limit": 2})
+        page = response.json()
+        assert [item["amount"] for item in page["scheduled_operations"]] == ["3", "2"]
+    
+        response = await client.get(url, params={"cursor": page["next_cursor"]})
+        assert [item["amount"] for item in response.json()["scheduled_operations"]] == ["1"]
+    
+        response = await client.delete(f"{url}/{data['id']}")
+        assert response.json()["status"] == "CANCELLED"
+        response = await client.delete(f"{url}/{data['id']}")
+        assert response.status_code == 404
+    
+    @pytest.mark.asyncio
+    async def test_invalid_schedules(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        url = f"/api/wallets/{wallet_id}/scheduled_operations"
+    
+        response = await client.post(
+            url,
+            json={"operation_type": "DEPOSIT", "amount": "0.001"}
+        )
+        assert response.status_code == 400
+    
+        response = await client.post(
+            url,
+            json={"operation_type": "DEPOSIT", "amount": "1", "repeat_every": 0}
+        )
+        assert response.status_code == 422
+    
+        response = await client.post(
+            "/api/wallets/00000000-0000-0000-0000-000000000000/scheduled_operations",
+            json={"operation_type": "DEPOSIT", "amount": "1"}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,248 @@
+from datetime import (
+    date,
+    datetime,
+    timezone,
+)
+
+import uuid
+
+import pytest
+
+from sqlalchemy import (
+    delete,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from app.db.models.job_checkpoint import JobCheckpoint
+from app.db.models.transaction import Transaction
+from app.db.models.wallet_balance_snapshot import WalletBalanceSnapshot
+from app.db.models.wallets import Wallet
+from app.db.partitions import (
+    create_transaction_partitions,
+    detach_transaction_partitions,
+)
+from app.db.repository.reconciliation_repository import carry_forward_partition
+from app.db.repository.snapshot_repository import (
+    SNAPSHOT_JOB,
+    _claim_checkpoint,
+    get_balance_at,
+    refresh_balance_snapshots,
+)
+
+
+def utc(day: int, hour: int) -> datetime:
+    return datetime(2026, 1, day, hour, tzinfo=timezone.utc)
+
+
+NOW = utc(5, 1)
+
+LEDGER = [
+    ("DEPOSIT", 10000, utc(1, 12)),
+    ("WITHDRAW", 3000, utc(1, 18)),
+    ("TRANSFER_IN", 5000, utc(3, 9)),
+    ("TRANSFER_OUT", 2000, utc(3, 15)),
+]
+
+
+async def backdated_wallet(session: AsyncSession) -> uuid.UUID:
+    wallet_id = uuid.uuid4()
+    await session.execute(
+        insert(Wallet).values(
+            id=wallet_id,
+            balance=10000,
+            created_at=utc(1, 10),
+            updated_at=utc(3, 15),
+        )
+    )
+    await session.execute(
+        insert(Transaction).values(
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "wallet_id": wallet_id,
+                    "type": entry_type,
+                    "amount": amount,
+                    "created_at": created_at,
+                }
+                for entry_type, amount, created_at in LEDGER
+            ]
+        )
+    )
+    await session.commit()
+    
+    return wallet_id
+
+
+class TestBalanceSnapshots:
+    
+    @pytest.mark.asyncio
+    async def test_refresh_closes_days_incrementally(self, test_session: AsyncSession):
+        wallet_id = await backdated_wallet(test_session)
+        
+        assert await refresh_balance_snapshots(test_session, now=NOW) == 4
+        assert await refresh_balance_snapshots(test_session, now=NOW) == 0
+        
+        snapshots = await test_session.execute(
+            select(WalletBalanceSnapshot.day, WalletBalanceSnapshot.closing_balance)
+            .where(WalletBalanceSnapshot.wallet_id == wallet_id)
+            .order_by(WalletBalanceSnapshot.day)
+        )
+        assert snapshots.all() == [
+            (date(2026, 1, 1), 7000),
+            (date(2026, 1, 3), 10000),
+        ]
+        
+        assert await refresh_balance_snapshots(test_session, now=utc(6, 1)) == 1
+    
+    @pytest.mark.asyncio
+    async def test_settlement_lag_keeps_day_open(self, test_session: AsyncSession):
+        await backdated_wallet(test_session)
+        
+        closed = await refresh_balance_snapshots(
+            test_session,
+            settlement_lag=7200,
+            now=NOW,
+        )
+        
+        assert closed == 3
+    
+    @pytest.mark.asyncio
+    async def test_balance_at(self, test_session: AsyncSession):
+        wallet_id = await backdated_wallet(test_session)
+        expected = {
+            utc(1, 11): 0,
+            utc(1, 12): 10000,
+            utc(2, 12): 7000,
+            utc(3, 12): 12000,
+            utc(20, 0): 10000,
+        }
+        
+        for refreshed in (False, True):
+            if refreshed:
+                await refresh_balance_snapshots(test_session, now=NOW)
+            for at, balance in expected.items():
+                assert await get_balance_at(test_session, wallet_id, at) == balance
+    
+    @pytest.mark.asyncio
+    async def test_refresh_skips_while_another_worker_holds_checkpoint(
+        self,
+        test_engine: AsyncEngine,
+        test_session: AsyncSession,
+    ):
+        await backdated_wallet(test_session)
+        session_factory = async_sessionmaker(bind=test_engine, expire_on_commit=False)
+        
+        async with session_factory() as holder:
+            await _claim_checkpoint(holder, SNAPSHOT_JOB, utc(1, 0))
+            await holder.commit()
+            assert await _claim_checkpoint(holder, SNAPSHOT_JOB, utc(1, 0)) == utc(1, 0)
+            
+            assert await refresh_balance_snapshots(test_session, now=NOW) == 0
+            
+            await holder.rollback()
+    
+    @pytest.mark.asyncio
+    async def test_detached_partition_is_not_counted_twice(
+        self,
+        test_engine: AsyncEngine,
+        test_session: AsyncSession,
+    ):
+        def at(month: int, day: int) -> datetime:
+            return datetime(2090, month, day, 12, tzinfo=timezone.utc)
+        
+        wallet_id = uuid.uuid4()
+        try:
+            async with test_engine.connect() as conn:
+                await create_transaction_partitions(conn, months_ahead=1, now=at(3, 15))
+            
+            await test_session.execute(
+                insert(Wallet).values(
+                    id=wallet_id,
+                    balance=1000,
+                    created_at=at(3, 1),
+                    updated_at=at(3, 10),
+                )
+            )
+            await test_session.execute(
+                insert(Transaction).values(
+                    id=uuid.uuid4(),
+                    wallet_id=wallet_id,
+                    type="DEPOSIT",
+                    amount=1000,
+                    created_at=at(3, 10),
+                )
+            )
+            await test_session.commit()
+            await refresh_balance_snapshots(test_session, now=at(4, 3))
+            
+            async with test_engine.connect() as conn:
+                detached = await detach_transaction_partitions(
+                    conn,
+                    retention_months=12,
+                    now=datetime(2091, 4, 1, tzinfo=timezone.utc),
+                    before_detach=carry_forward_partition,
+                )
+            assert detached == ["transactions_p209003"]
+            
+            expected = {
+                at(3, 20): 1000,
+                at(3, 31): 1000,
+                at(4, 1): 1000,
+                at(4, 2): 1000,
+                at(4, 20): 1000,
+            }
+            for at_time, balance in expected.items():
+                assert await get_balance_at(test_session, wallet_id, at_time) == balance
+            
+            # Days closed after the detach, and snapshots rebuilt from the
+            # retained ledger alone, agree.
+            await refresh_balance_snapshots(test_session, now=at(4, 10))
+            assert await get_balance_at(test_session, wallet_id, at(4, 20)) == 1000
+            
+            await test_session.execute(delete(WalletBalanceSnapshot))
+            await test_session.execute(
+                delete(JobCheckpoint).where(JobCheckpoint.name == SNAPSHOT_JOB)
+            )
+            await test_session.commit()
+            await refresh_balance_snapshots(test_session, now=at(4, 10))
+            assert await get_balance_at(test_session, wallet_id, at(4, 1)) == 1000
+            assert await get_balance_at(test_session, wallet_id, at(4, 20)) == 1000
+        finally:
+            await test_session.rollback()
+            async with test_engine.begin() as conn:
+                await conn.execute(text("DROP TABLE IF EXISTS transactions_p209003"))
+                await conn.execute(text("DROP TABLE IF EXISTS transactions_p209004"))
+
+
+class TestBalanceAtEndpoint:
+    
+    @pytest.mark.asyncio
+    async def test_balance_at(self, client, test_session: AsyncSession):
+        wallet_id = await backdated_wallet(test_session)
+        
+        response = await client.get(
+            f"/api/wallets/{wallet_id}/balance",
+            params={"at": "2026-01-02T00:00:00"},
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["wallet_id"] == str(wallet_id)
+        assert data["balance"] == "70.00"
+        assert data["at"] == "2026-01-02T00:00:00Z"
+    
+    @pytest.mark.asyncio
+    async def test_unknown_wallet_is_404(self, client):
+        response = await client.get(
+            f"/api/wallets/{uuid.uuid4()}/balance",
+            params={"at": "2026-01-02T00:00:00Z"},
+        )
+        
+        assert response.status_code == 404
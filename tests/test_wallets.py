@@ -1,7 +1,17 @@
 import pytest
 import asyncio
+import csv
+import io
+
+import orjson
 
 from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.repository.wallet_repository import estimate_wallets_count
+from app.db.repository.idempotency_repository import idempotency_cache
 
 
 class TestWalletCreation:
@@ -70,7 +80,7 @@ class TestGetAllWallets:
         assert "wallets" in data
         assert "total" in data
         assert isinstance(data["wallets"], list)
-        assert isinstance(data["total"], int)
+        assert data["total"] is None or isinstance(data["total"], int)
     
     @pytest.mark.asyncio
     async def test_get_all_wallets_with_data(self, client: AsyncClient):
@@ -78,7 +88,7 @@ class TestGetAllWallets:
         await client.post("/api/wallets/create_wallet")
         await client.post("/api/wallets/create_wallet")
         
-        response = await client.get("/api/wallets/get_wallets")
+        response = await client.get("/api/wallets/get_wallets?total=exact")
         
         assert response.status_code == 200
         data = response.json()
@@ -91,7 +101,7 @@ class TestGetAllWallets:
         for _ in range(5):
             await client.post("/api/wallets/create_wallet")
         
-        response = await client.get("/api/wallets/get_wallets?skip=2&limit=2")
+        response = await client.get("/api/wallets/get_wallets?skip=2&limit=2&total=exact")
         
         assert response.status_code == 200
         data = response.json()
@@ -99,6 +109,55 @@ class TestGetAllWallets:
         assert len(data["wallets"]) == 2
         assert data["total"] == 5
     
+    @pytest.mark.asyncio
+    async def test_get_all_wallets_estimates_total_by_default(
+        self,
+        client: AsyncClient,
+        test_session: AsyncSession,
+    ):
+        for _ in range(4):
+            await client.post("/api/wallets/create_wallet")
+        await test_session.execute(text("ANALYZE wallets"))
+        await test_session.commit()
+        
+        response = await client.get("/api/wallets/get_wallets?limit=1")
+        
+        assert response.status_code == 200
+        assert response.json()["total"] == await estimate_wallets_count(test_session)
+    
+    @pytest.mark.asyncio
+    async def test_get_all_wallets_with_cursor(self, client: AsyncClient):
+        created_ids = []
+        for _ in range(5):
+            response = await client.post("/api/wallets/create_wallet")
+            created_ids.append(response.json()["wallet_id"])
+        
+        seen_ids = []
+        cursor = None
+        while True:
+            params = {"limit": 2, "total": "none"}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/wallets/get_wallets", params=params)
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] is None
+            
+            seen_ids.extend(w["wallet_id"] for w in data["wallets"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert seen_ids == created_ids
+    
+    @pytest.mark.asyncio
+    async def test_get_all_wallets_invalid_cursor(self, client: AsyncClient):
+        response = await client.get("/api/wallets/get_wallets?cursor=garbage")
+        
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+    
     @pytest.mark.asyncio
     async def test_get_all_wallets_default_pagination(self, client: AsyncClient):
         await client.post("/api/wallets/create_wallet")
@@ -292,6 +351,446 @@ class TestWalletOperations:
         assert float(data["new_balance"]) == 999999999.99
 
 
+class TestWalletTransactions:
+    
+    @pytest.mark.asyncio
+    async def test_get_wallet_transactions(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        operations = [
+            {"operation_type": "DEPOSIT", "amount": "100.00"},
+            {"operation_type": "WITHDRAW", "amount": "30.00"},
+            {"operation_type": "DEPOSIT", "amount": "5.00"},
+        ]
+        for operation in operations:
+            await client.post(f"/api/wallets/{wallet_id}/operation", json=operation)
+        
+        response = await client.get(f"/api/wallets/{wallet_id}/transactions")
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert [t["operation_type"] for t in data["transactions"]] == [
+            "DEPOSIT",
+            "WITHDRAW",
+            "DEPOSIT",
+        ]
+        assert float(data["transactions"][0]["amount"]) == 5.00
+        assert data["next_cursor"] is None
+    
+    @pytest.mark.asyncio
+    async def test_get_wallet_transactions_pagination(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        for _ in range(3):
+            await client.post(
+                f"/api/wallets/{wallet_id}/operation",
+                json={"operation_type": "DEPOSIT", "amount": "1.00"}
+            )
+        
+        first_page = await client.get(
+            f"/api/wallets/{wallet_id}/transactions",
+            params={"limit": 2}
+        )
+        cursor = first_page.json()["next_cursor"]
+        assert cursor is not None
+        
+        second_page = await client.get(
+            f"/api/wallets/{wallet_id}/transactions",
+            params={"limit": 2, "cursor": cursor}
+        )
+        
+        assert len(first_page.json()["transactions"]) == 2
+        assert len(second_page.json()["transactions"]) == 1
+        assert second_page.json()["next_cursor"] is None
+    
+    @pytest.mark.asyncio
+    async def test_get_wallet_transactions_filter_by_type(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "10.00"}
+        )
+        await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "WITHDRAW", "amount": "4.00"}
+        )
+        
+        response = await client.get(
+            f"/api/wallets/{wallet_id}/transactions",
+            params={"operation_type": "WITHDRAW"}
+        )
+        
+        assert response.status_code == 200
+        transactions = response.json()["transactions"]
+        assert len(transactions) == 1
+        assert float(transactions[0]["amount"]) == 4.00
+    
+    @pytest.mark.asyncio
+    async def test_get_transactions_nonexistent_wallet(self, client: AsyncClient):
+        fake_uuid = "00000000-0000-0000-0000-000000000000"
+        response = await client.get(f"/api/wallets/{fake_uuid}/transactions")
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Wallet not found"
+
+
+class TestTransactionsExport:
+    
+    @pytest.mark.asyncio
+    async def test_export_wallet_transactions_ndjson(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        for amount in ("10.00", "20.00"):
+            await client.post(
+                f"/api/wallets/{wallet_id}/operation",
+                json={"operation_type": "DEPOSIT", "amount": amount}
+            )
+        
+        response = await client.get(f"/api/wallets/{wallet_id}/transactions/export")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        
+        rows = [orjson.loads(line) for line in response.content.splitlines()]
+        assert [row["amount"] for row in rows] == ["20.00", "10.00"]
+        assert all(row["wallet_id"] == wallet_id for row in rows)
+    
+    @pytest.mark.asyncio
+    async def test_export_all_transactions_csv_gzip(self, client: AsyncClient):
+        for _ in range(2):
+            create_response = await client.post("/api/wallets/create_wallet")
+            wallet_id = create_response.json()["wallet_id"]
+            await client.post(
+                f"/api/wallets/{wallet_id}/operation",
+                json={"operation_type": "DEPOSIT", "amount": "5.00"}
+            )
+        
+        response = await client.get(
+            "/api/wallets/transactions/export",
+            params={"format": "csv", "compress": "true"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 2
+        assert all(row["operation_type"] == "DEPOSIT" for row in rows)
+    
+    @pytest.mark.asyncio
+    async def test_export_nonexistent_wallet(self, client: AsyncClient):
+        fake_uuid = "00000000-0000-0000-0000-000000000000"
+        response = await client.get(f"/api/wallets/{fake_uuid}/transactions/export")
+        
+        assert response.status_code == 404
+
+
+class TestIdempotentOperations:
+    
+    @pytest.mark.asyncio
+    async def test_replayed_key_does_not_apply_twice(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        headers = {"Idempotency-Key": f"deposit-{wallet_id}"}
+        operation_data = {"operation_type": "DEPOSIT", "amount": "100.00"}
+        
+        first = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json=operation_data,
+            headers=headers
+        )
+        second = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json=operation_data,
+            headers=headers
+        )
+        
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        
+        final_response = await client.get(f"/api/wallets/{wallet_id}")
+        assert float(final_response.json()["balance"]) == 100.00
+        
+        transactions = await client.get(f"/api/wallets/{wallet_id}/transactions")
+        assert len(transactions.json()["transactions"]) == 1
+    
+    @pytest.mark.asyncio
+    async def test_replay_served_from_index(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        headers = {"Idempotency-Key": f"index-{wallet_id}"}
+        operation_data = {"operation_type": "DEPOSIT", "amount": "10.00"}
+        
+        await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json=operation_data,
+            headers=headers
+        )
+        idempotency_cache.clear()
+        
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json=operation_data,
+            headers=headers
+        )
+        
+        assert response.status_code == 200
+        assert float(response.json()["new_balance"]) == 10.00
+        
+        final_response = await client.get(f"/api/wallets/{wallet_id}")
+        assert float(final_response.json()["balance"]) == 10.00
+    
+    @pytest.mark.asyncio
+    async def test_key_reused_for_different_operation(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        headers = {"Idempotency-Key": f"mismatch-{wallet_id}"}
+        
+        await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "10.00"},
+            headers=headers
+        )
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "20.00"},
+            headers=headers
+        )
+        
+        assert response.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_failed_operation_does_not_consume_key(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        headers = {"Idempotency-Key": f"retry-{wallet_id}"}
+        withdraw_data = {"operation_type": "WITHDRAW", "amount": "10.00"}
+        
+        failed = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json=withdraw_data,
+            headers=headers
+        )
+        assert failed.status_code == 400
+        
+        await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "10.00"}
+        )
+        retried = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json=withdraw_data,
+            headers=headers
+        )
+        
+        assert retried.status_code == 200
+        assert float(retried.json()["new_balance"]) == 0.0
+
+
+class TestWalletTransfers:
+    
+    @pytest.mark.asyncio
+    async def test_transfer(self, client: AsyncClient):
+        source_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        target_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        
+        await client.post(
+            f"/api/wallets/{source_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "100.00"}
+        )
+        
+        response = await client.post(
+            "/api/wallets/transfer",
+            json={
+                "from_wallet_id": source_id,
+                "to_wallet_id": target_id,
+                "amount": "25.00",
+            }
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert float(data["from_balance"]) == 75.00
+        assert float(data["to_balance"]) == 25.00
+        
+        target_response = await client.get(f"/api/wallets/{target_id}")
+        assert float(target_response.json()["balance"]) == 25.00
+        
+        history = await client.get(
+            f"/api/wallets/{source_id}/transactions",
+            params={"operation_type": "TRANSFER_OUT"}
+        )
+        assert len(history.json()["transactions"]) == 1
+    
+    @pytest.mark.asyncio
+    async def test_transfer_insufficient_funds(self, client: AsyncClient):
+        source_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        target_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        
+        response = await client.post(
+            "/api/wallets/transfer",
+            json={
+                "from_wallet_id": source_id,
+                "to_wallet_id": target_id,
+                "amount": "25.00",
+            }
+        )
+        
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Insufficient funds"
+    
+    @pytest.mark.asyncio
+    async def test_transfer_to_same_wallet(self, client: AsyncClient):
+        wallet_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        
+        response = await client.post(
+            "/api/wallets/transfer",
+            json={
+                "from_wallet_id": wallet_id,
+                "to_wallet_id": wallet_id,
+                "amount": "1.00",
+            }
+        )
+        
+        assert response.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_transfer_to_nonexistent_wallet(self, client: AsyncClient):
+        source_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        
+        response = await client.post(
+            "/api/wallets/transfer",
+            json={
+                "from_wallet_id": source_id,
+                "to_wallet_id": "00000000-0000-0000-0000-000000000000",
+                "amount": "1.00",
+            }
+        )
+        
+        assert response.status_code == 404
+
+
+class TestBulkWalletCreation:
+    
+    @pytest.mark.asyncio
+    async def test_create_wallets_stream(self, client: AsyncClient):
+        response = await client.post(
+            "/api/wallets/create_wallets",
+            params={"count": 150}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        wallets = [orjson.loads(line) for line in response.text.splitlines()]
+        assert len(wallets) == 150
+        assert len({wallet["wallet_id"] for wallet in wallets}) == 150
+        
+        get_response = await client.get(f"/api/wallets/{wallets[-1]['wallet_id']}")
+        assert get_response.status_code == 200
+        assert float(get_response.json()["balance"]) == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_create_wallets_count_validation(self, client: AsyncClient):
+        for count in (0, 1_000_001):
+            response = await client.post(
+                "/api/wallets/create_wallets",
+                params={"count": count}
+            )
+            
+            assert response.status_code == 422
+
+
+class TestMetrics:
+    
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "1.00"}
+        )
+        
+        response = await client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'route="/api/wallets/{wallet_uuid}/operation",status="200"' in body
+        assert 'http_request_db_round_trips_count{method="POST",route="/api/wallets/create_wallet"}' in body
+        assert 'db_round_trips_total{engine="test"}' in body
+        assert 'db_pool_size{engine="primary"}' in body
+    
+    @pytest.mark.asyncio
+    async def test_round_trips_recorded_per_request(self, client: AsyncClient):
+        from app.core.metrics import http_request_db_round_trips
+        
+        labels = ("POST", "/api/wallets/{wallet_uuid}/operation")
+        count_before = http_request_db_round_trips.count(*labels)
+        sum_before = http_request_db_round_trips.sum(*labels)
+        
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "1.00"}
+        )
+        
+        assert http_request_db_round_trips.count(*labels) == count_before + 1
+        assert http_request_db_round_trips.sum(*labels) == sum_before + 1
+    
+    @pytest.mark.asyncio
+    async def test_create_wallet_is_single_statement(self, client: AsyncClient):
+        from app.core.metrics import http_request_db_round_trips
+        
+        labels = ("POST", "/api/wallets/create_wallet")
+        sum_before = http_request_db_round_trips.sum(*labels)
+        
+        response = await client.post("/api/wallets/create_wallet")
+        
+        assert response.status_code == 200
+        assert response.json()["created_at"] is not None
+        assert http_request_db_round_trips.sum(*labels) == sum_before + 1
+    
+    @pytest.mark.asyncio
+    async def test_transfer_round_trips(self, client: AsyncClient):
+        from app.core.metrics import http_request_db_round_trips
+        
+        source_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        target_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        await client.post(
+            f"/api/wallets/{source_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "10.00"}
+        )
+        
+        labels = ("POST", "/api/wallets/transfer")
+        sum_before = http_request_db_round_trips.sum(*labels)
+        
+        await client.post(
+            "/api/wallets/transfer",
+            json={
+                "from_wallet_id": source_id,
+                "to_wallet_id": target_id,
+                "amount": "1.00",
+            }
+        )
+        
+        # SELECT ... FOR UPDATE, then UPDATE with the ledger insert as a CTE
+        assert http_request_db_round_trips.sum(*labels) == sum_before + 2
+
+
 class TestWalletIntegration:
     
     @pytest.mark.asyncio
@@ -350,3 +849,265 @@ class TestWalletIntegration:
         final_response = await client.get(f"/api/wallets/{wallet_id}")
         final_balance = float(final_response.json()["balance"])
         assert final_balance >= 0
+
+
+class TestWalletOperationsBatch:
+    
+    @pytest.mark.asyncio
+    async def test_batch_best_effort(self, client: AsyncClient):
+        first_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        second_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        
+        response = await client.post(
+            "/api/wallets/operations:batch",
+            json={
+                "operations": [
+                    {"wallet_id": first_id, "operation_type": "DEPOSIT", "amount": "100.00"},
+                    {"wallet_id": second_id, "operation_type": "WITHDRAW", "amount": "10.00"},
+                    {"wallet_id": first_id, "operation_type": "WITHDRAW", "amount": "40.00"},
+                ]
+            }
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["applied"] == 2
+        assert [r["status"] for r in data["results"]] == [
+            "Successful",
+            "Insufficient funds",
+            "Successful",
+        ]
+        assert float(data["results"][2]["new_balance"]) == 60.00
+        
+        first_response = await client.get(f"/api/wallets/{first_id}")
+        assert float(first_response.json()["balance"]) == 60.00
+    
+    @pytest.mark.asyncio
+    async def test_batch_atomic(self, client: AsyncClient):
+        wallet_id = (await client.post("/api/wallets/create_wallet")).json()["wallet_id"]
+        
+        response = await client.post(
+            "/api/wallets/operations:batch",
+            json={
+                "atomic": True,
+                "operations": [
+                    {"wallet_id": wallet_id, "operation_type": "DEPOSIT", "amount": "100.00"},
+                    {"wallet_id": wallet_id, "operation_type": "WITHDRAW", "amount": "150.00"},
+                ]
+            }
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["applied"] == 0
+        assert [r["status"] for r in data["results"]] == [
+            "Rolled back",
+            "Insufficient funds",
+        ]
+        
+        wallet_response = await client.get(f"/api/wallets/{wallet_id}")
+        assert float(wallet_response.json()["balance"]) == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_batch_with_invalid_wallet_id(self, client: AsyncClient):
+        response = await client.post(
+            "/api/wallets/operations:batch",
+            json={
+                "operations": [
+                    {"wallet_id": "not-a-uuid", "operation_type": "DEPOSIT", "amount": "1.00"},
+                ]
+            }
+        )
+        
+        assert response.status_code == 422
+
+
+class TestCurrencyScale:
+    
+    @pytest.mark.asyncio
+    async def test_wallet_with_custom_scale(self, client: AsyncClient):
+        response = await client.post(
+            "/api/wallets/create_wallet",
+            params={"currency_scale": 3},
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["balance"] == "0.000"
+        assert response.json()["currency_scale"] == 3
+        wallet_id = response.json()["wallet_id"]
+        
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "1.005"}
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["new_balance"] == "1.005"
+        
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "0.0001"}
+        )
+        
+        assert response.status_code == 400
+        
+        response = await client.get(f"/api/wallets/{wallet_id}/transactions")
+        
+        assert response.json()["transactions"][0]["amount"] == "1.005"
+    
+    @pytest.mark.asyncio
+    async def test_amounts_are_exact_strings(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        for amount in ("0.1", 0.2, "0.30"):
+            response = await client.post(
+                f"/api/wallets/{wallet_id}/operation",
+                json={"operation_type": "DEPOSIT", "amount": amount}
+            )
+            assert response.status_code == 200
+        
+        assert response.json()["new_balance"] == "0.60"
+        
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "1e3"}
+        )
+        
+        assert response.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_invalid_scale(self, client: AsyncClient):
+        response = await client.post(
+            "/api/wallets/create_wallet",
+            params={"currency_scale": 19},
+        )
+        
+        assert response.status_code == 422
+
+
+class TestMultiCurrency:
+    
+    @pytest.mark.asyncio
+    async def test_wallet_holds_several_currencies(self, client: AsyncClient):
+        create_response = await client.post(
+            "/api/wallets/create_wallet",
+            params={"currency": "EUR"},
+        )
+        wallet_id = create_response.json()["wallet_id"]
+        
+        assert create_response.json()["currency"] == "EUR"
+        
+        for currency, amount in ((None, "10.00"), ("USD", "2.50"), ("GBP", "1")):
+            response = await client.post(
+                f"/api/wallets/{wallet_id}/operation",
+                json={"operation_type": "DEPOSIT", "amount": amount, "currency": currency}
+            )
+            assert response.status_code == 200
+        
+        assert response.json() == {
+            "status": "Successful",
+            "new_balance": "1.00",
+            "currency": "GBP",
+        }
+        
+        response = await client.get(f"/api/wallets/{wallet_id}")
+        
+        data = response.json()
+        assert (data["currency"], data["balance"]) == ("EUR", "10.00")
+        assert [(b["currency"], b["balance"]) for b in data["balances"]] == [
+            ("EUR", "10.00"),
+            ("GBP", "1.00"),
+            ("USD", "2.50"),
+        ]
+        
+        response = await client.get(f"/api/wallets/{wallet_id}/transactions")
+        
+        assert [
+            (t["currency"], t["amount"])
+            for t in response.json()["transactions"]
+        ] == [("GBP", "1.00"), ("USD", "2.50"), ("EUR", "10.00")]
+    
+    @pytest.mark.asyncio
+    async def test_withdraw_from_empty_currency(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "WITHDRAW", "amount": "1", "currency": "EUR"}
+        )
+        
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Insufficient funds"
+        
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "1", "currency": "eur"}
+        )
+        
+        assert response.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_idempotency_key_is_bound_to_currency(self, client: AsyncClient):
+        create_response = await client.post("/api/wallets/create_wallet")
+        wallet_id = create_response.json()["wallet_id"]
+        operation = {"operation_type": "DEPOSIT", "amount": "5", "currency": "EUR"}
+        headers = {"Idempotency-Key": "multi-currency-key"}
+        
+        for _ in range(2):
+            response = await client.post(
+                f"/api/wallets/{wallet_id}/operation",
+                json=operation,
+                headers=headers,
+            )
+            assert response.json()["new_balance"] == "5.00"
+        
+        response = await client.post(
+            f"/api/wallets/{wallet_id}/operation",
+            json={"operation_type": "DEPOSIT", "amount": "5"},
+            headers=headers,
+        )
+        
+        assert response.status_code == 422
+
+
+class TestFastResponses:
+    
+    @pytest.mark.asyncio
+    async def test_bodies_match_model_responses(self, client: AsyncClient, monkeypatch):
+        create_response = await client.post(
+            "/api/wallets/create_wallet",
+            params={"currency_scale": 3},
+        )
+        wallet_id = create_response.json()["wallet_id"]
+        for currency, amount in ((None, "1.005"), ("EUR", "2")):
+            await client.post(
+                f"/api/wallets/{wallet_id}/operation",
+                json={"operation_type": "DEPOSIT", "amount": amount, "currency": currency}
+            )
+        paths = (
+            "/api/wallets/get_wallets",
+            f"/api/wallets/{wallet_id}",
+            f"/api/wallets/{wallet_id}/transactions",
+        )
+    
+        bodies = {}
+        for fast in (True, False):
+            monkeypatch.setattr(settings.api, "fast_responses", fast)
+            bodies[fast] = [(await client.get(path)).content for path in paths]
+    
+        assert [orjson.loads(body) for body in bodies[True]] == [
+            orjson.loads(body) for body in bodies[False]
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_openapi_keeps_response_models(self, client: AsyncClient):
+        response = await client.get("/openapi.json")
+    
+        schema = response.json()["paths"]["/api/wallets/get_wallets"]["get"]
+        assert schema["responses"]["200"]["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/WalletsListResponse",
+        }